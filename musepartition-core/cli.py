@@ -217,8 +217,12 @@ def print_result(result, console=None):
         table.add_column("Fichier", style="cyan")
         table.add_column("Chemin", style="green")
         
-        table.add_row("MusicXML", result.musicxml_path)
-        table.add_row("MIDI", result.midi_path)
+        if result.musicxml_path:
+            table.add_row("MusicXML", result.musicxml_path)
+        if result.mxl_path:
+            table.add_row("MXL", result.mxl_path)
+        if result.midi_path:
+            table.add_row("MIDI", result.midi_path)
         if result.pdf_path:
             table.add_row("PDF", result.pdf_path)
         else:
@@ -241,8 +245,12 @@ def print_result(result, console=None):
         print("\n" + "="*60)
         print("✅ TRANSCRIPTION TERMINÉE")
         print("="*60)
-        print(f"MusicXML : {result.musicxml_path}")
-        print(f"MIDI     : {result.midi_path}")
+        if result.musicxml_path:
+            print(f"MusicXML : {result.musicxml_path}")
+        if result.mxl_path:
+            print(f"MXL      : {result.mxl_path}")
+        if result.midi_path:
+            print(f"MIDI     : {result.midi_path}")
         if result.pdf_path:
             print(f"PDF      : {result.pdf_path}")
         else:
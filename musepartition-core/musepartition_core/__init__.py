@@ -6,6 +6,9 @@ from src.types import (
     PitchFrame,
     Note,
     QuantizedNote,
+    NoteArray,
+    QuantizedNoteArray,
+    TempoMap,
     TranscriptionResult,
     AudioLoadError,
     PitchDetectionError,
@@ -14,10 +17,15 @@ from src.types import (
 )
 
 from musepartition_core.audio_processor import AudioProcessor
+from musepartition_core.audio_features import AudioFeatures
 from musepartition_core.pitch_detector import PitchDetector
 from musepartition_core.note_segmenter import NoteSegmenter
-from musepartition_core.quantizer import MusicalQuantizer
+from musepartition_core.onset_detector import OnsetDetector, OnsetAnalysis
+from musepartition_core.quantizer import MusicalQuantizer, QuantizerStream
 from musepartition_core.score_generator import ScoreGenerator
+from musepartition_core.musicxml_writer import MusicXMLWriter
+from musepartition_core.midi_writer import MidiWriter
+from musepartition_core.pdf_renderer import PdfCache, PdfRenderer
 from musepartition_core.pipeline import TranscriptionPipeline
 from musepartition_core.utils import (
     DebugTracer,
@@ -32,6 +40,9 @@ __all__ = [
     "PitchFrame",
     "Note",
     "QuantizedNote",
+    "NoteArray",
+    "QuantizedNoteArray",
+    "TempoMap",
     "TranscriptionResult",
     # Exceptions
     "AudioLoadError",
@@ -40,10 +51,18 @@ __all__ = [
     "ScoreGenerationError",
     # Modules
     "AudioProcessor",
+    "AudioFeatures",
     "PitchDetector",
     "NoteSegmenter",
+    "OnsetDetector",
+    "OnsetAnalysis",
     "MusicalQuantizer",
+    "QuantizerStream",
     "ScoreGenerator",
+    "MusicXMLWriter",
+    "MidiWriter",
+    "PdfRenderer",
+    "PdfCache",
     "TranscriptionPipeline",
     # Utils
     "DebugTracer",
@@ -0,0 +1,268 @@
+"""
+MusePartition - Audio Features Module
+Cache paresseux des transformées audio partagées par les étapes d'un job
+"""
+
+from functools import cached_property
+import threading
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+import librosa
+
+
+STFT_BLOCK_FRAMES = 1024
+
+# Tempogramme FFT : enveloppe ramenée à ~100 Hz, fenêtres de 8 s tous les 2 s
+TEMPO_ENVELOPE_RATE = 100.0
+TEMPO_HOP_S = 2.0
+
+
+class _shared_cached_property(cached_property):
+    """
+    cached_property calculée une seule fois même si plusieurs threads la demandent.
+
+    Un verrou par descripteur et par instance : deux descripteurs différents
+    se calculent en parallèle, les dépendances (tempogram → onset_strength →
+    magnitude) prennent toujours les verrous dans le même ordre.
+    """
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        with instance._locks[self.attrname]:
+            return super().__get__(instance, owner)
+
+
+def stft_magnitude(
+    audio: np.ndarray,
+    n_fft: int = 2048,
+    hop_length: int = 512
+) -> np.ndarray:
+    """
+    Module de la STFT (fenêtre de Hann, trames centrées).
+
+    Args:
+        audio: Signal mono.
+        n_fft: Taille de la FFT (défaut: 2048).
+        hop_length: Hop en échantillons (défaut: 512).
+
+    Returns:
+        Magnitude float32 de forme (n_fft // 2 + 1, n_frames).
+
+    Raises:
+        ValueError: Si audio vide ou non mono.
+    """
+    audio = np.asarray(audio, dtype=np.float32)
+    if audio.ndim != 1 or audio.size == 0:
+        raise ValueError("Audio vide ou non mono")
+
+    pad = n_fft // 2
+    padded = np.pad(audio, pad, mode="reflect" if audio.size > pad else "constant")
+    frames = sliding_window_view(padded, n_fft)[::hop_length]
+    window = np.hanning(n_fft + 1)[:-1].astype(np.float32)
+
+    # Calcul par blocs : mémoire temporaire bornée sur les longs fichiers
+    magnitude = np.empty((n_fft // 2 + 1, len(frames)), dtype=np.float32)
+    for start in range(0, len(frames), STFT_BLOCK_FRAMES):
+        block = frames[start:start + STFT_BLOCK_FRAMES]
+        magnitude[:, start:start + len(block)] = np.abs(np.fft.rfft(block * window, axis=1)).T
+
+    return magnitude
+
+
+def spectral_flux(magnitude: np.ndarray) -> np.ndarray:
+    """
+    Flux spectral positif sur magnitude log-compressée, normalisé à [0, 1].
+
+    Args:
+        magnitude: Module STFT (n_bins, n_frames).
+
+    Returns:
+        Enveloppe d'onsets, une valeur par frame.
+    """
+    log_mag = np.log1p(100.0 * magnitude)
+    flux = np.maximum(np.diff(log_mag, axis=1), 0.0).sum(axis=0)
+    flux = np.concatenate(([0.0], flux))
+    peak = flux.max()
+    return flux / peak if peak > 0 else flux
+
+
+def decimate_envelope(
+    envelope: np.ndarray,
+    frame_rate: float,
+    target_rate: float = TEMPO_ENVELOPE_RATE
+) -> tuple:
+    """
+    Décime une enveloppe d'un facteur entier vers au plus target_rate.
+
+    Moyenne par blocs (filtre anti-repliement rectangulaire). Une enveloppe
+    déjà à target_rate ou moins est renvoyée telle quelle.
+
+    Args:
+        envelope: Enveloppe 1D.
+        frame_rate: Fréquence de l'enveloppe en Hz.
+        target_rate: Fréquence visée en Hz (défaut: TEMPO_ENVELOPE_RATE).
+
+    Returns:
+        (enveloppe décimée, nouvelle fréquence en Hz).
+    """
+    factor = max(1, int(frame_rate // target_rate))
+    if factor == 1:
+        return envelope, frame_rate
+    usable = envelope.size // factor * factor
+    return envelope[:usable].reshape(-1, factor).mean(axis=1), frame_rate / factor
+
+
+def windowed_autocorrelation(
+    envelope: np.ndarray,
+    win_length: int,
+    hop_length: int
+) -> np.ndarray:
+    """
+    Autocorrélation de fenêtres successives d'une enveloppe, par FFT.
+
+    Chaque fenêtre est centrée (moyenne retirée), pondérée par Hann puis
+    autocorrélée via |FFT|² (zéro-padding à 2 × win_length : pas de
+    repliement circulaire) et normalisée à 1 au décalage nul.
+
+    Args:
+        envelope: Enveloppe 1D (complétée de zéros si plus courte qu'une fenêtre).
+        win_length: Taille de fenêtre en frames.
+        hop_length: Pas entre fenêtres en frames.
+
+    Returns:
+        Tableau (n_fenêtres, win_length), ligne i = autocorrélation de la
+        fenêtre i pour les décalages 0 .. win_length - 1.
+    """
+    envelope = np.asarray(envelope, dtype=np.float64)
+    if envelope.size < win_length:
+        envelope = np.pad(envelope, (0, win_length - envelope.size))
+
+    windows = sliding_window_view(envelope, win_length)[::hop_length]
+    windows = (windows - windows.mean(axis=1, keepdims=True)) * np.hanning(win_length)
+
+    n_fft = 1 << int(np.ceil(np.log2(2 * win_length)))
+    power = np.abs(np.fft.rfft(windows, n_fft, axis=1)) ** 2
+    autocorrelation = np.fft.irfft(power, n_fft, axis=1)[:, :win_length]
+
+    energy = autocorrelation[:, :1]
+    return np.divide(autocorrelation, energy, out=np.zeros_like(autocorrelation), where=energy > 0)
+
+
+class AudioFeatures:
+    """
+    Transformées d'un signal, calculées à la demande et mémorisées.
+
+    Créé une fois par job (TranscriptionPipeline.transcribe) et passé aux
+    étapes qui en ont besoin : chaque transformée coûteuse (STFT, RMS,
+    enveloppe d'onsets, tempogramme) est calculée au plus une fois, quel que
+    soit le nombre de consommateurs. Tous les descripteurs partagent le même
+    hop_length, donc le même axe temporel. Le cache peut être lu depuis
+    plusieurs threads (ex: tempo en tâche de fond) : un descripteur en cours
+    de calcul est attendu, pas recalculé.
+
+    Example:
+        >>> features = AudioFeatures(audio, sr)
+        >>> analysis = onset_detector.analyze(audio, sr, features=features)
+        >>> bpm = quantizer.detect_tempo(audio, sr, features=features)  # STFT non recalculée
+    """
+
+    # Fenêtre d'autocorrélation du tempogramme (valeur de librosa.feature.tempo)
+    TEMPOGRAM_WINDOW_S = 8.0
+
+    def __init__(
+        self,
+        audio: np.ndarray,
+        sr: int,
+        n_fft: int = 2048,
+        hop_length: int = 512
+    ):
+        """
+        Initialise le cache (aucun calcul à ce stade).
+
+        Args:
+            audio: Signal mono.
+            sr: Fréquence d'échantillonnage.
+            n_fft: Taille de la FFT (défaut: 2048).
+            hop_length: Hop commun à tous les descripteurs (défaut: 512).
+
+        Raises:
+            ValueError: Si sample rate invalide.
+        """
+        if sr <= 0:
+            raise ValueError(f"Sample rate invalide: {sr}")
+
+        self.audio = audio
+        self.sr = sr
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self._locks = {
+            name: threading.Lock()
+            for name, attr in vars(type(self)).items()
+            if isinstance(attr, _shared_cached_property)
+        }
+
+    @_shared_cached_property
+    def magnitude(self) -> np.ndarray:
+        """Module de la STFT, forme (n_fft // 2 + 1, n_frames), float32."""
+        return stft_magnitude(self.audio, self.n_fft, self.hop_length)
+
+    @_shared_cached_property
+    def rms(self) -> np.ndarray:
+        """RMS par frame, dérivée de la STFT (Parseval) sans second fenêtrage."""
+        power = np.square(self.magnitude, dtype=np.float64)
+        energy = 2.0 * power.sum(axis=0) - power[0]
+        if self.n_fft % 2 == 0:
+            energy -= power[-1]
+        return np.sqrt(np.maximum(energy, 0.0)) / self.n_fft
+
+    @_shared_cached_property
+    def onset_strength(self) -> np.ndarray:
+        """Enveloppe d'onsets (flux spectral normalisé [0, 1]), une valeur par frame."""
+        return spectral_flux(self.magnitude)
+
+    @_shared_cached_property
+    def tempogram(self) -> np.ndarray:
+        """Tempogramme d'autocorrélation de onset_strength, forme (win_length, n_frames)."""
+        win_length = int(librosa.time_to_frames(
+            self.TEMPOGRAM_WINDOW_S, sr=self.sr, hop_length=self.hop_length
+        ))
+        return librosa.feature.tempogram(
+            onset_envelope=self.onset_strength,
+            sr=self.sr,
+            hop_length=self.hop_length,
+            win_length=win_length
+        )
+
+    @property
+    def tempo_frame_rate(self) -> float:
+        """Fréquence (Hz) de l'enveloppe décimée utilisée par tempo_autocorrelation."""
+        frame_rate = self.sr / self.hop_length
+        return frame_rate / max(1, int(frame_rate // TEMPO_ENVELOPE_RATE))
+
+    @_shared_cached_property
+    def tempo_autocorrelation(self) -> np.ndarray:
+        """
+        Autocorrélation moyenne de onset_strength décimée à ~100 Hz.
+
+        Tempogramme FFT (windowed_autocorrelation) sur des fenêtres de
+        TEMPOGRAM_WINDOW_S espacées de TEMPO_HOP_S, moyenné : quelques
+        centaines de petites FFT par heure d'audio, contre une colonne
+        d'autocorrélation par frame pour tempogram. Indice = décalage en
+        frames à tempo_frame_rate.
+        """
+        envelope, rate = decimate_envelope(self.onset_strength, self.sr / self.hop_length)
+        return windowed_autocorrelation(
+            envelope,
+            win_length=int(round(self.TEMPOGRAM_WINDOW_S * rate)),
+            hop_length=max(1, int(round(TEMPO_HOP_S * rate)))
+        ).mean(axis=0)
+
+    @property
+    def n_frames(self) -> int:
+        """Nombre de frames (calcule la STFT si nécessaire)."""
+        return self.magnitude.shape[1]
+
+    def is_computed(self, name: str) -> bool:
+        """Indique si le descripteur `name` est déjà en cache."""
+        return name in self.__dict__
@@ -8,5 +8,9 @@ class AudioProcessor:
     
     def preprocess(self, file_path: str):
         """Charge et prétraite audio."""
-        # Stub: retourne array vide
-        return np.zeros(self.target_sr * 5), self.target_sr
+        # Stub: A4 puis B4 (1s chacun, cf. stub PitchDetector), puis silence
+        t = np.arange(self.target_sr) / self.target_sr
+        audio = np.zeros(self.target_sr * 5)
+        audio[:self.target_sr] = 0.5 * np.sin(2 * np.pi * 440.0 * t)
+        audio[self.target_sr:2 * self.target_sr] = 0.5 * np.sin(2 * np.pi * 493.88 * t)
+        return audio, self.target_sr
@@ -0,0 +1,295 @@
+"""
+MusePartition - MIDI Writer Module
+Écriture directe de fichiers MIDI standard (SMF type 0/1) depuis des notes quantifiées
+"""
+
+import heapq
+import struct
+from fractions import Fraction
+from functools import lru_cache
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from src.musicxml_writer import key_fifths
+from src.types import QuantizedNote, QuantizedNoteArray, TempoMap
+from src.utils import beats_to_ticks
+
+
+# Résolution MIDI par défaut (celle de music21) : exacte jusqu'aux triples croches
+# de triolet, quintolets et septolets compris
+MIDI_TICKS_PER_QUARTER = 10080
+
+# Vélocité des note-on (valeur par défaut de music21)
+MIDI_VELOCITY = 90
+
+# Note-on / note-off (note-on vélocité 0) sur le canal 1, une entrée par hauteur
+_NOTE_ON = tuple(struct.pack(">BBB", 0x90, pitch, MIDI_VELOCITY) for pitch in range(128))
+_NOTE_OFF = tuple(struct.pack(">BBB", 0x90, pitch, 0) for pitch in range(128))
+
+_END_OF_TRACK = b"\x00\xff\x2f\x00"
+
+# Événement de piste : (tick absolu, octets de l'événement, statut compris)
+_Event = Tuple[int, bytes]
+
+
+@lru_cache(maxsize=1024)
+def variable_length(value: int) -> bytes:
+    """
+    Quantité de longueur variable MIDI (7 bits par octet, bit 7 = suite).
+
+    Args:
+        value: Entier >= 0 (delta-time, longueur de méta-événement).
+
+    Returns:
+        1 à 4 octets, poids fort en premier.
+    """
+    groups = [value & 0x7F]
+    value >>= 7
+    while value:
+        groups.append(0x80 | (value & 0x7F))
+        value >>= 7
+    return struct.pack(f">{len(groups)}B", *reversed(groups))
+
+
+def _meta(meta_type: int, data: bytes) -> bytes:
+    """Méta-événement FF type longueur données."""
+    return struct.pack(">BB", 0xFF, meta_type) + variable_length(len(data)) + data
+
+
+def _tempo_meta(bpm: float, beat_unit: int) -> bytes:
+    """Set Tempo : microsecondes par noire (1 beat = 4 / beat_unit noires)."""
+    microseconds = int(round(60_000_000 * beat_unit / (4 * bpm)))
+    return _meta(0x51, struct.pack(">I", min(microseconds, 0xFFFFFF))[1:])
+
+
+def encode_track(events: Iterable[_Event]) -> bytes:
+    """
+    Chunk MTrk d'événements triés par tick.
+
+    Delta-times en quantités de longueur variable, running status pour les
+    messages de canal (annulé par chaque méta-événement), End of Track ajouté.
+
+    Args:
+        events: (tick absolu, octets) par ordre de tick croissant.
+
+    Returns:
+        Chunk complet (en-tête MTrk et longueur compris).
+    """
+    chunks = []
+    previous = 0
+    running = None
+    for tick, payload in events:
+        status = payload[0]
+        chunks.append(variable_length(tick - previous))
+        chunks.append(payload[1:] if status == running else payload)
+        running = status if status < 0xF0 else None
+        previous = tick
+    chunks.append(_END_OF_TRACK)
+
+    data = b"".join(chunks)
+    return b"MTrk" + struct.pack(">I", len(data)) + data
+
+
+class MidiWriter:
+    """
+    Écrit un fichier MIDI standard (SMF type 0 ou 1) sans passer par music21.
+
+    Positions et durées sont converties en ticks (beats_to_ticks) puis en
+    ticks MIDI ; les note-on / note-off sont triés en une passe vectorisée et
+    encodés directement (struct). Même contenu que l'export music21 :
+    tempo, armure et métrique en début de fichier, vélocité 90, canal 1.
+
+    Type 1 : piste 0 = méta-événements (tempo, métrique, armure), piste 1 = notes.
+    Type 0 : une seule piste.
+
+    Example:
+        >>> writer = MidiWriter(time_signature="3/4", key_signature="G")
+        >>> with open("score.mid", "wb") as fp:
+        ...     writer.write(fp, quantized_notes, bpm=96.0)
+    """
+
+    def __init__(
+        self,
+        time_signature: str = "4/4",
+        key_signature: str = "C",
+        instrument_name: str = "Flute",
+        ticks_per_quarter: int = MIDI_TICKS_PER_QUARTER
+    ):
+        """
+        Initialise le writer.
+
+        Args:
+            time_signature: Signature temporelle (défaut: "4/4").
+            key_signature: Tonalité (défaut: "C", voir key_fifths).
+            instrument_name: Nom de la piste de notes (défaut: "Flute").
+            ticks_per_quarter: Résolution en ticks par noire (défaut: 10080).
+
+        Raises:
+            ValueError: Si signature temporelle, tonalité ou résolution invalide.
+        """
+        try:
+            beats, beat_unit = (int(part) for part in time_signature.split("/"))
+        except ValueError:
+            raise ValueError(f"Signature temporelle invalide: {time_signature}")
+        if beats <= 0 or beat_unit <= 0 or beat_unit & (beat_unit - 1):
+            raise ValueError(f"Signature temporelle invalide: {time_signature}")
+        if not 0 < ticks_per_quarter <= 0x7FFF:
+            raise ValueError(f"Résolution MIDI invalide: {ticks_per_quarter}")
+
+        self.beats_per_measure = beats
+        self.beat_unit = beat_unit
+        self.fifths, self.mode = key_fifths(key_signature)
+        self.instrument_name = instrument_name
+        self.ticks_per_quarter = ticks_per_quarter
+
+    def write(
+        self,
+        fp: BinaryIO,
+        quantized_notes: Union[List[QuantizedNote], QuantizedNoteArray],
+        bpm: float,
+        tempo_map: Optional[TempoMap] = None,
+        grid_step: Optional[Fraction] = None,
+        midi_format: int = 1
+    ) -> int:
+        """
+        Écrit le fichier MIDI dans un fichier binaire ouvert.
+
+        Notes monophoniques : une note qui commence avant la fin de la
+        précédente la tronque, deux notes au même début → la première est
+        gardée (comme MusicXMLWriter).
+
+        Args:
+            fp: Fichier binaire ouvert en écriture.
+            quantized_notes: Notes quantifiées (liste ou QuantizedNoteArray).
+            bpm: Tempo en BPM (beats de la signature).
+            tempo_map: Carte de tempo variable (optionnel) : un Set Tempo en
+                début de mesure à chaque changement (TempoMap.tempo_changes).
+            grid_step: Pas de grille exact en beats (optionnel, voir beats_to_ticks).
+            midi_format: 0 (une piste) ou 1 (piste de tempo + piste de notes).
+
+        Returns:
+            Nombre d'octets écrits.
+
+        Raises:
+            ValueError: Si quantized_notes est vide ou format invalide.
+        """
+        if len(quantized_notes) == 0:
+            raise ValueError("Liste de notes vide")
+
+        if isinstance(quantized_notes, QuantizedNoteArray):
+            midi_notes = np.asarray(quantized_notes.midi_note, dtype=np.int64)
+            positions = quantized_notes.beat_position
+            durations = quantized_notes.duration_beats
+        else:
+            midi_notes = np.array([n.midi_note for n in quantized_notes], dtype=np.int64)
+            positions = [n.beat_position for n in quantized_notes]
+            durations = [n.duration_beats for n in quantized_notes]
+
+        tick, starts, lengths = beats_to_ticks(positions, durations, self.beats_per_measure, grid_step)
+
+        # Ticks de grille → ticks MIDI (exact si la résolution est multiple du pas)
+        beat_ticks = self.ticks_per_quarter * 4 / self.beat_unit
+        scale = float(tick) * beat_ticks
+        ends = np.rint((starts + lengths) * scale).astype(np.int64)
+        starts = np.rint(starts * scale).astype(np.int64)
+
+        tempo_changes = [(0.0, bpm)]
+        if tempo_map is not None:
+            tempo_changes = tempo_map.tempo_changes(span=self.beats_per_measure)
+
+        return self.write_ticks(
+            fp,
+            starts,
+            ends - starts,
+            midi_notes,
+            [(int(round(beat * beat_ticks)), change) for beat, change in tempo_changes],
+            midi_format
+        )
+
+    def write_ticks(
+        self,
+        fp: BinaryIO,
+        starts: np.ndarray,
+        lengths: np.ndarray,
+        midi_notes: np.ndarray,
+        tempo_changes: List[Tuple[int, float]],
+        midi_format: int = 1
+    ) -> int:
+        """
+        Écrit le fichier MIDI depuis des positions déjà en ticks MIDI.
+
+        Utilisé par write et par ScoreGenerator.export_midi (notes relues
+        d'un Score music21 déjà noté).
+
+        Args:
+            fp: Fichier binaire ouvert en écriture.
+            starts: Débuts en ticks MIDI (entiers).
+            lengths: Durées en ticks MIDI (entiers).
+            midi_notes: Hauteurs MIDI.
+            tempo_changes: (tick, BPM en beats de la signature) par ordre de
+                tick, le premier à 0 (tempo initial).
+            midi_format: 0 (une piste) ou 1 (piste de tempo + piste de notes).
+
+        Returns:
+            Nombre d'octets écrits.
+
+        Raises:
+            ValueError: Si format invalide.
+        """
+        if midi_format not in (0, 1):
+            raise ValueError(f"Format MIDI invalide: {midi_format}. Valides: [0, 1]")
+
+        meta_events = [
+            (0, _tempo_meta(tempo_changes[0][1], self.beat_unit)),
+            (0, _meta(0x59, struct.pack(">bB", self.fifths, self.mode == "minor"))),
+            (0, _meta(0x58, struct.pack(
+                ">BBBB",
+                self.beats_per_measure,
+                self.beat_unit.bit_length() - 1,
+                96 // self.beat_unit,
+                8
+            ))),
+        ]
+        meta_events.extend((tick, _tempo_meta(change, self.beat_unit)) for tick, change in tempo_changes[1:])
+        note_events = self._note_events(
+            np.asarray(starts, dtype=np.int64),
+            np.asarray(lengths, dtype=np.int64),
+            np.asarray(midi_notes, dtype=np.int64)
+        )
+        track_name = [(0, _meta(0x03, self.instrument_name.encode("utf-8")))]
+
+        if midi_format == 0:
+            tracks = [encode_track(heapq.merge(track_name + meta_events, note_events, key=lambda e: e[0]))]
+        else:
+            tracks = [encode_track(meta_events), encode_track(heapq.merge(track_name, note_events, key=lambda e: e[0]))]
+
+        header = b"MThd" + struct.pack(">IHHH", 6, midi_format, len(tracks), self.ticks_per_quarter)
+        data = header + b"".join(tracks)
+        fp.write(data)
+        return len(data)
+
+    @staticmethod
+    def _note_events(
+        starts: np.ndarray,
+        lengths: np.ndarray,
+        midi_notes: np.ndarray
+    ) -> Iterator[_Event]:
+        """Note-on / note-off triés par tick, note-off en premier à tick égal."""
+        order = np.argsort(starts, kind="stable")
+        starts, lengths, midi_notes = starts[order], lengths[order], midi_notes[order]
+
+        # Monophonie : même début → première note gardée, chevauchement → troncature
+        keep = lengths > 0
+        starts, lengths, midi_notes = starts[keep], lengths[keep], midi_notes[keep]
+        keep = np.concatenate(([True], np.diff(starts) > 0))
+        starts, lengths, midi_notes = starts[keep], lengths[keep], midi_notes[keep]
+        ends = np.minimum(starts + lengths, np.append(starts[1:], np.iinfo(np.int64).max))
+
+        ticks = np.concatenate((starts, ends))
+        is_on = np.concatenate((np.ones(len(starts), dtype=bool), np.zeros(len(ends), dtype=bool)))
+        pitches = np.clip(np.concatenate((midi_notes, midi_notes)), 0, 127)
+        order = np.lexsort((is_on, ticks))
+
+        for tick, on, pitch in zip(ticks[order].tolist(), is_on[order].tolist(), pitches[order].tolist()):
+            yield tick, (_NOTE_ON if on else _NOTE_OFF)[pitch]
@@ -0,0 +1,799 @@
+"""
+MusePartition - MusicXML Writer Module
+Écriture MusicXML directe (sans music21) de notes quantifiées monophoniques
+"""
+
+import zipfile
+from bisect import bisect_right
+from contextlib import contextmanager
+from fractions import Fraction
+from functools import lru_cache
+from itertools import accumulate
+from typing import IO, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+from xml.sax.saxutils import escape, quoteattr
+
+import numpy as np
+
+from src.types import QuantizedNote, QuantizedNoteArray, TempoMap
+from src.utils import beats_to_ticks
+
+
+# Conteneur MusicXML compressé (.mxl) : entrée "mimetype" stockée en premier,
+# META-INF/container.xml désigne le fichier MusicXML racine
+MXL_MIMETYPE = "application/vnd.recordare.musicxml"
+_MXL_CONTAINER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    "<container>\n"
+    "  <rootfiles>\n"
+    '    <rootfile full-path={path} media-type="application/vnd.recordare.musicxml+xml"/>\n'
+    "  </rootfiles>\n"
+    "</container>\n"
+)
+
+# Orthographe des 12 classes de hauteur : (step, alter), identique à music21
+PITCH_SPELLING = (
+    ("C", 0), ("C", 1), ("D", 0), ("E", -1), ("E", 0), ("F", 0),
+    ("F", 1), ("G", 0), ("G", 1), ("A", 0), ("B", -1), ("B", 0),
+)
+
+# Figures de note MusicXML et leur durée en noires, de la plus longue à la plus courte
+NOTE_TYPES = (
+    ("breve", Fraction(8)),
+    ("whole", Fraction(4)),
+    ("half", Fraction(2)),
+    ("quarter", Fraction(1)),
+    ("eighth", Fraction(1, 2)),
+    ("16th", Fraction(1, 4)),
+    ("32nd", Fraction(1, 8)),
+    ("64th", Fraction(1, 16)),
+    ("128th", Fraction(1, 32)),
+    ("256th", Fraction(1, 64)),
+)
+
+# Nombre de ligatures par figure (croche : 1, double croche : 2...)
+_BEAM_COUNTS = {name: count for count, (name, _) in enumerate(NOTE_TYPES[4:], 1)}
+
+# Altérations affichées : alter → <accidental>
+_ACCIDENTAL_NAMES = {1: "sharp", -1: "flat", 0: "natural"}
+
+# Clefs : nom → (sign, line)
+CLEFS = {
+    "treble": ("G", 2),
+    "bass": ("F", 4),
+    "alto": ("C", 3),
+    "tenor": ("C", 4),
+}
+
+# Position des toniques majeures sur le cycle des quintes (altération naturelle)
+_KEY_LETTER_FIFTHS = {"F": -1, "C": 0, "G": 1, "D": 2, "A": 3, "E": 4, "B": 5}
+_KEY_ACCIDENTALS = {"": 0, "#": 1, "b": -1, "-": -1}
+
+# Ordre des dièses de l'armure (les bémols dans l'ordre inverse)
+_SHARPS_ORDER = "FCGDAEB"
+
+# Un élément de mesure : (ticks, midi ou None pour un silence, visible, lié avant, lié après)
+_Piece = Tuple[int, Optional[int], bool, bool, bool]
+
+
+def key_fifths(key_signature: str) -> Tuple[int, str]:
+    """
+    Armure MusicXML d'une tonalité.
+
+    Args:
+        key_signature: Tonalité au format de ScoreGenerator ("C", "Bb", "F#m"...).
+            Mineur : suffixe "m" ou tonique en minuscule (comme music21).
+
+    Returns:
+        (fifths, mode) ; ex: ("F#m") → (3, "minor").
+
+    Raises:
+        ValueError: Si tonalité invalide.
+    """
+    name = key_signature.strip()
+    mode = "major"
+    if name.endswith("m"):
+        name, mode = name[:-1], "minor"
+    elif name[:1].islower():
+        mode = "minor"
+
+    letter, accidental = name[:1].upper(), name[1:]
+    if letter not in _KEY_LETTER_FIFTHS or accidental not in _KEY_ACCIDENTALS:
+        raise ValueError(f"Tonalité invalide: {key_signature}")
+
+    fifths = _KEY_LETTER_FIFTHS[letter] + 7 * _KEY_ACCIDENTALS[accidental]
+    return (fifths - 3 if mode == "minor" else fifths), mode
+
+
+@lru_cache(maxsize=256)
+def note_values(duration: Fraction) -> Tuple[Tuple[str, int, Optional[Tuple[int, int]], Fraction], ...]:
+    """
+    Décompose une durée (en noires) en figures à lier.
+
+    Une durée non dyadique est lue dans un n-olet actual:normal, avec
+    actual = partie impaire du dénominateur et normal = plus grande puissance
+    de 2 inférieure (3:2 pour les triolets, 5:4 pour les quintolets).
+    Décomposition gloutonne, un point au plus par figure. Calculée une fois
+    par durée distincte.
+
+    Args:
+        duration: Durée en noires (> 0).
+
+    Returns:
+        Figures (type, points, (actual, normal) ou None, durée réelle en noires).
+    """
+    denominator = duration.denominator
+    actual = denominator // (denominator & -denominator)
+    tuplet = None
+    if actual > 1:
+        normal = 1 << (actual.bit_length() - 1)
+        tuplet = (actual, normal)
+        duration = duration * actual / normal
+
+    smallest = NOTE_TYPES[-1][1]
+    values = []
+    while duration > 0:
+        name, value = next(((n, v) for n, v in NOTE_TYPES if v <= duration), NOTE_TYPES[-1])
+        dots = 1 if value > smallest and value * 3 / 2 <= duration else 0
+        length = min(duration, value * 3 / 2 if dots else value)
+        duration -= length
+        values.append((name, dots, tuplet, length * tuplet[1] / tuplet[0] if tuplet else length))
+    return tuple(values)
+
+
+def _format_number(value: float) -> str:
+    """Nombre lisible pour per-minute / tempo (100.0 → "100")."""
+    return f"{round(float(value), 2):g}"
+
+
+def _events(
+    starts: Sequence[int],
+    lengths: Sequence[int],
+    midi_notes: Sequence[int],
+    rest_ticks: float
+) -> Iterator[Tuple[int, Optional[int], bool]]:
+    """
+    Suite contiguë (ticks, midi ou None, visible) depuis le tick 0.
+
+    Monophonique : une note qui commence avant la fin de la précédente la
+    tronque ; deux notes au même début → la première est gardée. Les trous
+    inférieurs à rest_ticks deviennent des silences masqués (comme le
+    remplissage de music21).
+    """
+    cursor = 0
+    pending = None
+    for start, length, midi in zip(starts, lengths, midi_notes):
+        if length <= 0 or (pending is not None and start <= pending[0]):
+            continue
+        if pending is not None:
+            length_before = min(pending[1], start - pending[0])
+            yield length_before, pending[2], True
+            cursor = pending[0] + length_before
+        if start > cursor:
+            yield start - cursor, None, start - cursor >= rest_ticks
+        pending = (start, length, midi)
+        cursor = start
+
+    if pending is not None:
+        yield pending[1], pending[2], True
+
+
+def _measures(
+    events: Iterator[Tuple[int, Optional[int], bool]],
+    measure_ticks: int
+) -> Iterator[List[_Piece]]:
+    """
+    Découpe les événements aux barres de mesure (notes liées), mesure par mesure.
+
+    La dernière mesure est complétée par un silence masqué.
+    """
+    contents: List[_Piece] = []
+    filled = 0
+    for length, midi, visible in events:
+        tied_before = False
+        while length > 0:
+            piece = min(length, measure_ticks - filled)
+            length -= piece
+            contents.append((piece, midi, visible, tied_before, length > 0))
+            tied_before = True
+            filled += piece
+            if filled == measure_ticks:
+                yield contents
+                contents, filled = [], 0
+
+    if contents:
+        contents.append((measure_ticks - filled, None, False, False, False))
+        yield contents
+
+
+def _beam_groups(beats: int, beat_unit: int) -> Tuple[Tuple[Fraction, ...], Tuple[Fraction, ...]]:
+    """
+    Groupes de ligature par défaut d'une métrique (comme TimeSignature.beamSequence de music21).
+
+    Mesures courtes en croches ou plus petites ligaturées d'un bloc, sinon
+    un groupe par temps (2, 3, 4), 2+3 (5), 2+2+3 (7) ou par 3 (6, 9, 12...) ;
+    en x/4, les niveaux suivants (doubles croches...) sont subdivisés.
+
+    Returns:
+        Fins des groupes en noires depuis le début de la mesure : premier
+        niveau de ligature, niveaux suivants.
+    """
+    if (beat_unit == 8 and beats <= 3) or (beat_unit == 16 and beats <= 5) or (beat_unit == 32 and beats <= 11):
+        top, sub = [beats], None
+    elif beats in (2, 3, 4):
+        top = [1] * beats
+        sub = [Fraction(1, 2)] * (2 * beats) if beat_unit == 4 else None
+    elif beats == 5:
+        top = [2, 3]
+        sub = [1] * 5 if beat_unit == 4 else None
+    elif beats == 7:
+        top, sub = [2, 2, 3], None
+    elif beats % 3 == 0 and 6 <= beats <= 21:
+        top, sub = [3] * (beats // 3), None
+    else:
+        top, sub = [beats], None
+
+    unit = Fraction(4, beat_unit)
+    return (
+        tuple(accumulate(size * unit for size in top)),
+        tuple(accumulate(size * unit for size in (sub or top)))
+    )
+
+
+def _beams(
+    figures: Sequence[Tuple[str, Fraction, bool]],
+    groups: Tuple[Tuple[Fraction, ...], Tuple[Fraction, ...]]
+) -> List[Optional[List[str]]]:
+    """
+    Ligatures d'une mesure complète (comme TimeSignature.getBeams de music21).
+
+    Args:
+        figures: Figures de la mesure dans l'ordre (type, durée en noires, silence).
+        groups: Groupes de ligature de la métrique (voir _beam_groups).
+
+    Returns:
+        Pour chaque figure, None ou le type de chaque ligature ("begin",
+        "continue", "end", "forward hook", "backward hook").
+    """
+    beams: List[Optional[List[str]]] = [
+        None if is_rest or name not in _BEAM_COUNTS else [""] * _BEAM_COUNTS[name]
+        for name, _, is_rest in figures
+    ]
+    if len(beams) <= 1:
+        return [None] * len(beams)
+
+    # Une croche isolée entre deux figures non ligaturables reste seule
+    for i in range(len(beams)):
+        following = beams[i + 1] if i + 1 < len(beams) else None
+        if (i == 0 or beams[i - 1] is None) and following is None:
+            beams[i] = None
+
+    offsets = list(accumulate((length for _, length, _ in figures), initial=Fraction(0)))
+    last = len(beams) - 1
+    for level in range(max((len(b) for b in beams if b), default=0)):
+        bounds = groups[0] if level == 0 else groups[1]
+        for i, start in enumerate(offsets[:-1]):
+            current = beams[i]
+            if current is None or level >= len(current):
+                continue
+            end = offsets[i + 1]
+            previous = beams[i - 1] if i > 0 else None
+            following = beams[i + 1] if i < last else None
+            index = bisect_right(bounds, start)
+            group_start, group_end = (bounds[index - 1] if index else 0), bounds[index]
+
+            # Figure qui remplit son groupe : pas de ligature
+            if end == group_end and (start == group_start or (previous is None and level == 0)):
+                beams[i] = None
+                continue
+
+            linked_before = previous is not None and level < len(previous)
+            linked_after = following is not None and level < len(following)
+            if i == 0:
+                kind = "begin" if linked_after else "forward hook"
+            elif i == last:
+                kind = "end" if linked_before else "backward hook"
+            elif not linked_before:
+                if following is None and level == 0:
+                    beams[i] = None
+                    continue
+                if following is None or end >= group_end:
+                    kind = "backward hook"
+                else:
+                    kind = "begin" if linked_after else "forward hook"
+            elif previous[level] in ("end", "backward hook"):
+                if following is None:
+                    kind = "backward hook"
+                else:
+                    kind = "begin" if linked_after else "forward hook"
+            elif not linked_after or end >= group_end:
+                kind = "end"
+            else:
+                kind = "continue"
+            current[level] = kind
+
+    # Crochets seuls supprimés, crochets orientés vers le groupe ouvert ou fermé
+    for i, current in enumerate(beams):
+        if current is None:
+            continue
+        if not {"begin", "continue", "end"} & set(current):
+            beams[i] = None
+            continue
+        opened = closed = False
+        for level, kind in enumerate(current):
+            if kind == "begin":
+                opened = True
+            elif kind == "end":
+                closed = True
+            elif opened and kind == "backward hook":
+                current[level] = "forward hook"
+            elif closed and kind == "forward hook":
+                current[level] = "backward hook"
+
+    # Crochets qui se font face : une ligature
+    for current, following in zip(beams, beams[1:]):
+        if not current or not following:
+            continue
+        for level, kind in enumerate(current):
+            if kind != "forward hook" or level >= len(following):
+                continue
+            if following[level] in ("backward hook", "begin"):
+                current[level] = "begin"
+                following[level] = "end" if following[level] == "backward hook" else "continue"
+    for previous, current in zip(beams, beams[1:]):
+        if not current or not previous:
+            continue
+        for level, kind in enumerate(current):
+            if kind == "backward hook" and level < len(previous) and previous[level] == "end":
+                current[level] = "end"
+                previous[level] = "continue"
+
+    return beams
+
+
+class _Pitch:
+    """Note écrite et affichage de son altération (comme music21.pitch.Pitch)."""
+
+    __slots__ = ("step", "alter", "octave", "shown")
+
+    def __init__(self, midi: int):
+        self.step, self.alter = PITCH_SPELLING[midi % 12]
+        self.octave = midi // 12 - 1
+        # None : pas encore décidé (pas de bécarre pour une note naturelle)
+        self.shown: Optional[bool] = None
+
+    @property
+    def accidental(self) -> Optional[int]:
+        """Altération portée (bécarre : 0 une fois affiché), None sinon."""
+        return self.alter if self.alter or self.shown else None
+
+    def same_note(self, other: "_Pitch") -> bool:
+        """Même nom et même octave."""
+        return (self.step, self.alter, self.octave) == (other.step, other.alter, other.octave)
+
+
+def _show_accidental(
+    pitch: _Pitch,
+    past: List[_Pitch],
+    past_measure: List[_Pitch],
+    key: Dict[str, int],
+    tied: bool
+) -> None:
+    """
+    Décide l'affichage de l'altération d'une note (pitch.shown).
+
+    Reprend Pitch.updateAccidentalDisplay de music21 avec les options de
+    Stream.makeAccidentals par défaut : altération rappelée après une autre
+    altération de la même note dans la mesure, bécarre de précaution après
+    la mesure précédente, rien sur une note liée.
+
+    Args:
+        pitch: Note à décider.
+        past: Notes précédentes de la mesure.
+        past_measure: Notes de la mesure précédente.
+        key: Altérations de l'armure (step → alter).
+        tied: Note liée à la précédente.
+    """
+    altered = pitch.alter != 0
+    in_key = altered and key.get(pitch.step) == pitch.alter
+    step_in_key = pitch.step in key
+
+    if tied:
+        if altered:
+            pitch.shown = False
+        return
+
+    past_all = past_measure + past
+    if not past_all:
+        if altered:
+            pitch.shown = not in_key
+        elif step_in_key:
+            pitch.shown = True
+        return
+
+    for other in reversed(past):
+        if other.step == pitch.step and other.octave == pitch.octave:
+            if other.alter != pitch.alter:
+                pitch.shown = True
+                return
+            break
+
+    repeated_alteration = False
+    decided = False
+    for i in range(len(past_all) - 1, -1, -1):
+        other = past_all[i]
+        in_measure = i >= len(past_measure)
+        repeats = in_measure and all(p.same_note(pitch) for p in past_all[i:])
+        if not in_measure and altered and not in_key:
+            pitch.shown = True
+            return
+        if other.step != pitch.step:
+            continue
+
+        same_octave = other.octave == pitch.octave
+        other_accidental = other.accidental
+        if repeats and other_accidental is not None and other.shown:
+            if altered:
+                pitch.shown = False
+            return
+        elif repeats and altered and other_accidental == pitch.alter:
+            if not in_key and (not same_octave or other.shown is False):
+                repeated_alteration = True
+                continue
+            pitch.shown = False
+            decided = True
+            break
+        elif other_accidental == 0 and not altered:
+            if repeats:
+                if step_in_key and not same_octave:
+                    pitch.shown = True
+            elif step_in_key:
+                pitch.shown = True
+            decided = True
+            break
+        elif other_accidental and other.alter != pitch.alter and not altered:
+            pitch.shown = True
+            decided = True
+            break
+        elif not other_accidental and altered:
+            pitch.shown = True
+            decided = True
+            break
+        elif other_accidental is not None and altered and other_accidental != pitch.alter:
+            pitch.shown = True
+            decided = True
+            break
+        elif not repeats and altered and other_accidental == pitch.alter and same_octave:
+            if other.shown is False:
+                repeated_alteration = True
+            else:
+                pitch.shown = not in_key
+                return
+
+    if repeated_alteration:
+        pitch.shown = not in_key
+    elif not decided and (altered or step_in_key):
+        pitch.shown = not in_key
+
+
+@contextmanager
+def open_mxl(path: str, rootfile: str = "score.musicxml") -> Iterator[IO[bytes]]:
+    """
+    Ouvre en écriture le MusicXML racine d'un conteneur compressé (.mxl).
+
+    Le contenu écrit est compressé (deflate) au fil de l'eau dans l'archive :
+    aucun fichier MusicXML intermédiaire sur disque.
+
+    Args:
+        path: Fichier .mxl à créer (remplacé s'il existe).
+        rootfile: Nom du MusicXML dans l'archive (défaut: "score.musicxml").
+
+    Yields:
+        Flux binaire de l'entrée MusicXML (octets UTF-8).
+
+    Example:
+        >>> with open_mxl("score.mxl") as entry, io.TextIOWrapper(entry, encoding="utf-8") as fp:
+        ...     MusicXMLWriter().write(fp, quantized_notes, bpm=96.0)
+    """
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr(zipfile.ZipInfo("mimetype"), MXL_MIMETYPE, compress_type=zipfile.ZIP_STORED)
+        archive.writestr("META-INF/container.xml", _MXL_CONTAINER.format(path=quoteattr(rootfile)))
+        with archive.open(rootfile, "w") as entry:
+            yield entry
+
+
+class MusicXMLWriter:
+    """
+    Écrit une partie monophonique MusicXML 4.0 (partwise) sans passer par music21.
+
+    Positions et durées sont converties en ticks entiers (beats_to_ticks),
+    découpées aux barres de mesure avec liaisons, puis sérialisées mesure
+    par mesure dans le fichier : la mémoire ne dépend pas de la longueur de
+    la partition. Même contenu musical que ScoreGenerator.notes_to_music21
+    + export_musicxml (silences ≥ rest_threshold visibles, trous plus courts
+    masqués, orthographe des altérations de music21), avec la même notation :
+    altérations affichées (Stream.makeAccidentals) et ligatures par groupes
+    de la métrique (TimeSignature.getBeams). Les hampes sont laissées au
+    logiciel de lecture.
+
+    Example:
+        >>> writer = MusicXMLWriter(time_signature="3/4", key_signature="G")
+        >>> with open("score.musicxml", "w", encoding="utf-8") as fp:
+        ...     writer.write(fp, quantized_notes, bpm=96.0)
+    """
+
+    def __init__(
+        self,
+        time_signature: str = "4/4",
+        key_signature: str = "C",
+        clef: str = "treble",
+        instrument_name: str = "Flute"
+    ):
+        """
+        Initialise le writer.
+
+        Args:
+            time_signature: Signature temporelle (défaut: "4/4").
+            key_signature: Tonalité (défaut: "C", voir key_fifths).
+            clef: "treble", "bass", "alto" ou "tenor" (autre : pas de clef).
+            instrument_name: Nom de la partie (défaut: "Flute").
+
+        Raises:
+            ValueError: Si signature temporelle ou tonalité invalide.
+        """
+        try:
+            beats, beat_unit = (int(part) for part in time_signature.split("/"))
+        except ValueError:
+            raise ValueError(f"Signature temporelle invalide: {time_signature}")
+        if beats <= 0 or beat_unit <= 0:
+            raise ValueError(f"Signature temporelle invalide: {time_signature}")
+
+        self.beats_per_measure = beats
+        self.beat_unit = beat_unit
+        self.fifths, self.mode = key_fifths(key_signature)
+        self.clef = CLEFS.get(clef)
+        self.instrument_name = instrument_name
+
+        # Altérations de l'armure (step → alter) et groupes de ligature de la métrique
+        order = _SHARPS_ORDER if self.fifths > 0 else _SHARPS_ORDER[::-1]
+        self.key_alterations = {step: 1 if self.fifths > 0 else -1 for step in order[:abs(self.fifths)]}
+        self.beam_groups = _beam_groups(beats, beat_unit)
+
+    def write(
+        self,
+        fp: IO[str],
+        quantized_notes: Union[List[QuantizedNote], QuantizedNoteArray],
+        bpm: float,
+        title: str = "Transcription",
+        composer: str = "MusePartition",
+        rest_threshold: float = 0.25,
+        tempo_map: Optional[TempoMap] = None,
+        grid_step: Optional[Fraction] = None
+    ) -> int:
+        """
+        Écrit la partition dans un fichier texte ouvert, une mesure à la fois.
+
+        Args:
+            fp: Fichier texte ouvert en écriture (UTF-8).
+            quantized_notes: Notes quantifiées (liste ou QuantizedNoteArray).
+            bpm: Tempo en BPM (beats de la signature).
+            title: Titre (défaut: "Transcription").
+            composer: Compositeur (défaut: "MusePartition").
+            rest_threshold: Seuil minimum (en beats) d'un silence visible (défaut: 0.25).
+            tempo_map: Carte de tempo variable (optionnel, voir ScoreGenerator.notes_to_music21).
+            grid_step: Pas de grille exact en beats (optionnel, voir beats_to_ticks).
+
+        Returns:
+            Nombre de mesures écrites.
+
+        Raises:
+            ValueError: Si quantized_notes est vide.
+        """
+        if len(quantized_notes) == 0:
+            raise ValueError("Liste de notes vide")
+
+        if isinstance(quantized_notes, QuantizedNoteArray):
+            midi_notes = quantized_notes.midi_note
+            positions = quantized_notes.beat_position
+            durations = quantized_notes.duration_beats
+        else:
+            midi_notes = np.array([n.midi_note for n in quantized_notes], dtype=np.int64)
+            positions = [n.beat_position for n in quantized_notes]
+            durations = [n.duration_beats for n in quantized_notes]
+
+        tick, starts, lengths = beats_to_ticks(positions, durations, self.beats_per_measure, grid_step)
+        order = np.argsort(starts, kind="stable")
+
+        # 1 beat = 4 / beat_unit noires ; divisions = ticks par noire
+        tick_quarter = tick * 4 / self.beat_unit
+        divisions = tick_quarter.denominator
+        measure_ticks = int(self.beats_per_measure / tick)
+
+        tempo_changes = {}
+        if tempo_map is not None:
+            changes = tempo_map.tempo_changes(span=self.beats_per_measure)
+            bpm = changes.pop(0)[1]
+            tempo_changes = {int(beat // self.beats_per_measure): change for beat, change in changes}
+
+        fp.write(self._header(title, composer))
+
+        measures = _measures(
+            _events(
+                starts[order].tolist(),
+                lengths[order].tolist(),
+                np.asarray(midi_notes)[order].tolist(),
+                rest_threshold / tick
+            ),
+            measure_ticks
+        )
+
+        count = 0
+        previous: List[_Pitch] = []
+        for index, pieces in enumerate(measures):
+            lines = [f'    <measure number="{index + 1}">']
+            if index == 0:
+                lines.extend(self._attributes(divisions))
+                lines.extend(self._tempo(bpm))
+            elif index in tempo_changes:
+                lines.extend(self._tempo(tempo_changes[index]))
+            note_lines, previous = self._notes(pieces, tick_quarter, divisions, measure_ticks, previous)
+            lines.extend(note_lines)
+            lines.append("    </measure>")
+            fp.write("\n".join(lines) + "\n")
+            count += 1
+
+        fp.write("  </part>\n</score-partwise>\n")
+        return count
+
+    def _header(self, title: str, composer: str) -> str:
+        """En-tête : identification, liste des parties, ouverture de la partie."""
+        title = escape(title)
+        return (
+            '<?xml version="1.0" encoding="utf-8"?>\n'
+            '<!DOCTYPE score-partwise PUBLIC "-//Recordare//DTD MusicXML 4.0 Partwise//EN" '
+            '"http://www.musicxml.org/dtds/partwise.dtd">\n'
+            '<score-partwise version="4.0">\n'
+            f"  <work>\n    <work-title>{title}</work-title>\n  </work>\n"
+            f"  <movement-title>{title}</movement-title>\n"
+            "  <identification>\n"
+            f'    <creator type="composer">{escape(composer)}</creator>\n'
+            "    <encoding>\n      <software>MusePartition</software>\n    </encoding>\n"
+            "  </identification>\n"
+            "  <part-list>\n"
+            '    <score-part id="P1">\n'
+            f"      <part-name>{escape(self.instrument_name)}</part-name>\n"
+            "    </score-part>\n"
+            "  </part-list>\n"
+            '  <part id="P1">\n'
+        )
+
+    def _attributes(self, divisions: int) -> List[str]:
+        """Attributs de la première mesure : divisions, armure, métrique, clef."""
+        lines = [
+            "      <attributes>",
+            f"        <divisions>{divisions}</divisions>",
+            f"        <key>\n          <fifths>{self.fifths}</fifths>\n          <mode>{self.mode}</mode>\n        </key>",
+            f"        <time>\n          <beats>{self.beats_per_measure}</beats>\n"
+            f"          <beat-type>{self.beat_unit}</beat-type>\n        </time>",
+        ]
+        if self.clef is not None:
+            sign, line = self.clef
+            lines.append(f"        <clef>\n          <sign>{sign}</sign>\n          <line>{line}</line>\n        </clef>")
+        lines.append("      </attributes>")
+        return lines
+
+    def _tempo(self, bpm: float) -> List[str]:
+        """Indication métronomique (figure = beat_unit) et tempo de lecture en noires."""
+        beat_type = next(
+            (name for name, value in NOTE_TYPES if value == Fraction(4, self.beat_unit)),
+            "quarter"
+        )
+        return [
+            '      <direction placement="above">',
+            "        <direction-type>",
+            '          <metronome parentheses="no">',
+            f"            <beat-unit>{beat_type}</beat-unit>",
+            f"            <per-minute>{_format_number(bpm)}</per-minute>",
+            "          </metronome>",
+            "        </direction-type>",
+            f"        <sound tempo={quoteattr(_format_number(bpm * 4 / self.beat_unit))} />",
+            "      </direction>",
+        ]
+
+    def _notes(
+        self,
+        pieces: List[_Piece],
+        tick_quarter: Fraction,
+        divisions: int,
+        measure_ticks: int,
+        previous: List[_Pitch]
+    ) -> Tuple[List[str], List[_Pitch]]:
+        """
+        Éléments <note> d'une mesure (figures liées, altérations, ligatures,
+        crochets de n-olets).
+
+        Les altérations dépendent des notes de la mesure précédente (previous) ;
+        renvoie les lignes et les notes de cette mesure.
+        """
+        # Figures à écrire : (figure, midi, visible, tie stop, tie start, mesure entière)
+        figures = []
+        for ticks, midi, visible, tied_before, tied_after in pieces:
+            values = note_values(ticks * tick_quarter)
+            for i, value in enumerate(values):
+                figures.append((
+                    value, midi, visible,
+                    tied_before or i > 0,
+                    tied_after or i < len(values) - 1,
+                    ticks == measure_ticks
+                ))
+
+        beams = _beams([(value[0], value[3], midi is None) for value, midi, *_ in figures], self.beam_groups)
+
+        lines = []
+        pitches: List[_Pitch] = []
+        run_total = Fraction(0)
+        for i, ((name, dots, tuplet, length), midi, visible, tie_stop, tie_start, whole) in enumerate(figures):
+            is_rest = midi is None
+            if not is_rest:
+                pitch = _Pitch(midi)
+                _show_accidental(pitch, pitches, previous, self.key_alterations, tie_stop)
+                pitches.append(pitch)
+            lines.append('      <note print-object="no" print-spacing="yes">' if not visible else "      <note>")
+
+            if is_rest:
+                lines.append('        <rest measure="yes" />' if whole else "        <rest />")
+            else:
+                lines.append("        <pitch>")
+                lines.append(f"          <step>{pitch.step}</step>")
+                if pitch.alter:
+                    lines.append(f"          <alter>{pitch.alter}</alter>")
+                lines.append(f"          <octave>{pitch.octave}</octave>")
+                lines.append("        </pitch>")
+            lines.append(f"        <duration>{int(length * divisions)}</duration>")
+
+            tie_stop = tie_stop and not is_rest
+            tie_start = tie_start and not is_rest
+            if tie_stop:
+                lines.append('        <tie type="stop" />')
+            if tie_start:
+                lines.append('        <tie type="start" />')
+
+            if not (is_rest and whole):
+                lines.append(f"        <type>{name}</type>")
+                lines.extend(["        <dot />"] * dots)
+            if not is_rest and pitch.shown:
+                lines.append(f"        <accidental>{_ACCIDENTAL_NAMES[pitch.alter]}</accidental>")
+
+            notations = []
+            if tie_stop:
+                notations.append('          <tied type="stop" />')
+            if tie_start:
+                notations.append('          <tied type="start" />')
+
+            if tuplet is not None:
+                actual, normal = tuplet
+                lines.append(
+                    f"        <time-modification>\n"
+                    f"          <actual-notes>{actual}</actual-notes>\n"
+                    f"          <normal-notes>{normal}</normal-notes>\n"
+                    f"        </time-modification>"
+                )
+                # Crochet : ouvert au début d'un groupe, fermé quand la somme redevient dyadique
+                if run_total == 0:
+                    notations.append('          <tuplet type="start" bracket="yes" />')
+                run_total += length
+                following = figures[i + 1][0][2] if i + 1 < len(figures) else None
+                denominator = run_total.denominator
+                if following != tuplet or denominator & (denominator - 1) == 0:
+                    notations.append('          <tuplet type="stop" />')
+                    run_total = Fraction(0)
+
+            for number, kind in enumerate(beams[i] or (), 1):
+                lines.append(f'        <beam number="{number}">{kind}</beam>')
+
+            if notations:
+                lines.append("        <notations>")
+                lines.extend(notations)
+                lines.append("        </notations>")
+            lines.append("      </note>")
+
+        return lines, pitches
@@ -1,16 +1,619 @@
-"""Stub NoteSegmenter pour tests Pipeline"""
-from typing import List
-from src.types import PitchFrame, Note
+"""
+MusePartition - Note Segmenter Module
+Conversion des frames de pitch en notes MIDI discrètes
+"""
+
+from typing import List, Optional, Tuple
+import numpy as np
+from src.types import PitchFrame, Note, NoteArray
+from src.utils import (
+    DebugTracer,
+    MIDI_NOTE_NAMES,
+    NOTE_NAMES,
+    frequencies_to_pitch,
+    midi_frequency_table,
+    midi_note_names,
+    pitch_frames_to_arrays,
+    rolling_median,
+)
+
 
 class NoteSegmenter:
-    def __init__(self, min_note_duration=0.05, reference_frequency=440.0, pitch_tolerance=0.5, debug=False):
+    """
+    Segmente une séquence de frames de pitch en notes MIDI.
+
+    Les frames consécutives dont la hauteur reste dans la tolérance de la
+    note courante sont regroupées ; les notes plus courtes que
+    `min_note_duration` sont filtrées. La segmentation travaille sur des
+    tableaux NumPy (pas de boucle Python par frame).
+
+    Un pré-lissage optionnel stabilise la trajectoire de hauteur (vibrato) :
+    médiane glissante puis hystérésis autour des demi-tons, pour éviter de
+    fragmenter une note tenue en nombreux segments très courts.
+    """
+
+    def __init__(
+        self,
+        min_note_duration: float = 0.05,
+        reference_frequency: float = 440.0,
+        pitch_tolerance: float = 0.5,
+        confidence_threshold: float = 0.0,
+        vibrato_window: float = 0.0,
+        pitch_hysteresis: float = 0.0,
+        debug: bool = False
+    ):
+        """
+        Initialise le NoteSegmenter.
+
+        Args:
+            min_note_duration: Durée minimale d'une note en secondes (défaut: 0.05).
+            reference_frequency: Fréquence du La4 / MIDI 69 en Hz (défaut: 440.0).
+                Exemples: 440.0 (standard), 442.0 (français), 415.0 (baroque).
+            pitch_tolerance: Écart maximal en demi-tons avec la note courante
+                pour prolonger celle-ci (défaut: 0.5).
+            confidence_threshold: Confiance minimale d'une frame pour être
+                considérée comme voisée (défaut: 0.0, toutes les frames).
+            vibrato_window: Largeur en secondes de la médiane glissante appliquée
+                au pitch avant segmentation (défaut: 0.0, désactivée). Prendre
+                au moins une période de vibrato (~0.15s pour 6 Hz).
+            pitch_hysteresis: Zone morte en demi-tons autour de chaque
+                mi-chemin entre deux notes : une frame qui y tombe garde la
+                note précédente (défaut: 0.0, désactivée). Doit être < 0.5.
+            debug: Active le traçage debug (défaut: False).
+
+        Raises:
+            ValueError: Si vibrato_window < 0 ou pitch_hysteresis hors de [0, 0.5).
+
+        Example:
+            >>> segmenter = NoteSegmenter()
+            >>> segmenter_baroque = NoteSegmenter(reference_frequency=415.0)
+            >>> segmenter_vibrato = NoteSegmenter(vibrato_window=0.15, pitch_hysteresis=0.2)
+        """
+        if vibrato_window < 0:
+            raise ValueError(f"vibrato_window doit être >= 0 (reçu: {vibrato_window})")
+        if not 0 <= pitch_hysteresis < 0.5:
+            raise ValueError(f"pitch_hysteresis doit être dans [0, 0.5) (reçu: {pitch_hysteresis})")
+
         self.min_note_duration = min_note_duration
         self.reference_frequency = reference_frequency
         self.pitch_tolerance = pitch_tolerance
-    
-    def segment_notes(self, pitch_frames: List[PitchFrame]) -> List[Note]:
-        """Segmente en notes."""
-        return [
-            Note(69, 0.0, 1.0),  # A4
-            Note(71, 1.0, 1.0),  # B4
-        ]
+        self.confidence_threshold = confidence_threshold
+        self.vibrato_window = vibrato_window
+        self.pitch_hysteresis = pitch_hysteresis
+        self._open_note = None  # [midi, début, dernière frame] en mode incrémental
+        self._last_frame_time = None
+        self.tracer = DebugTracer(output_dir="output/debug", enabled=debug)
+
+        self.tracer.log_step("note_segmenter_init", {
+            "min_note_duration": min_note_duration,
+            "reference_frequency": reference_frequency,
+            "pitch_tolerance": pitch_tolerance,
+            "confidence_threshold": confidence_threshold,
+            "vibrato_window": vibrato_window,
+            "pitch_hysteresis": pitch_hysteresis
+        })
+
+    @property
+    def reference_frequency(self) -> float:
+        """Fréquence du La4 / MIDI 69 en Hz."""
+        return self._reference_frequency
+
+    @reference_frequency.setter
+    def reference_frequency(self, value: float):
+        self._reference_frequency = value
+        # Table MIDI → fréquence recalculée à chaque changement de diapason
+        self._midi_frequencies = midi_frequency_table(float(value))
+
+    def frequency_to_midi(self, frequency: float) -> int:
+        """
+        Convertit une fréquence en numéro MIDI (arrondi, borné à [0, 127]).
+
+        Args:
+            frequency: Fréquence en Hz.
+
+        Returns:
+            Numéro MIDI entier.
+
+        Raises:
+            ValueError: Si frequency <= 0.
+
+        Example:
+            >>> segmenter.frequency_to_midi(440.0)
+            69
+        """
+        if frequency <= 0:
+            raise ValueError(f"Fréquence doit être > 0 (reçu: {frequency})")
+
+        return int(self.frequencies_to_midi(frequency))
+
+    def frequencies_to_midi(self, frequencies: np.ndarray) -> np.ndarray:
+        """
+        Variante tableau de frequency_to_midi.
+
+        Args:
+            frequencies: Fréquences en Hz (scalaire ou ndarray).
+
+        Returns:
+            Numéros MIDI entiers (int64), même forme que l'entrée.
+
+        Raises:
+            ValueError: Si une fréquence est <= 0.
+
+        Example:
+            >>> segmenter.frequencies_to_midi(np.array([261.63, 440.0]))
+            array([60, 69])
+        """
+        frequencies = np.asarray(frequencies, dtype=np.float64)
+        if np.any(~(frequencies > 0)):
+            raise ValueError("Fréquence doit être > 0")
+
+        pitch = frequencies_to_pitch(frequencies, self.reference_frequency)
+        return np.clip(np.round(pitch), 0, 127).astype(np.int64)
+
+    def midi_to_frequency(self, midi_note: int) -> float:
+        """
+        Convertit un numéro MIDI en fréquence.
+
+        Args:
+            midi_note: Numéro MIDI.
+
+        Returns:
+            Fréquence en Hz (relative à reference_frequency).
+        """
+        if 0 <= midi_note <= 127:
+            return float(self._midi_frequencies[int(midi_note)])
+        return float(self.reference_frequency * 2.0 ** ((midi_note - 69) / 12.0))
+
+    def midi_to_frequencies(self, midi_notes: np.ndarray) -> np.ndarray:
+        """
+        Variante tableau de midi_to_frequency (lookup dans la table du diapason).
+
+        Args:
+            midi_notes: Numéros MIDI dans [0, 127].
+
+        Returns:
+            Fréquences en Hz, même forme que l'entrée.
+        """
+        return self._midi_frequencies[np.asarray(midi_notes, dtype=np.int64)]
+
+    def get_note_name(self, midi_note: int) -> str:
+        """
+        Retourne le nom de la note (notation anglo-saxonne, dièses).
+
+        Args:
+            midi_note: Numéro MIDI.
+
+        Returns:
+            Nom de la note, ex: "C4", "A#4".
+        """
+        if 0 <= midi_note <= 127:
+            return MIDI_NOTE_NAMES[midi_note]
+        return f"{NOTE_NAMES[midi_note % 12]}{midi_note // 12 - 1}"
+
+    def get_note_names(self, midi_notes: np.ndarray) -> np.ndarray:
+        """
+        Variante tableau de get_note_name (noms pré-calculés).
+
+        Args:
+            midi_notes: Numéros MIDI dans [0, 127].
+
+        Returns:
+            Tableau d'objets str, même forme que l'entrée.
+        """
+        return midi_note_names(midi_notes)
+
+    def segment_notes(
+        self,
+        pitch_frames: List[PitchFrame],
+        onset_times: Optional[np.ndarray] = None
+    ) -> List[Note]:
+        """
+        Segmente des frames de pitch en notes.
+
+        Algorithme:
+            1. Frames non voisées (fréquence <= 0 ou confiance sous le seuil)
+               ferment la note courante.
+            2. Une frame voisée prolonge la note courante si son pitch
+               continu reste à ±pitch_tolerance demi-tons du MIDI de la note.
+            3. Sinon elle démarre une nouvelle note (MIDI = pitch arrondi).
+            4. Un onset (attaque détectée sur l'audio) démarre aussi une
+               nouvelle note à la première frame qui le suit, ce qui sépare
+               les notes répétées de même hauteur.
+            5. Si activé, le pitch est d'abord stabilisé (médiane glissante
+               sur vibrato_window, puis hystérésis pitch_hysteresis).
+            6. Durée = temps dernière frame - temps première frame ; les notes
+               plus courtes que min_note_duration sont filtrées.
+
+        Args:
+            pitch_frames: Frames de pitch ordonnées dans le temps.
+            onset_times: Temps des onsets en secondes (optionnel), ex:
+                OnsetAnalysis.onset_times.
+
+        Returns:
+            Liste de Note ordonnées.
+
+        Raises:
+            ValueError: Si pitch_frames est vide.
+
+        Example:
+            >>> notes = segmenter.segment_notes(pitch_data)
+        """
+        if not pitch_frames:
+            raise ValueError("La liste de pitch frames ne peut pas être vide")
+
+        times, frequencies, confidences = pitch_frames_to_arrays(pitch_frames).T
+        return self.segment_arrays(times, frequencies, confidences, onset_times)
+
+    def segment_arrays(
+        self,
+        times: np.ndarray,
+        frequencies: np.ndarray,
+        confidences: Optional[np.ndarray] = None,
+        onset_times: Optional[np.ndarray] = None
+    ) -> List[Note]:
+        """
+        Variante tableau de segment_notes (même sémantique).
+
+        Args:
+            times: Temps des frames en secondes, croissants.
+            frequencies: Fréquences en Hz (<= 0 ou NaN = non voisé).
+            confidences: Confiances [0, 1] (défaut: toutes à 1).
+            onset_times: Temps des onsets en secondes (optionnel).
+
+        Returns:
+            Liste de Note ordonnées.
+
+        Raises:
+            ValueError: Si les tableaux sont vides ou de tailles différentes.
+        """
+        times = np.asarray(times, dtype=np.float64)
+        frequencies = np.asarray(frequencies, dtype=np.float64)
+        if confidences is None:
+            confidences = np.ones_like(frequencies)
+        confidences = np.asarray(confidences, dtype=np.float64)
+
+        if times.size == 0:
+            raise ValueError("La liste de pitch frames ne peut pas être vide")
+        if not (times.shape == frequencies.shape == confidences.shape):
+            raise ValueError("times, frequencies et confidences doivent avoir la même taille")
+
+        self.tracer.log_step("segmentation_start", {
+            "input_frames": int(times.size),
+            "time_span": f"{times[0]:.2f}s - {times[-1]:.2f}s"
+        })
+
+        onset_frames = self._onset_frames(times, onset_times)
+        is_start, voiced, midi = self._frame_boundaries(
+            times, frequencies, confidences, onset_frames
+        )
+
+        next_start = np.concatenate((is_start[1:], [True]))
+        next_voiced = np.concatenate((voiced[1:], [False]))
+        is_end = voiced & (~next_voiced | next_start)
+
+        notes, filtered = self._build_notes(
+            times, midi, np.flatnonzero(is_start), np.flatnonzero(is_end)
+        )
+
+        self.tracer.log_step("segmentation_complete", {
+            "output_notes": len(notes),
+            "filtered_count": filtered,
+            "avg_duration": sum(n.duration for n in notes) / len(notes) if notes else 0.0,
+            "midi_range": f"{min(n.midi_note for n in notes)} - {max(n.midi_note for n in notes)}"
+                          if notes else "n/a"
+        })
+
+        return notes
+
+    def feed(
+        self,
+        pitch_frames: List[PitchFrame],
+        onset_times: Optional[np.ndarray] = None
+    ) -> List[Note]:
+        """
+        Segmentation incrémentale : traite un bloc de frames et retourne les
+        notes fermées par ce bloc.
+
+        La note en cours (MIDI, début, dernière frame) est conservée entre
+        les appels ; le coût d'un appel est proportionnel au nombre de
+        nouvelles frames. feed(a) + feed(b) + flush() donne exactement
+        segment_notes(a + b). Le pré-lissage vibrato, s'il est activé,
+        s'applique bloc par bloc (fenêtres tronquées aux bords des blocs).
+
+        Args:
+            pitch_frames: Nouvelles frames, postérieures aux précédentes.
+            onset_times: Onsets connus (optionnel) ; seuls ceux postérieurs
+                à la dernière frame déjà traitée sont pris en compte.
+
+        Returns:
+            Notes terminées (déjà filtrées par min_note_duration).
+
+        Example:
+            >>> for chunk in pitch_chunks:
+            ...     notes.extend(segmenter.feed(chunk))
+            >>> notes.extend(segmenter.flush())
+        """
+        if not pitch_frames:
+            return []
+
+        times, frequencies, confidences = pitch_frames_to_arrays(pitch_frames).T
+        n = times.size
+
+        if onset_times is not None and self._last_frame_time is not None:
+            onset_times = np.asarray(onset_times)
+            onset_times = onset_times[onset_times > self._last_frame_time]
+        onset_frames = self._onset_frames(times, onset_times)
+        self._last_frame_time = float(times[-1])
+
+        open_midi = self._open_note[0] if self._open_note else None
+        is_start, voiced, midi = self._frame_boundaries(
+            times, frequencies, confidences, onset_frames, open_midi
+        )
+
+        notes = []
+
+        # Frames [0, k) prolongeant la note ouverte
+        breaks = np.flatnonzero(is_start | ~voiced)
+        k = int(breaks[0]) if breaks.size else n
+        if self._open_note is not None:
+            if k > 0:
+                self._open_note[2] = float(times[k - 1])
+            if k == n:
+                return notes
+            notes.extend(self._close_open_note())
+
+        # Segments commençant dans ce bloc ; le dernier reste ouvert si la
+        # dernière frame est voisée (sa fin dépend des blocs suivants)
+        next_start = np.concatenate((is_start[1:], [False]))
+        next_voiced = np.concatenate((voiced[1:], [True]))
+        is_end = voiced & (~next_voiced | next_start)
+
+        starts = np.flatnonzero(is_start)
+        ends = np.flatnonzero(is_end[k:]) + k
+        if starts.size > ends.size:
+            last = starts[-1]
+            self._open_note = [int(midi[last]), float(times[last]), float(times[-1])]
+            starts = starts[:-1]
+
+        notes.extend(self._build_notes(times, midi, starts, ends)[0])
+        return notes
+
+    def flush(self) -> List[Note]:
+        """
+        Ferme la note en cours et réinitialise la segmentation incrémentale.
+
+        Returns:
+            La note ouverte si elle dure au moins min_note_duration, sinon [].
+        """
+        self._last_frame_time = None
+        return self._close_open_note()
+
+    def _close_open_note(self) -> List[Note]:
+        """Ferme la note ouverte (filtre de durée minimale)."""
+        if self._open_note is None:
+            return []
+
+        midi, start, end = self._open_note
+        self._open_note = None
+        if end - start >= self.min_note_duration:
+            return [Note(midi_note=midi, start_time=start, duration=end - start)]
+        return []
+
+    def _build_notes(
+        self,
+        times: np.ndarray,
+        midi: np.ndarray,
+        starts: np.ndarray,
+        ends: np.ndarray
+    ) -> Tuple[List[Note], int]:
+        """Construit les Note (filtre de durée minimale) ; retourne aussi le nombre filtré."""
+        durations = times[ends] - times[starts]
+        keep = durations >= self.min_note_duration
+
+        notes = NoteArray.from_fields(
+            midi[starts[keep]], times[starts[keep]], durations[keep]
+        ).to_list()
+        return notes, int(np.count_nonzero(~keep))
+
+    @staticmethod
+    def _onset_frames(times: np.ndarray, onset_times: Optional[np.ndarray]) -> np.ndarray:
+        """Marque la première frame à/après chaque onset."""
+        marked = np.zeros(times.size, dtype=bool)
+        if onset_times is not None and len(onset_times):
+            idx = np.searchsorted(times, np.asarray(onset_times, dtype=np.float64))
+            marked[idx[idx < times.size]] = True
+        return marked
+
+    def _frame_boundaries(
+        self,
+        times: np.ndarray,
+        frequencies: np.ndarray,
+        confidences: np.ndarray,
+        onset_frames: np.ndarray,
+        open_midi: Optional[int] = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Marque les frames qui démarrent une note.
+
+        Args:
+            times: Temps des frames.
+            frequencies: Fréquences des frames.
+            confidences: Confiances des frames.
+            onset_frames: Frames suivant immédiatement un onset.
+            open_midi: MIDI de la note ouverte avant la première frame
+                (segmentation incrémentale), None sinon.
+
+        Returns:
+            (is_start, voiced, midi) : débuts de note, masque voisé et MIDI
+            arrondi de chaque frame.
+        """
+        voiced = (frequencies > 0) & (confidences >= self.confidence_threshold)
+
+        # Pitch continu + MIDI arrondi (frames non voisées neutralisées)
+        safe_freq = np.where(voiced, frequencies, self.reference_frequency)
+        pitch = frequencies_to_pitch(safe_freq, self.reference_frequency)
+        pitch = self._stabilize_pitch(times, pitch, voiced, onset_frames)
+        midi = np.clip(np.round(pitch), 0, 127).astype(np.int64)
+
+        if self._can_compare_previous_frame(pitch, midi, voiced):
+            # Toute frame d'un segment arrondit au MIDI de sa première frame :
+            # comparer au MIDI de la frame précédente est alors équivalent.
+            prev_voiced = np.concatenate(([open_midi is not None], voiced[:-1]))
+            prev_midi = np.concatenate(([open_midi or 0], midi[:-1]))
+            jump = np.abs(pitch - prev_midi) > self.pitch_tolerance
+            is_start = voiced & (~prev_voiced | jump | onset_frames)
+        else:
+            is_start = self._scan_starts(pitch, midi, voiced, onset_frames, open_midi)
+
+        return is_start, voiced, midi
+
+    def _stabilize_pitch(
+        self,
+        times: np.ndarray,
+        pitch: np.ndarray,
+        voiced: np.ndarray,
+        onset_frames: np.ndarray
+    ) -> np.ndarray:
+        """
+        Lissage vibrato du pitch des frames voisées (coût linéaire).
+
+        1. Médiane glissante sur vibrato_window, restreinte aux frames
+           voisées : l'oscillation est écrasée, les sauts de note conservés.
+        2. Hystérésis : une frame est « franche » si son pitch est à moins de
+           0.5 - pitch_hysteresis demi-ton d'un entier ; les autres reprennent
+           le demi-ton de la dernière frame franche du même segment
+           (propagation par np.maximum.accumulate), ou à défaut de la
+           suivante. Les segments sont coupés aux frames non voisées et aux
+           onsets.
+        """
+        if self.vibrato_window > 0 and times.size > 1:
+            step = float(np.median(np.diff(times)))
+            window = int(round(self.vibrato_window / step)) if step > 0 else 1
+            pitch = np.where(voiced, rolling_median(pitch, window, voiced), pitch)
+
+        if self.pitch_hysteresis > 0:
+            n = pitch.size
+            index = np.arange(n)
+            level = np.round(pitch)
+            clear = np.abs(pitch - level) <= 0.5 - self.pitch_hysteresis
+
+            # Segment = frames voisées consécutives, coupées aux onsets
+            prev_voiced = np.concatenate(([False], voiced[:-1]))
+            segment = np.maximum.accumulate(np.where(~prev_voiced | onset_frames, index, 0))
+
+            prev_clear = np.maximum.accumulate(np.where(clear, index, -1))
+            next_clear = np.minimum.accumulate(np.where(clear, index, n)[::-1])[::-1]
+            next_in_segment = (next_clear < n) & \
+                (segment[np.minimum(next_clear, n - 1)] == segment)
+
+            # Dernière frame franche du segment, sinon la suivante, sinon soi-même
+            source = np.where(
+                prev_clear >= segment,
+                prev_clear,
+                np.where(next_in_segment, next_clear, index)
+            )
+            pitch = np.where(voiced, level[source], pitch)
+
+        return pitch
+
+    def _can_compare_previous_frame(
+        self,
+        pitch: np.ndarray,
+        midi: np.ndarray,
+        voiced: np.ndarray
+    ) -> bool:
+        """Vrai si la tolérance garantit un MIDI arrondi constant par segment."""
+        if self.pitch_tolerance < 0.5:
+            return True
+        if self.pitch_tolerance == 0.5:
+            # Seules les fréquences exactement à mi-chemin sont ambiguës
+            return not np.any(voiced & (np.abs(pitch - midi) == 0.5))
+        return False
+
+    def _scan_starts(
+        self,
+        pitch: np.ndarray,
+        midi: np.ndarray,
+        voiced: np.ndarray,
+        onset_frames: np.ndarray,
+        open_midi: Optional[int] = None
+    ) -> np.ndarray:
+        """
+        Débuts de segments pour une tolérance large (>= 0.5 demi-ton).
+
+        Le MIDI de référence dépend de la première frame du segment : on
+        avance segment par segment, la recherche de la rupture suivante
+        étant vectorisée par fenêtres de taille croissante.
+        """
+        n = pitch.size
+        is_start = np.zeros(n, dtype=bool)
+
+        # Une frame non voisée ou un onset rompt toujours la note courante
+        forced = ~voiced | onset_frames
+
+        i = 0 if open_midi is None else self._next_break(pitch, forced, 0, open_midi)
+        while i < n:
+            if not voiced[i]:
+                candidates = np.flatnonzero(voiced[i:])
+                if candidates.size == 0:
+                    break
+                i += int(candidates[0])
+            is_start[i] = True
+            i = self._next_break(pitch, forced, i + 1, midi[i])
+
+        return is_start
+
+    def _next_break(
+        self,
+        pitch: np.ndarray,
+        forced: np.ndarray,
+        lo: int,
+        current: int
+    ) -> int:
+        """Index de la première frame >= lo qui rompt la note `current` (recherche galopante)."""
+        n = pitch.size
+        width = 64
+        while lo < n:
+            hi = min(n, lo + width)
+            breaks = forced[lo:hi] | \
+                (np.abs(pitch[lo:hi] - current) > self.pitch_tolerance)
+            found = np.flatnonzero(breaks)
+            if found.size:
+                return lo + int(found[0])
+            lo, width = hi, width * 2
+        return n
+
+    def print_notes_summary(self, notes: List[Note]) -> None:
+        """
+        Affiche un résumé des notes segmentées.
+
+        Args:
+            notes: Liste de notes.
+        """
+        if not notes:
+            print("Aucune note détectée")
+            return
+
+        midi = np.fromiter((n.midi_note for n in notes), dtype=np.int64, count=len(notes))
+        durations = np.fromiter((n.duration for n in notes), dtype=np.float64, count=len(notes))
+        lo, hi = int(midi.min()), int(midi.max())
+
+        print("\nNote Segmentation Summary:")
+        print("=" * 70)
+        print(f"Total notes: {len(notes)}")
+        print(f"MIDI range: {lo} ({self.get_note_name(lo)}) - {hi} ({self.get_note_name(hi)})")
+        print(f"Duration range: {durations.min():.3f}s - {durations.max():.3f}s")
+        print(f"Average duration: {durations.mean():.3f}s")
+        print(f"Total music duration: {durations.sum():.2f}s")
+        print(f"Reference frequency: {self.reference_frequency:.1f} Hz")
+        print("=" * 70)
+
+        first = notes[:5]
+        names = self.get_note_names(midi[:5])
+        frequencies = self.midi_to_frequencies(midi[:5])
+        print(f"\nFirst {len(first)} notes:")
+        for i, (note, name, freq) in enumerate(zip(first, names, frequencies), 1):
+            print(
+                f"  {i}. {name} (MIDI {note.midi_note}, {freq:.2f} Hz) "
+                f"at {note.start_time:.2f}s, duration {note.duration:.3f}s"
+            )
@@ -0,0 +1,197 @@
+"""
+MusePartition - Onset Detector Module
+Détection d'attaques par flux spectral, à partir d'une STFT unique
+"""
+
+from typing import NamedTuple, Optional
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from src.audio_features import AudioFeatures, stft_magnitude, spectral_flux
+from src.utils import DebugTracer
+
+
+class OnsetAnalysis(NamedTuple):
+    """
+    Résultat d'une analyse spectrale partagée entre les modules.
+
+    Attributes:
+        magnitude: Module de la STFT, forme (n_bins, n_frames), float32
+        onset_envelope: Flux spectral normalisé [0, 1], une valeur par frame
+        onset_times: Temps des onsets détectés en secondes
+        silent: Masque des frames STFT silencieuses
+        sr: Fréquence d'échantillonnage
+        hop_length: Hop de la STFT en échantillons
+    """
+    magnitude: np.ndarray
+    onset_envelope: np.ndarray
+    onset_times: np.ndarray
+    silent: np.ndarray
+    sr: int
+    hop_length: int
+
+    def silent_at(self, times: np.ndarray) -> np.ndarray:
+        """
+        Indique, pour chaque instant, si la frame STFT correspondante est silencieuse.
+
+        Args:
+            times: Instants en secondes.
+
+        Returns:
+            Masque booléen de même forme que times.
+        """
+        frames = np.rint(np.asarray(times) * self.sr / self.hop_length).astype(np.int64)
+        return self.silent[np.clip(frames, 0, self.silent.size - 1)]
+
+
+class OnsetDetector:
+    """
+    Détecte les attaques de notes par flux spectral (spectral flux).
+
+    Les transformées viennent d'un AudioFeatures (créé au besoin) : la STFT
+    fournit l'enveloppe d'onsets, aussi utilisée pour la détection du tempo,
+    et le RMS qui détermine le masque de silence.
+    """
+
+    def __init__(
+        self,
+        onset_threshold: float = 0.1,
+        silence_threshold_db: float = -40.0,
+        n_fft: int = 2048,
+        hop_length: int = 512,
+        peak_window: int = 3,
+        debug: bool = False
+    ):
+        """
+        Initialise l'OnsetDetector.
+
+        Args:
+            onset_threshold: Flux normalisé minimal d'un onset [0, 1] (défaut: 0.1).
+            silence_threshold_db: Énergie (dB relatifs à la frame la plus forte)
+                sous laquelle une frame est silencieuse (défaut: -40).
+            n_fft: Taille de la FFT (défaut: 2048).
+            hop_length: Hop en échantillons (défaut: 512).
+            peak_window: Demi-fenêtre (frames) du maximum local (défaut: 3).
+            debug: Active le traçage debug (défaut: False).
+        """
+        self.onset_threshold = onset_threshold
+        self.silence_threshold_db = silence_threshold_db
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.peak_window = peak_window
+        self.tracer = DebugTracer(output_dir="output/debug", enabled=debug)
+
+    def compute_stft(self, audio: np.ndarray) -> np.ndarray:
+        """
+        Module de la STFT (fenêtre de Hann, trames centrées).
+
+        Args:
+            audio: Signal mono.
+
+        Returns:
+            Magnitude float32 de forme (n_fft // 2 + 1, n_frames).
+
+        Raises:
+            ValueError: Si audio vide ou non mono.
+        """
+        return stft_magnitude(audio, self.n_fft, self.hop_length)
+
+    def spectral_flux(self, magnitude: np.ndarray) -> np.ndarray:
+        """
+        Flux spectral positif sur magnitude log-compressée, normalisé à [0, 1].
+
+        Args:
+            magnitude: Module STFT (n_bins, n_frames).
+
+        Returns:
+            Enveloppe d'onsets, une valeur par frame.
+        """
+        return spectral_flux(magnitude)
+
+    def pick_peaks(self, envelope: np.ndarray) -> np.ndarray:
+        """
+        Indices des maxima locaux de l'enveloppe au-dessus du seuil.
+
+        Args:
+            envelope: Enveloppe d'onsets normalisée.
+
+        Returns:
+            Indices de frames des onsets.
+        """
+        w = self.peak_window
+        padded = np.pad(envelope, w, mode="constant", constant_values=-np.inf)
+        local_max = sliding_window_view(padded, 2 * w + 1).max(axis=1)
+        # Plateaux : ne garder que la première frame (strictement > précédente)
+        rising = envelope > np.concatenate(([-np.inf], envelope[:-1]))
+        return np.flatnonzero(
+            (envelope >= local_max) & rising & (envelope >= self.onset_threshold)
+        )
+
+    def silence_mask(self, rms: np.ndarray) -> np.ndarray:
+        """
+        Frames dont le niveau RMS est sous silence_threshold_db (relatif au maximum).
+
+        Args:
+            rms: RMS par frame (AudioFeatures.rms).
+
+        Returns:
+            Masque booléen par frame.
+        """
+        peak = rms.max()
+        if peak <= 0:
+            return np.ones(rms.size, dtype=bool)
+        with np.errstate(divide="ignore"):
+            db = 20.0 * np.log10(rms / peak)
+        return db < self.silence_threshold_db
+
+    def analyze(
+        self,
+        audio: np.ndarray,
+        sr: int,
+        magnitude: Optional[np.ndarray] = None,
+        features: Optional[AudioFeatures] = None
+    ) -> OnsetAnalysis:
+        """
+        Analyse complète : STFT (une fois), enveloppe, onsets et silence.
+
+        Args:
+            audio: Signal mono.
+            sr: Fréquence d'échantillonnage.
+            magnitude: STFT déjà calculée avec ce hop_length (optionnel).
+            features: Cache AudioFeatures du job (optionnel) ; sa STFT, son RMS
+                et son enveloppe d'onsets sont réutilisés.
+
+        Returns:
+            OnsetAnalysis partageable (segmentation, tempo, silence).
+
+        Example:
+            >>> features = AudioFeatures(audio, sr)
+            >>> analysis = detector.analyze(audio, sr, features=features)
+            >>> notes = segmenter.segment_notes(pitch_data, onset_times=analysis.onset_times)
+            >>> bpm = quantizer.detect_tempo(audio, sr, features=features)
+        """
+        if sr <= 0:
+            raise ValueError(f"Sample rate invalide: {sr}")
+
+        if features is None:
+            features = AudioFeatures(audio, sr, n_fft=self.n_fft, hop_length=self.hop_length)
+            if magnitude is not None:
+                features.magnitude = magnitude
+
+        envelope = features.onset_strength
+        onset_frames = self.pick_peaks(envelope)
+        silent = self.silence_mask(features.rms)
+
+        self.tracer.log_step("onset_analysis", {
+            "frames": int(envelope.size),
+            "onsets": int(onset_frames.size),
+            "silent_ratio": float(silent.mean())
+        })
+
+        return OnsetAnalysis(
+            magnitude=features.magnitude,
+            onset_envelope=envelope,
+            onset_times=onset_frames * features.hop_length / sr,
+            silent=silent,
+            sr=sr,
+            hop_length=features.hop_length
+        )
@@ -0,0 +1,497 @@
+"""
+MusePartition - PDF Renderer Module
+Rendu PDF par lots : un processus MuseScore (mode job-file) pour plusieurs partitions,
+cache disque des PDF indexé par le contenu du MusicXML
+"""
+
+import hashlib
+import json
+import os
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import Future
+from functools import lru_cache
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+import music21
+
+from src.utils import DebugTracer
+
+
+# Éléments MusicXML sans effet sur la gravure, retirés avant hachage
+_VOLATILE_TAGS = {"encoding-date"}
+
+# Intervalle de surveillance des PDF produits pendant un lot (s)
+_PROGRESS_POLL = 0.05
+
+
+class RenderJob(NamedTuple):
+    """Conversion en file : MusicXML source, PDF cible, future du résultat."""
+    musicxml_path: Path
+    pdf_path: Path
+    future: Future
+
+
+def _is_rendered(job: RenderJob) -> bool:
+    """PDF du rendu produit et non vide."""
+    return job.pdf_path.is_file() and job.pdf_path.stat().st_size > 0
+
+
+def musescore_command() -> List[str]:
+    """
+    Commande MuseScore configurée dans music21 (musescoreDirectPNGPath).
+
+    Returns:
+        [chemin de l'exécutable].
+
+    Raises:
+        RuntimeError: Si MuseScore n'est pas configuré ou introuvable.
+    """
+    path = music21.environment.Environment()["musescoreDirectPNGPath"]
+    if not path or str(path).startswith("/skip") or not Path(path).exists():
+        raise RuntimeError(
+            "MuseScore introuvable. Configuration: "
+            "music21.environment.set('musescoreDirectPNGPath', '/path/to/musescore')"
+        )
+    return [str(path)]
+
+
+@lru_cache(maxsize=16)
+def renderer_version(command: Sequence[str]) -> str:
+    """
+    Version d'une commande de rendu (`<command> --version`), calculée une fois.
+
+    Args:
+        command: Commande de rendu (tuple, pour le cache).
+
+    Returns:
+        Sortie de --version, ou la commande elle-même si elle n'en fournit pas.
+    """
+    try:
+        completed = subprocess.run(
+            list(command) + ["--version"], capture_output=True, timeout=30
+        )
+        version = completed.stdout.decode("utf-8", "replace").strip()
+        if completed.returncode == 0 and version:
+            return version
+    except (OSError, subprocess.TimeoutExpired):
+        pass
+    return " ".join(command)
+
+
+def canonical_musicxml(data: bytes) -> bytes:
+    """
+    Forme canonique d'un MusicXML, pour comparer deux exports d'une même partition.
+
+    Retire commentaires, DOCTYPE et date d'encodage, renumérote les
+    identifiants (music21 en tire de nouveaux à chaque Score) par ordre
+    d'apparition, puis sérialise en C14N 2.0 sans espaces de mise en forme.
+
+    Args:
+        data: Contenu du fichier MusicXML.
+
+    Returns:
+        Octets canoniques (UTF-8).
+
+    Raises:
+        ValueError: Si le MusicXML est mal formé.
+    """
+    try:
+        root = ET.fromstring(data)
+    except ET.ParseError as e:
+        raise ValueError(f"MusicXML invalide: {e}")
+
+    ids = {}
+    for element in root.iter():
+        for child in [child for child in element if child.tag in _VOLATILE_TAGS]:
+            element.remove(child)
+        if "id" in element.attrib:
+            element.set("id", ids.setdefault(element.get("id"), f"id{len(ids)}"))
+
+    return ET.canonicalize(ET.tostring(root, encoding="unicode"), strip_text=True).encode("utf-8")
+
+
+class PdfCache:
+    """
+    Cache disque des PDF rendus, indexé par le contenu du MusicXML.
+
+    Clé = SHA-256 du MusicXML canonique (canonical_musicxml) et de la version
+    du moteur de rendu : une partition inchangée n'est pas rendue deux fois,
+    une mise à jour de MuseScore invalide le cache. Entrées `<clé>.pdf`,
+    évincées de la moins récemment utilisée (mtime, rafraîchi à chaque
+    lecture) à la plus récente au-delà de max_bytes.
+
+    L'état est entièrement sur disque : plusieurs instances (threads,
+    processus) peuvent partager un répertoire. Entrées et copies sont liées
+    en dur quand le système de fichiers le permet, copiées sinon ; un
+    fichier lié n'est jamais réécrit sur place, seulement remplacé.
+
+    Example:
+        >>> cache = PdfCache("~/.cache/musepartition/pdf")
+        >>> key = cache.key("score.musicxml", renderer_version(("mscore",)))
+        >>> if cache.fetch(key, "score.pdf") is None:
+        ...     render("score.musicxml", "score.pdf")
+        ...     cache.store(key, "score.pdf")
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = 512 * 1024 * 1024,
+        debug: bool = False
+    ):
+        """
+        Initialise le cache (répertoire créé si besoin).
+
+        Args:
+            directory: Répertoire du cache.
+            max_bytes: Taille maximale du cache en octets (défaut: 512 Mo).
+            debug: Active le traçage debug (défaut: False).
+
+        Raises:
+            ValueError: Si max_bytes invalide.
+        """
+        if max_bytes <= 0:
+            raise ValueError(f"Taille de cache invalide: {max_bytes}")
+
+        self.directory = Path(directory).expanduser()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.tracer = DebugTracer(output_dir="output/debug", enabled=debug)
+
+    def key(self, musicxml_path: str, version: str) -> str:
+        """
+        Clé de cache d'un MusicXML.
+
+        Args:
+            musicxml_path: Fichier MusicXML.
+            version: Version du moteur de rendu (voir renderer_version).
+
+        Returns:
+            Empreinte SHA-256 hexadécimale.
+        """
+        digest = hashlib.sha256(version.encode("utf-8") + b"\0")
+        digest.update(canonical_musicxml(Path(musicxml_path).read_bytes()))
+        return digest.hexdigest()
+
+    def fetch(self, key: str, output_path: str) -> Optional[Path]:
+        """
+        Copie un PDF en cache vers output_path (lien dur si possible).
+
+        Args:
+            key: Clé de cache (voir key).
+            output_path: Fichier PDF à produire (remplacé s'il existe).
+
+        Returns:
+            Path du PDF, ou None si absent du cache.
+        """
+        entry = self._entry(key)
+        output_path = Path(output_path)
+        try:
+            os.utime(entry)
+            _link_or_copy(entry, output_path)
+        except FileNotFoundError:
+            # Absent, ou évincé entre-temps par une autre instance
+            self.tracer.log_step("pdf_cache_miss", {"key": key})
+            return None
+
+        self.tracer.log_step("pdf_cache_hit", {"key": key, "output_path": str(output_path)})
+        return output_path
+
+    def store(self, key: str, pdf_path: str) -> None:
+        """
+        Ajoute un PDF rendu au cache, puis évince au-delà de max_bytes.
+
+        Args:
+            key: Clé de cache (voir key).
+            pdf_path: PDF rendu (inchangé).
+        """
+        _link_or_copy(Path(pdf_path), self._entry(key))
+        self._evict()
+
+    def _entry(self, key: str) -> Path:
+        return self.directory / f"{key}.pdf"
+
+    def _evict(self) -> None:
+        """Supprime les entrées les moins récemment utilisées au-delà de max_bytes."""
+        entries = []
+        for entry in self.directory.glob("*.pdf"):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        for _, size, entry in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            entry.unlink(missing_ok=True)
+            total -= size
+            evicted += 1
+
+        if evicted:
+            self.tracer.log_step("pdf_cache_evict", {"evicted": evicted, "bytes": total})
+
+
+def _link_or_copy(source: Path, target: Path) -> None:
+    """Remplace target par un lien dur vers source, ou une copie (atomique dans les deux cas)."""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_name = tempfile.mkstemp(dir=target.parent, prefix=".", suffix=".tmp")
+    os.close(fd)
+    temp = Path(temp_name)
+    try:
+        temp.unlink()
+        try:
+            os.link(source, temp)
+        except OSError as e:
+            if isinstance(e, FileNotFoundError):
+                raise
+            shutil.copyfile(source, temp)
+        os.replace(temp, target)
+    finally:
+        temp.unlink(missing_ok=True)
+
+
+class PdfRenderer:
+    """
+    Service de rendu PDF par lots via MuseScore.
+
+    Les MusicXML soumis attendent dans une file bornée ; un thread les
+    regroupe (jusqu'à batch_size) et convertit chaque lot en un seul appel
+    `mscore -j job.json` : le démarrage de MuseScore, qui domine pour les
+    partitions courtes, est payé une fois par lot et non par partition.
+    Le délai job_timeout s'applique à chaque partition : un lot sans nouveau
+    PDF pendant job_timeout est interrompu et ses rendus restants relancés
+    un par un, si bien qu'une partition bloquante n'échoue que seule.
+    Chaque soumission renvoie une Future résolue avec le chemin du PDF,
+    ou en échec (RuntimeError) si le PDF n'a pas été produit.
+
+    Le service est partageable entre générateurs et pipelines (thread-safe).
+
+    Example:
+        >>> with PdfRenderer() as renderer:
+        ...     futures = [renderer.submit(xml, xml.with_suffix(".pdf")) for xml in xml_files]
+        ...     pdf_paths = [future.result() for future in futures]
+    """
+
+    def __init__(
+        self,
+        command: Optional[Sequence[str]] = None,
+        max_queue: int = 64,
+        batch_size: int = 16,
+        job_timeout: float = 60.0,
+        debug: bool = False
+    ):
+        """
+        Initialise le service et démarre son thread de rendu.
+
+        Args:
+            command: Commande de rendu, appelée avec `-j <job.json>` (défaut:
+                None = MuseScore de music21, voir musescore_command). Le job
+                est la liste JSON [{"in": musicxml, "out": pdf}, ...].
+            max_queue: Nombre maximum de rendus en attente (défaut: 64) ;
+                submit bloque au-delà (au plus job_timeout secondes).
+            batch_size: Nombre maximum de partitions par appel (défaut: 16).
+            job_timeout: Délai par partition en secondes (défaut: 60), compté
+                depuis le début du lot ou le dernier PDF produit.
+            debug: Active le traçage debug (défaut: False).
+
+        Raises:
+            ValueError: Si max_queue, batch_size ou job_timeout invalide.
+            RuntimeError: Si command est None et MuseScore introuvable.
+        """
+        if max_queue < 1 or batch_size < 1:
+            raise ValueError(f"Taille de file ou de lot invalide: {max_queue}, {batch_size}")
+        if job_timeout <= 0:
+            raise ValueError(f"Délai de rendu invalide: {job_timeout}")
+
+        self.command = list(command) if command is not None else musescore_command()
+        self.batch_size = batch_size
+        self.job_timeout = job_timeout
+        self.tracer = DebugTracer(output_dir="output/debug", enabled=debug)
+
+        self._queue: "queue.Queue[Optional[RenderJob]]" = queue.Queue(maxsize=max_queue)
+        self._closed = False
+        self._lock = threading.Lock()
+        # Soumissions en cours d'ajout en file, attendues par close()
+        self._pending_puts = 0
+        self._puts_done = threading.Condition(self._lock)
+        self._thread = threading.Thread(target=self._run, name="pdf-renderer", daemon=True)
+        self._thread.start()
+
+    def submit(self, musicxml_path: str, pdf_path: str) -> "Future[Path]":
+        """
+        Met un rendu en file.
+
+        Args:
+            musicxml_path: Fichier MusicXML à convertir (doit exister jusqu'à
+                la fin du rendu).
+            pdf_path: Fichier PDF à produire (remplacé s'il existe).
+
+        Returns:
+            Future résolue avec le Path du PDF, ou en échec (RuntimeError).
+
+        Raises:
+            RuntimeError: Si le service est fermé ou la file pleine après job_timeout.
+        """
+        pdf_path = Path(pdf_path)
+        pdf_path.parent.mkdir(parents=True, exist_ok=True)
+        job = RenderJob(Path(musicxml_path).resolve(), pdf_path.resolve(), Future())
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Service de rendu PDF fermé")
+            self._pending_puts += 1
+        # Attente de place hors verrou : les autres soumissions ne sont pas bloquées
+        try:
+            self._queue.put(job, timeout=self.job_timeout)
+        except queue.Full:
+            raise RuntimeError(f"File de rendu PDF pleine ({self._queue.maxsize} en attente)")
+        finally:
+            with self._lock:
+                self._pending_puts -= 1
+                self._puts_done.notify_all()
+        return job.future
+
+    def close(self, wait: bool = True) -> None:
+        """
+        Ferme le service : les rendus déjà en file sont effectués.
+
+        Args:
+            wait: Attend la fin du thread de rendu (défaut: True).
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            # Marqueur de fin placé après les soumissions déjà acceptées
+            self._puts_done.wait_for(lambda: self._pending_puts == 0)
+        self._queue.put(None)
+        if wait:
+            self._thread.join()
+
+    def __enter__(self) -> "PdfRenderer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _run(self) -> None:
+        """Boucle du thread : un lot = le premier rendu en file + ceux déjà arrivés."""
+        stopping = False
+        while not stopping:
+            job = self._queue.get()
+            if job is None:
+                break
+            batch = [job]
+            while len(batch) < self.batch_size:
+                try:
+                    job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    stopping = True
+                    break
+                batch.append(job)
+            try:
+                self._render_batch(batch)
+            except Exception as e:
+                # Le thread survit : les rendus du lot échouent, pas les suivants
+                for job in batch:
+                    if not job.future.done():
+                        job.future.set_exception(RuntimeError(f"Échec rendu PDF: {e}"))
+
+    def _render_batch(self, batch: List[RenderJob]) -> None:
+        """Convertit un lot en un appel, puis résout chaque Future d'après son PDF."""
+        batch = [job for job in batch if job.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        self.tracer.log_step("pdf_batch_start", {"jobs": len(batch)})
+        start = time.perf_counter()
+
+        for job in batch:
+            job.pdf_path.unlink(missing_ok=True)
+        error, timed_out = self._convert(batch)
+
+        pending = [job for job in batch if not _is_rendered(job)]
+        if timed_out and len(pending) > 1:
+            # Partition bloquante inconnue : chaque rendu restant relancé seul
+            self.tracer.log_step("pdf_batch_split", {"jobs": len(pending)})
+            for job in pending:
+                self._resolve(job, self._convert([job])[0])
+
+        for job in batch:
+            if not job.future.done():
+                self._resolve(job, error)
+
+        self.tracer.log_step("pdf_batch_complete", {
+            "jobs": len(batch),
+            "rendered": sum(job.future.exception() is None for job in batch),
+            "error": error,
+            "seconds": time.perf_counter() - start
+        })
+
+    def _convert(self, batch: List[RenderJob]) -> Tuple[Optional[str], bool]:
+        """
+        Un appel de la commande pour le lot, interrompu après job_timeout
+        sans nouveau PDF.
+
+        Returns:
+            (message d'erreur ou None, délai dépassé).
+        """
+        with tempfile.TemporaryDirectory() as job_dir:
+            job_file = Path(job_dir) / "job.json"
+            job_file.write_text(json.dumps(
+                [{"in": str(job.musicxml_path), "out": str(job.pdf_path)} for job in batch]
+            ))
+            # stderr dans un fichier : un tube plein bloquerait MuseScore
+            with open(Path(job_dir) / "stderr.log", "w+b") as stderr:
+                try:
+                    process = subprocess.Popen(
+                        self.command + ["-j", str(job_file)],
+                        stdout=subprocess.DEVNULL,
+                        stderr=stderr
+                    )
+                except OSError as e:
+                    return str(e), False
+
+                rendered = 0
+                deadline = time.monotonic() + self.job_timeout
+                while True:
+                    try:
+                        process.wait(timeout=_PROGRESS_POLL)
+                        break
+                    except subprocess.TimeoutExpired:
+                        pass
+                    done = sum(_is_rendered(job) for job in batch)
+                    if done > rendered:
+                        rendered, deadline = done, time.monotonic() + self.job_timeout
+                    elif time.monotonic() > deadline:
+                        process.kill()
+                        process.wait()
+                        return f"délai dépassé ({self.job_timeout:.0f} s)", True
+
+                if process.returncode != 0:
+                    stderr.seek(0)
+                    message = stderr.read().decode("utf-8", "replace").strip()
+                    return f"code {process.returncode}: {message[-200:]}", False
+        return None, False
+
+    @staticmethod
+    def _resolve(job: RenderJob, error: Optional[str]) -> None:
+        """Future résolue avec le PDF s'il a été produit, sinon en échec."""
+        if _is_rendered(job):
+            job.future.set_result(job.pdf_path)
+        else:
+            job.future.set_exception(RuntimeError(
+                f"Échec rendu PDF {job.musicxml_path.name}: {error or 'PDF non produit'}"
+            ))
@@ -4,17 +4,23 @@ Orchestration complète : audio → partition
 """
 
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional, Dict, Any
 import json
 
+import numpy as np
+
 from musepartition_core.types import TranscriptionResult
 from musepartition_core.audio_processor import AudioProcessor
+from musepartition_core.audio_features import AudioFeatures
 from musepartition_core.pitch_detector import PitchDetector
 from musepartition_core.note_segmenter import NoteSegmenter
+from musepartition_core.onset_detector import OnsetDetector
 from musepartition_core.quantizer import MusicalQuantizer
-from musepartition_core.score_generator import ScoreGenerator
-from musepartition_core.utils import DebugTracer, IntermediateStorage
+from musepartition_core.pdf_renderer import PdfCache, PdfRenderer
+from musepartition_core.score_generator import ScoreGenerator, VALID_FORMATS
+from musepartition_core.utils import DebugTracer, IntermediateStorage, pitch_frames_to_arrays
 
 
 class TranscriptionPipeline:
@@ -23,15 +29,29 @@ class TranscriptionPipeline:
     
     Orchestre les modules : AudioProcessor → PitchDetector → NoteSegmenter 
     → MusicalQuantizer → ScoreGenerator
+    
+    Un AudioFeatures par appel à transcribe() mémorise les transformées
+    (STFT, RMS, onsets, tempogramme) partagées par la segmentation (onsets +
+    silence) et la détection du tempo : chacune est calculée au plus une fois.
+    
+    La détection du tempo sur l'audio ne dépend que du signal : elle tourne
+    dans un thread dès la fin du prétraitement, en parallèle de la détection
+    de pitch, et n'est attendue qu'à l'étape de quantification.
     """
     
-    def __init__(self, config: Optional[Dict[str, Any]] = None):
+    def __init__(
+        self,
+        config: Optional[Dict[str, Any]] = None,
+        pdf_renderer: Optional[PdfRenderer] = None
+    ):
         """
         Initialise le pipeline avec configuration.
         
         Args:
             config: Dictionnaire de configuration. Si None, utilise config par défaut.
                    Voir config.example.json pour structure complète.
+            pdf_renderer: Service de rendu PDF par lots (optionnel), partageable
+                   entre pipelines ; fermé par l'appelant.
         
         Example:
             >>> # Config par défaut
@@ -49,6 +69,7 @@ class TranscriptionPipeline:
             self._merge_config(config)
         
         self._validate_config()
+        self.pdf_renderer = pdf_renderer
         self._init_modules()
     
     def _load_default_config(self) -> Dict[str, Any]:
@@ -65,25 +86,37 @@ class TranscriptionPipeline:
             "note_segmentation": {
                 "min_note_duration": 0.05,
                 "reference_frequency": 440.0,
-                "pitch_tolerance": 0.5
+                "pitch_tolerance": 0.5,
+                "vibrato_window": 0.15,
+                "pitch_hysteresis": 0.2,
+                "onset_threshold": 0.1,
+                "silence_threshold_db": -40.0
             },
             "quantization": {
                 "bpm": None,  # Auto-détection
                 "time_signature": "4/4",
-                "quantization_grid": "1/16",
-                "feel": "straight"
+                "quantization_grid": "1/16",  # ou "auto" (grille et feel choisis)
+                "feel": "straight",
+                "tempo_detection_method": "librosa_tempo",  # ou "note_onsets", "tempogram"
+                "tempo_map": False  # True : tempo variable (suivi de beats)
             },
             "score_generation": {
                 "time_signature": "4/4",
                 "key_signature": "C",
                 "clef": "treble",
                 "instrument_name": "Flute",
+                "engine": "music21",  # ou "native" (MusicXML / MIDI écrits sans music21)
                 "title": "Transcription",
                 "composer": "MusePartition"
             },
             "output": {
                 "base_filename": "score",
-                "formats": ["musicxml", "midi", "pdf"]
+                "formats": ["musicxml", "midi", "pdf"],  # + "mxl" (MusicXML compressé)
+                "parallel": False,  # True : exports simultanés (threads PDF, processus music21)
+                "pdf_cache_dir": None,  # répertoire du cache PDF (None : désactivé)
+                "pdf_cache_max_mb": 512,
+                "defer_pdf": False,  # True : transcribe rend la main avant le PDF (pdf_future)
+                "pdf_workers": 2  # PDF différés rendus simultanément
             },
             "debug": {
                 "enabled": False,
@@ -113,7 +146,7 @@ class TranscriptionPipeline:
                 raise ValueError(f"Section '{section}' manquante dans config")
         
         # Valider formats de sortie
-        valid_formats = {"musicxml", "midi", "pdf"}
+        valid_formats = set(VALID_FORMATS)
         output_formats = set(self.config["output"]["formats"])
         invalid = output_formats - valid_formats
         if invalid:
@@ -140,6 +173,15 @@ class TranscriptionPipeline:
             min_note_duration=self.config["note_segmentation"]["min_note_duration"],
             reference_frequency=self.config["note_segmentation"]["reference_frequency"],
             pitch_tolerance=self.config["note_segmentation"]["pitch_tolerance"],
+            vibrato_window=self.config["note_segmentation"]["vibrato_window"],
+            pitch_hysteresis=self.config["note_segmentation"]["pitch_hysteresis"],
+            debug=debug
+        )
+        
+        # OnsetDetector (STFT partagée : onsets, silence, tempo)
+        self.onset_detector = OnsetDetector(
+            onset_threshold=self.config["note_segmentation"]["onset_threshold"],
+            silence_threshold_db=self.config["note_segmentation"]["silence_threshold_db"],
             debug=debug
         )
         
@@ -149,15 +191,27 @@ class TranscriptionPipeline:
             time_signature=self.config["quantization"]["time_signature"],
             quantization_grid=self.config["quantization"]["quantization_grid"],
             feel=self.config["quantization"]["feel"],
+            tempo_detection_method=self.config["quantization"]["tempo_detection_method"],
             debug=debug
         )
         
-        # ScoreGenerator
+        # ScoreGenerator (cache PDF partagé par répertoire entre pipelines et runs)
+        pdf_cache = None
+        if self.config["output"]["pdf_cache_dir"]:
+            pdf_cache = PdfCache(
+                self.config["output"]["pdf_cache_dir"],
+                max_bytes=int(self.config["output"]["pdf_cache_max_mb"] * 1024 * 1024),
+                debug=debug
+            )
         self.score_generator = ScoreGenerator(
             time_signature=self.config["score_generation"]["time_signature"],
             key_signature=self.config["score_generation"]["key_signature"],
             clef=self.config["score_generation"]["clef"],
             instrument_name=self.config["score_generation"]["instrument_name"],
+            engine=self.config["score_generation"]["engine"],
+            pdf_renderer=self.pdf_renderer,
+            pdf_cache=pdf_cache,
+            pdf_workers=self.config["output"]["pdf_workers"],
             debug=debug
         )
         
@@ -185,6 +239,8 @@ class TranscriptionPipeline:
         
         Returns:
             TranscriptionResult avec chemins fichiers générés et statistiques.
+            Avec output.defer_pdf, retour dès MusicXML et MIDI écrits : le
+            PDF est rendu en arrière-plan (result.pdf_future).
         
         Raises:
             FileNotFoundError: Si audio_file n'existe pas.
@@ -213,6 +269,10 @@ class TranscriptionPipeline:
             "config": self.config
         })
         
+        # Un thread de fond pour la détection du tempo (NumPy/librosa
+        # relâchent le GIL dans leurs calculs lourds)
+        tempo_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tempo")
+        
         try:
             # Étape 1 : Audio Processing
             self.tracer.log_step("step_1_audio_processing", {"status": "start"})
@@ -226,6 +286,25 @@ class TranscriptionPipeline:
             if self.storage:
                 self.storage.save_audio(audio, sr)
             
+            # Cache des transformées du job, partagé par segmentation et tempo
+            features = AudioFeatures(audio, sr)
+            
+            # Tempo sur l'audio lancé tout de suite, joint à l'étape 4
+            config_bpm = self.config["quantization"]["bpm"]
+            use_tempo_map = not config_bpm and self.config["quantization"]["tempo_map"]
+            needs_audio = not config_bpm and (use_tempo_map or
+                self.config["quantization"]["tempo_detection_method"] != "note_onsets")
+            tempo_future = tempo_executor.submit(
+                self.quantizer.detect_tempo_map if use_tempo_map else self.quantizer.detect_tempo,
+                audio, sr, features=features
+            ) if needs_audio else None
+            
+            analysis = self.onset_detector.analyze(audio, sr, features=features)
+            self.tracer.log_step("step_1_onset_analysis", {
+                "onsets": len(analysis.onset_times),
+                "silent_ratio": float(analysis.silent.mean())
+            })
+            
             # Étape 2 : Pitch Detection
             self.tracer.log_step("step_2_pitch_detection", {"status": "start"})
             pitch_data = self.pitch_detector.detect_pitch(audio, sr)
@@ -240,7 +319,13 @@ class TranscriptionPipeline:
             
             # Étape 3 : Note Segmentation
             self.tracer.log_step("step_3_note_segmentation", {"status": "start"})
-            notes = self.note_segmenter.segment_notes(pitch_data)
+            times, frequencies, confidences = pitch_frames_to_arrays(pitch_data).T
+            # Gating : frames tombant dans un silence considérées non voisées
+            frequencies = np.where(analysis.silent_at(times), 0.0, frequencies)
+            notes = self.note_segmenter.segment_arrays(
+                times, frequencies, confidences,
+                onset_times=analysis.onset_times
+            )
             self.tracer.log_step("step_3_note_segmentation", {
                 "status": "complete",
                 "notes": len(notes)
@@ -252,20 +337,29 @@ class TranscriptionPipeline:
             # Étape 4 : Musical Quantization
             self.tracer.log_step("step_4_quantization", {"status": "start"})
             
-            # Si BPM fourni en config, l'utiliser
-            config_bpm = self.config["quantization"]["bpm"]
+            # BPM : config, sinon tempo audio calculé en parallèle, sinon
+            # estimation sur les notes (tempo_detection_method="note_onsets").
+            # Avec quantization.tempo_map, le résultat est une carte de beats.
+            bpm = tempo_future.result() if tempo_future else config_bpm
             
-            quantized_notes, detected_bpm = self.quantizer.quantize_notes(
-                notes,
-                bpm=config_bpm,
-                audio=audio if not config_bpm else None,
-                sr=sr if not config_bpm else None
-            )
+            # Le signal n'est plus utile au-delà de ce point
+            audio = features = analysis = None
+            
+            tempo_map = None
+            if use_tempo_map:
+                quantized_notes, tempo_map = self.quantizer.quantize_with_tempo_map(
+                    notes, tempo_map=bpm
+                )
+                detected_bpm = tempo_map.bpm
+            else:
+                quantized_notes, detected_bpm = self.quantizer.quantize_notes(notes, bpm=bpm)
             
             self.tracer.log_step("step_4_quantization", {
                 "status": "complete",
                 "bpm": detected_bpm,
                 "bpm_source": "config" if config_bpm else "auto-detected",
+                "tempo_changes": len(tempo_map.tempo_changes()) if tempo_map else 0,
+                "grid": self.quantizer.quantization_grid,
                 "quantized_notes": len(quantized_notes)
             })
             
@@ -278,14 +372,18 @@ class TranscriptionPipeline:
                 output_dir=str(output_path),
                 base_filename=self.config["output"]["base_filename"],
                 title=self.config["score_generation"]["title"],
-                composer=self.config["score_generation"]["composer"]
+                composer=self.config["score_generation"]["composer"],
+                tempo_map=tempo_map,
+                grid_step=self.quantizer.grid_fraction,
+                formats=self.config["output"]["formats"],
+                parallel=self.config["output"]["parallel"],
+                defer_pdf=self.config["output"]["defer_pdf"]
             )
             
             self.tracer.log_step("step_5_score_generation", {
                 "status": "complete",
-                "musicxml": str(score_paths['musicxml']),
-                "midi": str(score_paths['midi']),
-                "pdf": str(score_paths['pdf']) if score_paths['pdf'] else "skipped"
+                **{fmt: str(score_paths[fmt]) if score_paths[fmt] else "skipped" for fmt in VALID_FORMATS},
+                "timings_s": score_paths['timings']
             })
             
             # Construire résultat
@@ -293,11 +391,14 @@ class TranscriptionPipeline:
             
             result = TranscriptionResult(
                 pdf_path=str(score_paths['pdf']) if score_paths['pdf'] else "",
-                musicxml_path=str(score_paths['musicxml']),
-                midi_path=str(score_paths['midi']),
+                musicxml_path=str(score_paths['musicxml']) if score_paths['musicxml'] else "",
+                midi_path=str(score_paths['midi']) if score_paths['midi'] else "",
                 bpm=detected_bpm,
                 num_notes=len(quantized_notes),
-                processing_time=processing_time
+                processing_time=processing_time,
+                tempo_map=tempo_map,
+                pdf_future=score_paths['pdf_future'],
+                mxl_path=str(score_paths['mxl']) if score_paths['mxl'] else ""
             )
             
             self.tracer.log_step("pipeline_complete", {
@@ -314,6 +415,9 @@ class TranscriptionPipeline:
                 "type": type(e).__name__
             })
             raise RuntimeError(f"Erreur durant transcription: {e}") from e
+        
+        finally:
+            tempo_executor.shutdown(wait=False, cancel_futures=True)
     
     @classmethod
     def from_json_file(cls, config_path: str) -> 'TranscriptionPipeline':
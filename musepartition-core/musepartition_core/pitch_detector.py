@@ -10,8 +10,11 @@ class PitchDetector:
     
     def detect_pitch(self, audio, sr) -> List[PitchFrame]:
         """Détecte pitch."""
-        # Stub: retourne notes simples
+        # Stub: A4 puis B4, une frame toutes les step_size ms
+        step = self.step_size / 1000.0
+        n = int(round(1.0 / step))
         return [
-            PitchFrame(0.0, 440.0, 0.9),
-            PitchFrame(1.0, 493.88, 0.85),
+            PitchFrame(i * step, 440.0, 0.9) for i in range(n)
+        ] + [
+            PitchFrame(1.0 + i * step, 493.88, 0.85) for i in range(n)
         ]
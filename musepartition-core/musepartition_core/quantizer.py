@@ -1,24 +1,938 @@
-"""Stub MusicalQuantizer pour tests Pipeline"""
-from typing import List, Tuple
-from src.types import Note, QuantizedNote
+"""
+MusePartition - Musical Quantizer Module
+Détection du tempo et quantification rythmique des notes
+"""
+
+from collections import deque
+from fractions import Fraction
+from typing import Dict, List, Optional, Tuple, Union
 import numpy as np
+import librosa
+from src.types import Note, NoteArray, QuantizedNote, QuantizedNoteArray, TempoMap
+from src.audio_features import AudioFeatures
+from src.utils import DebugTracer, rolling_median
+
+
+VALID_GRIDS = {"1/4": 4, "1/8": 8, "1/16": 16, "1/32": 32, "1/12": 12, "1/24": 24}
+TRIPLET_GRIDS = {12, 24}
+VALID_FEELS = {"straight", "triplet"}
+AUTO_GRID = "auto"
+
+# Sélection automatique : score = erreur moyenne (beats) + pénalité × pas par beat
+GRID_COMPLEXITY_PENALTY = 0.01
+VALID_TEMPO_METHODS = {"librosa_tempo", "note_onsets", "tempogram"}
+# Anciens noms acceptés ("beat_track" n'appelle plus librosa.beat.beat_track)
+TEMPO_METHOD_ALIASES = {"beat_track": "librosa_tempo"}
+
+# Estimation du tempo sur les onsets de notes (histogramme d'IOI)
+TEMPO_BPM_RANGE = (40.0, 240.0)
+IOI_BIN = 0.005          # Résolution de l'histogramme (s)
+IOI_MAX = 4.0            # Intervalle maximal pris en compte (s)
+IOI_NEIGHBORS = 8        # Intervalles vers les N onsets suivants
+IOI_HARMONICS = 4        # Dents du peigne (P, 2P, ..., 4P)
+
+# Carte de tempo : lissage du tempo local avant suivi de beats
+TEMPO_MAP_SMOOTHING_S = 4.0
+
+
+def _pick_tempo(periods: np.ndarray, salience: np.ndarray, rate: float) -> Optional[float]:
+    """
+    Tempo le plus saillant parmi des périodes candidates.
+
+    La saillance est pondérée par l'a priori log-normal de librosa (centré
+    sur 120 BPM, écart-type d'une octave) ; le maximum est affiné par
+    interpolation parabolique.
+
+    Args:
+        periods: Périodes candidates, en unités de 1 / rate secondes.
+        salience: Saillance de chaque période (>= 0).
+        rate: Nombre d'unités de période par seconde.
+
+    Returns:
+        Tempo en BPM, None si aucune saillance positive.
+    """
+    bpms = 60.0 * rate / periods
+    score = salience * np.exp(-0.5 * np.log2(bpms / 120.0) ** 2)
+    best = int(np.argmax(score))
+
+    if score[best] <= 0:
+        return None
+
+    # Interpolation parabolique autour du maximum
+    period = float(periods[best])
+    if 0 < best < score.size - 1:
+        left, center, right = score[best - 1:best + 2]
+        curvature = left - 2 * center + right
+        if curvature < 0:
+            period += 0.5 * (left - right) / curvature
+    return 60.0 * rate / period
+
+
+def _ioi_bins(onset: float, previous: np.ndarray) -> np.ndarray:
+    """Bins d'histogramme des intervalles entre des onsets antérieurs et `onset`."""
+    intervals = onset - previous
+    return np.rint(intervals[intervals <= IOI_MAX] / IOI_BIN).astype(np.int64)
+
+
+def _tempo_from_ioi_histogram(histogram: np.ndarray) -> Optional[float]:
+    """
+    Tempo d'un histogramme d'IOI (voir detect_tempo_from_notes).
+
+    Returns:
+        Tempo en BPM, None si aucune périodicité.
+    """
+    # Lissage gaussien (sigma = 2 bins = 10 ms) : tolère le jeu humain
+    kernel = np.exp(-0.5 * (np.arange(-6, 7) / 2.0) ** 2)
+    histogram = np.convolve(histogram, kernel, mode="same")
+    n_bins = histogram.size
+
+    lo, hi = TEMPO_BPM_RANGE
+    periods = np.arange(int(np.ceil(60.0 / hi / IOI_BIN)), int(60.0 / lo / IOI_BIN) + 1)
+    teeth = periods[:, None] * np.arange(1, IOI_HARMONICS + 1)
+    salience = np.where(teeth < n_bins, histogram[np.minimum(teeth, n_bins - 1)], 0.0).sum(axis=1)
+
+    return _pick_tempo(periods, salience, 1.0 / IOI_BIN)
+
 
 class MusicalQuantizer:
-    def __init__(self, bpm=None, time_signature="4/4", quantization_grid="1/16", feel="straight", debug=False):
+    """
+    Aligne des notes (secondes) sur une grille rythmique (beats).
+
+    Le tempo est fourni (bpm) ou détecté sur l'audio via librosa. Les
+    positions et durées sont arrondies au pas de grille le plus proche ;
+    la ligne obtenue est monophonique (pas de collision ni de chevauchement).
+    """
+
+    def __init__(
+        self,
+        bpm: Optional[float] = None,
+        time_signature: str = "4/4",
+        quantization_grid: str = "1/16",
+        feel: str = "straight",
+        tempo_detection_method: str = "librosa_tempo",
+        debug: bool = False
+    ):
+        """
+        Initialise le MusicalQuantizer.
+
+        Args:
+            bpm: Tempo fixe en BPM, None pour auto-détection (défaut: None).
+            time_signature: Signature temporelle (défaut: "4/4").
+            quantization_grid: Grille de quantification (défaut: "1/16").
+                Options: "1/4", "1/8", "1/16", "1/32" ; triolets "1/12", "1/24" ;
+                "auto" : grille (et feel) choisie à chaque quantification par
+                select_grid, 1/16 tant qu'aucune note n'a été quantifiée.
+            feel: "straight" (binaire) ou "triplet" (ternaire) (défaut: "straight").
+                En "triplet", une grille binaire est convertie en grille ternaire
+                (1/8 → 1/12, 1/16 → 1/24). Ignoré en mode "auto".
+            tempo_detection_method: Source de l'auto-détection du tempo
+                (défaut: "librosa_tempo").
+                - "librosa_tempo": librosa.feature.tempo sur le tempogramme
+                  du signal audio (detect_tempo) ; "beat_track" est accepté
+                  comme ancien nom
+                - "note_onsets": histogramme des intervalles entre débuts de
+                  notes (detect_tempo_from_notes), sans l'audio
+                - "tempogram": autocorrélation FFT de l'enveloppe d'onsets
+                  décimée à ~100 Hz (detect_tempo), coût négligeable même
+                  sur de longs fichiers
+            debug: Active le traçage debug (défaut: False).
+
+        Raises:
+            ValueError: Si signature, grille, feel ou méthode tempo invalides.
+
+        Example:
+            >>> quantizer = MusicalQuantizer(bpm=120.0, quantization_grid="1/8")
+            >>> quantizer_triplet = MusicalQuantizer(quantization_grid="1/12", feel="triplet")
+        """
+        try:
+            beats, unit = (int(x) for x in time_signature.split("/"))
+            if beats <= 0 or unit <= 0:
+                raise ValueError
+        except ValueError:
+            raise ValueError(f"Signature temporelle invalide: {time_signature}")
+
+        if quantization_grid not in VALID_GRIDS and quantization_grid != AUTO_GRID:
+            raise ValueError(
+                f"Grille invalide: {quantization_grid}. "
+                f"Valides: {list(VALID_GRIDS) + [AUTO_GRID]}"
+            )
+
+        if feel not in VALID_FEELS:
+            raise ValueError(f"Feel invalide: {feel}. Valides: {sorted(VALID_FEELS)}")
+
+        tempo_detection_method = TEMPO_METHOD_ALIASES.get(tempo_detection_method, tempo_detection_method)
+        if tempo_detection_method not in VALID_TEMPO_METHODS:
+            raise ValueError(
+                f"Méthode de détection tempo invalide: {tempo_detection_method}. "
+                f"Valides: {sorted(VALID_TEMPO_METHODS)}"
+            )
+
         self.bpm = bpm
         self.time_signature = time_signature
         self.quantization_grid = quantization_grid
         self.feel = feel
-    
-    def detect_tempo(self, audio, sr) -> float:
-        """Détecte tempo."""
-        return 120.0
-    
-    def quantize_notes(self, notes: List[Note], bpm=None, audio=None, sr=None) -> Tuple[List[QuantizedNote], float]:
-        """Quantifie notes."""
-        detected_bpm = bpm if bpm else 120.0
-        quantized = [
-            QuantizedNote(69, 0.0, 1.0),
-            QuantizedNote(71, 1.0, 1.0),
-        ]
-        return quantized, detected_bpm
+        self.tempo_detection_method = tempo_detection_method
+        self.beats_per_bar = beats
+        self.beat_unit = unit
+        self.auto_grid = quantization_grid == AUTO_GRID
+        # Scores de la dernière sélection automatique (voir select_grid)
+        self.grid_scores: Dict[str, float] = {}
+
+        self._set_grid("1/16" if self.auto_grid else quantization_grid, feel)
+
+        self.tracer = DebugTracer(output_dir="output/debug", enabled=debug)
+        self.tracer.log_step("quantizer_init", {
+            "bpm": bpm,
+            "time_signature": time_signature,
+            "quantization_grid": quantization_grid,
+            "feel": feel,
+            "tempo_detection_method": tempo_detection_method,
+            "grid_step": self.grid_step
+        })
+
+    def _set_grid(self, quantization_grid: str, feel: str) -> None:
+        """Fixe grid_value, is_triplet et grid_step pour une grille de VALID_GRIDS."""
+        grid_value = VALID_GRIDS[quantization_grid]
+        if feel == "triplet" and grid_value not in TRIPLET_GRIDS:
+            grid_value = grid_value * 3 // 2
+        self.grid_value = grid_value
+        self.is_triplet = grid_value % 3 == 0
+
+        # Pas de grille en beats (ex: 1/16 en 4/4 → 0.25 beat), et sa valeur
+        # exacte (1/12 → 1/3 beat) pour ScoreGenerator
+        self.grid_fraction = Fraction(self.beat_unit, self.grid_value)
+        self.grid_step = float(self.grid_fraction)
+
+    def detect_tempo(
+        self,
+        audio: np.ndarray,
+        sr: int,
+        features: Optional[AudioFeatures] = None
+    ) -> float:
+        """
+        Détecte le tempo de l'audio.
+
+        Avec tempo_detection_method="tempogram", le tempo est lu sur
+        l'autocorrélation FFT de l'enveloppe décimée
+        (AudioFeatures.tempo_autocorrelation) ; sinon sur le tempogramme
+        complet de librosa.
+
+        Args:
+            audio: Signal audio mono.
+            sr: Fréquence d'échantillonnage.
+            features: Cache AudioFeatures du job (optionnel) ; son enveloppe
+                d'onsets est réutilisée au lieu d'analyser à nouveau le signal.
+
+        Returns:
+            Tempo en BPM (120.0 si aucune pulsation détectée).
+
+        Raises:
+            ValueError: Si audio vide ou sample rate invalide.
+
+        Example:
+            >>> bpm = quantizer.detect_tempo(audio, sr)
+        """
+        if audio is None or len(audio) == 0:
+            raise ValueError("Audio vide")
+        if sr <= 0:
+            raise ValueError(f"Sample rate invalide: {sr}")
+
+        shared = features is not None
+        if not shared:
+            features = AudioFeatures(audio, sr)
+
+        if self.tempo_detection_method == "tempogram":
+            autocorrelation = features.tempo_autocorrelation
+            rate = features.tempo_frame_rate
+            lo, hi = TEMPO_BPM_RANGE
+            lags = np.arange(int(np.ceil(60.0 * rate / hi)), int(60.0 * rate / lo) + 1)
+            lags = lags[lags < autocorrelation.size]
+            bpm = _pick_tempo(lags, np.maximum(autocorrelation[lags], 0.0), rate) or 0.0
+        else:
+            # Estimateur de tempo de librosa (prior log-normal centré sur 120 BPM),
+            # appliqué au tempogramme mémorisé
+            tempo = librosa.feature.tempo(
+                tg=features.tempogram,
+                sr=features.sr,
+                hop_length=features.hop_length
+            )
+            bpm = float(np.atleast_1d(tempo)[0])
+
+        if not bpm > 0:
+            self.tracer.log_step("tempo_detection_fallback", {"detected": bpm})
+            bpm = 120.0
+
+        self.tracer.log_step("tempo_detected", {
+            "bpm": bpm,
+            "method": self.tempo_detection_method,
+            "audio_duration": len(audio) / sr,
+            "shared_features": shared
+        })
+
+        return bpm
+
+    def detect_tempo_from_notes(self, notes: Union[List[Note], NoteArray]) -> float:
+        """
+        Estime le tempo à partir des seuls débuts de notes.
+
+        Les intervalles entre chaque onset et ses IOI_NEIGHBORS suivants sont
+        accumulés dans un histogramme lissé ; chaque période candidate P
+        (TEMPO_BPM_RANGE) est notée par un filtre en peigne (somme de
+        l'histogramme en P, 2P, ..., IOI_HARMONICS·P), pondéré par le même
+        a priori log-normal centré sur 120 BPM que librosa. Le coût dépend
+        du nombre de notes, pas de la durée de l'audio.
+
+        Args:
+            notes: Notes segmentées (liste de Note ou NoteArray).
+
+        Returns:
+            Tempo en BPM (120.0 si moins de 3 onsets ou aucune périodicité).
+
+        Example:
+            >>> bpm = quantizer.detect_tempo_from_notes(notes)
+        """
+        if not isinstance(notes, NoteArray):
+            notes = NoteArray.from_list(notes)
+        onsets = np.unique(notes.start_time)
+
+        if onsets.size < 3:
+            self.tracer.log_step("tempo_detection_fallback", {"onsets": int(onsets.size)})
+            return 120.0
+
+        intervals = np.concatenate([
+            onsets[lag:] - onsets[:-lag]
+            for lag in range(1, min(IOI_NEIGHBORS, onsets.size - 1) + 1)
+        ])
+        intervals = intervals[intervals <= IOI_MAX]
+        histogram = np.bincount(
+            np.rint(intervals / IOI_BIN).astype(np.int64),
+            minlength=int(round(IOI_MAX / IOI_BIN)) + 1
+        )
+        bpm = _tempo_from_ioi_histogram(histogram)
+
+        if bpm is None:
+            self.tracer.log_step("tempo_detection_fallback", {"onsets": int(onsets.size)})
+            return 120.0
+
+        self.tracer.log_step("tempo_detected", {
+            "bpm": bpm,
+            "method": "note_onsets",
+            "onsets": int(onsets.size)
+        })
+
+        return bpm
+
+    def detect_tempo_map(
+        self,
+        audio: np.ndarray,
+        sr: int,
+        features: Optional[AudioFeatures] = None
+    ) -> TempoMap:
+        """
+        Suit les beats sur tout le morceau (tempo variable, rubato).
+
+        1. Tempo local par frame : estimateur de librosa appliqué à chaque
+           colonne du tempogramme, lissé par médiane glissante
+           (TEMPO_MAP_SMOOTHING_S) pour écarter les sauts d'octave.
+        2. Programmation dynamique de suivi de beats (librosa.beat.beat_track
+           avec un tempo variant par frame) sur l'enveloppe d'onsets :
+           O(n·k), n frames et k candidats de beat précédent par frame.
+        3. La carte est prolongée vers t=0 (premier intervalle) pour que
+           toute note ait une position >= 0.
+
+        Args:
+            audio: Signal audio mono.
+            sr: Fréquence d'échantillonnage.
+            features: Cache AudioFeatures du job (optionnel).
+
+        Returns:
+            TempoMap (tempo constant estimé si moins de 2 beats suivis).
+
+        Raises:
+            ValueError: Si audio vide ou sample rate invalide.
+
+        Example:
+            >>> tempo_map = quantizer.detect_tempo_map(audio, sr)
+            >>> tempo_map.tempo_changes()
+            [(0.0, 92.3), (16.0, 84.1)]
+        """
+        if audio is None or len(audio) == 0:
+            raise ValueError("Audio vide")
+        if sr <= 0:
+            raise ValueError(f"Sample rate invalide: {sr}")
+
+        if features is None:
+            features = AudioFeatures(audio, sr)
+
+        local_bpm = librosa.feature.tempo(
+            tg=features.tempogram,
+            sr=features.sr,
+            hop_length=features.hop_length,
+            aggregate=None
+        )
+        window = int(round(TEMPO_MAP_SMOOTHING_S * features.sr / features.hop_length))
+        local_bpm = rolling_median(local_bpm, window)
+
+        _, beat_times = librosa.beat.beat_track(
+            onset_envelope=features.onset_strength,
+            sr=features.sr,
+            hop_length=features.hop_length,
+            bpm=local_bpm,
+            units="time"
+        )
+
+        if beat_times.size < 2:
+            self.tracer.log_step("tempo_map_fallback", {"beats": int(beat_times.size)})
+            return TempoMap.constant(float(np.median(local_bpm)), len(audio) / sr)
+
+        first = beat_times[1] - beat_times[0]
+        before = int(np.ceil(beat_times[0] / first))
+        beat_times = np.concatenate((beat_times[0] - first * np.arange(before, 0, -1), beat_times))
+        tempo_map = TempoMap(beat_times)
+
+        self.tracer.log_step("tempo_map_detected", {
+            "beats": int(beat_times.size),
+            "median_bpm": tempo_map.bpm,
+            "tempo_changes": len(tempo_map.tempo_changes())
+        })
+
+        return tempo_map
+
+    def seconds_to_beats(self, time_seconds: float, bpm: float) -> float:
+        """Convertit des secondes en beats."""
+        return time_seconds * bpm / 60.0
+
+    def beats_to_seconds(self, beats: float, bpm: float) -> float:
+        """Convertit des beats en secondes."""
+        return beats * 60.0 / bpm
+
+    def quantize_position(self, position_beats: float) -> float:
+        """
+        Arrondit une position au pas de grille le plus proche.
+
+        Args:
+            position_beats: Position en beats.
+
+        Returns:
+            Position quantifiée en beats.
+        """
+        return round(position_beats / self.grid_step) * self.grid_step
+
+    def quantize_duration(self, duration_beats: float) -> float:
+        """
+        Arrondit une durée au pas de grille (minimum : un pas).
+
+        Args:
+            duration_beats: Durée en beats.
+
+        Returns:
+            Durée quantifiée en beats (>= grid_step).
+        """
+        return max(self.grid_step, round(duration_beats / self.grid_step) * self.grid_step)
+
+    def select_grid(
+        self,
+        start_beats: np.ndarray,
+        penalty: float = GRID_COMPLEXITY_PENALTY
+    ) -> Tuple[str, Dict[str, float]]:
+        """
+        Choisit la grille la mieux adaptée aux débuts de notes.
+
+        Toutes les grilles de VALID_GRIDS sont évaluées en une passe
+        vectorisée (matrice grilles × notes). Score d'une grille :
+        erreur moyenne d'arrondi des débuts (en beats) + penalty × nombre de
+        pas par beat. La pénalité départage les grilles qui contiennent la
+        bonne (1/32 contient 1/16, 1/24 contient 1/8) au profit de la plus
+        simple. Une grille de triolets retenue implique le feel "triplet".
+
+        Args:
+            start_beats: Débuts de notes en beats.
+            penalty: Poids de la complexité de grille
+                (défaut: GRID_COMPLEXITY_PENALTY).
+
+        Returns:
+            (meilleure grille, scores de toutes les grilles triés du meilleur
+            au moins bon) ; les scores permettent de proposer des
+            alternatives sans recalcul.
+
+        Example:
+            >>> grid, scores = quantizer.select_grid(start_times * bpm / 60.0)
+            >>> grid, list(scores)[:2]
+            ('1/12', ['1/12', '1/24'])
+        """
+        start_beats = np.asarray(start_beats, dtype=np.float64)
+        names = list(VALID_GRIDS)
+        steps = self.beat_unit / np.array([VALID_GRIDS[name] for name in names], dtype=np.float64)
+
+        if start_beats.size == 0:
+            errors = np.zeros(steps.size)
+        else:
+            scaled = start_beats[np.newaxis, :] / steps[:, np.newaxis]
+            errors = np.abs(scaled - np.round(scaled)).mean(axis=1) * steps
+
+        scores = errors + penalty / steps
+        ranking = np.argsort(scores, kind="stable")
+        grid_scores = {names[i]: float(scores[i]) for i in ranking}
+
+        self.tracer.log_step("grid_selected", {
+            "grid": names[ranking[0]],
+            "scores": {name: round(score, 4) for name, score in grid_scores.items()}
+        })
+
+        return names[ranking[0]], grid_scores
+
+    def quantize_arrays(
+        self,
+        start_times: np.ndarray,
+        durations: np.ndarray,
+        midi_notes: np.ndarray,
+        tempo: Union[float, TempoMap]
+    ) -> QuantizedNoteArray:
+        """
+        Quantification vectorisée de notes données en colonnes.
+
+        Règles (identiques à quantize_position / quantize_duration) :
+            1. Position = multiple de grid_step le plus proche (>= 0),
+               durée = multiple le plus proche, au moins un pas.
+            2. Collision : parmi les notes tombant sur la même position, seule
+               la plus longue (durée originale ; la première à égalité) est
+               conservée.
+            3. Chevauchement : une durée est tronquée au début de la note
+               suivante (jamais sous un pas, les positions étant distinctes).
+
+        Les calculs se font en nombre de pas (entiers) puis sont remis en beats.
+        En mode "auto", la grille est d'abord choisie par select_grid (scores
+        conservés dans self.grid_scores). Avec une TempoMap, débuts et fins de
+        notes sont convertis en beats par interpolation linéaire (np.interp)
+        entre les beats suivis.
+
+        Args:
+            start_times: Débuts en secondes.
+            durations: Durées en secondes.
+            midi_notes: Numéros MIDI.
+            tempo: Tempo global en BPM, ou TempoMap (tempo variable).
+
+        Returns:
+            QuantizedNoteArray trié par position.
+
+        Example:
+            >>> notes = NoteArray.from_list(note_list)
+            >>> quantized = quantizer.quantize_arrays(
+            ...     notes.start_time, notes.duration, notes.midi_note, bpm=120.0)
+        """
+        start_times = np.asarray(start_times, dtype=np.float64)
+        durations = np.asarray(durations, dtype=np.float64)
+        midi_notes = np.asarray(midi_notes)
+
+        order = np.argsort(start_times, kind="stable")
+        start_times, durations, midi_notes = start_times[order], durations[order], midi_notes[order]
+
+        if isinstance(tempo, TempoMap):
+            start_beats = tempo.seconds_to_beats(start_times)
+            duration_beats = tempo.seconds_to_beats(start_times + durations) - start_beats
+        else:
+            start_beats = start_times * tempo / 60.0
+            duration_beats = durations * tempo / 60.0
+
+        if self.auto_grid:
+            grid, self.grid_scores = self.select_grid(start_beats)
+            self.quantization_grid = grid
+            self.feel = "triplet" if VALID_GRIDS[grid] in TRIPLET_GRIDS else "straight"
+            self._set_grid(grid, self.feel)
+
+        positions, lengths, keep = self._snap_to_grid(start_beats, duration_beats, durations)
+        positions, lengths, midi_notes = positions[keep], lengths[keep], midi_notes[keep]
+
+        # Chevauchements : tronquer au début de la note suivante
+        lengths[:-1] = np.minimum(lengths[:-1], np.diff(positions))
+
+        step = self.grid_step
+        return QuantizedNoteArray.from_fields(midi_notes, positions * step, lengths * step)
+
+    def _snap_to_grid(
+        self,
+        start_beats: np.ndarray,
+        duration_beats: np.ndarray,
+        durations: np.ndarray,
+        min_position: float = 0.0
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Arrondit des notes triées au pas de grille et résout les collisions.
+
+        Les positions sont bornées inférieurement par min_position (en pas).
+
+        Returns:
+            (positions, longueurs) en nombre de pas pour toutes les notes, et
+            indices des notes conservées (la plus longue de chaque position,
+            durée originale, la première à égalité).
+        """
+        step = self.grid_step
+        positions = np.maximum(np.round(start_beats / step), min_position)
+        lengths = np.maximum(np.round(duration_beats / step), 1.0)
+
+        if positions.size <= 1:
+            return positions, lengths, np.arange(positions.size)
+
+        boundary = np.concatenate(([True], positions[1:] != positions[:-1]))
+        group = np.cumsum(boundary) - 1
+        longest = durations == np.maximum.reduceat(durations, np.flatnonzero(boundary))[group]
+        candidates = np.flatnonzero(longest)
+        keep = candidates[np.concatenate(([True], np.diff(group[candidates]) > 0))]
+        return positions, lengths, keep
+
+    def quantize_notes(
+        self,
+        notes: Union[List[Note], NoteArray],
+        bpm: Optional[float] = None,
+        audio: Optional[np.ndarray] = None,
+        sr: Optional[int] = None,
+        features: Optional[AudioFeatures] = None
+    ) -> Tuple[List[QuantizedNote], float]:
+        """
+        Quantifie une liste de notes (voir quantize_arrays pour les règles).
+
+        Tempo utilisé : argument bpm, sinon self.bpm, sinon auto-détection
+        selon tempo_detection_method (sur les notes elles-mêmes avec
+        "note_onsets", l'audio n'est alors pas nécessaire).
+
+        Args:
+            notes: Notes à quantifier (liste de Note ou NoteArray).
+            bpm: Tempo en BPM (optionnel).
+            audio: Signal audio pour auto-détection du tempo (optionnel).
+            sr: Fréquence d'échantillonnage de audio.
+            features: Cache AudioFeatures du job pour la détection tempo.
+
+        Returns:
+            (notes quantifiées, bpm utilisé).
+
+        Raises:
+            ValueError: Si notes vide ou aucun tempo disponible.
+
+        Example:
+            >>> quantized, bpm = quantizer.quantize_notes(notes, bpm=120.0)
+        """
+        if len(notes) == 0:
+            raise ValueError("Liste de notes vide")
+
+        if bpm is None:
+            bpm = self.bpm
+        if bpm is None and self.tempo_detection_method == "note_onsets":
+            bpm = self.detect_tempo_from_notes(notes)
+        if bpm is None:
+            if audio is None or sr is None:
+                raise ValueError("BPM non fourni et pas d'audio pour auto-détection")
+            bpm = self.detect_tempo(audio, sr, features=features)
+
+        self.tracer.log_step("quantization_start", {
+            "input_notes": len(notes),
+            "bpm": bpm,
+            "grid_step": self.grid_step
+        })
+
+        if not isinstance(notes, NoteArray):
+            notes = NoteArray.from_list(notes)
+        quantized = self.quantize_arrays(
+            notes.start_time, notes.duration, notes.midi_note, bpm
+        ).to_list()
+
+        self.tracer.log_step("quantization_complete", {
+            "output_notes": len(quantized),
+            "collisions_removed": len(notes) - len(quantized),
+            "bpm": bpm
+        })
+
+        return quantized, bpm
+
+    def stream(
+        self,
+        lookahead_beats: float = 4.0,
+        bpm: Optional[float] = None
+    ) -> "QuantizerStream":
+        """
+        Crée un quantificateur en ligne (transcription live).
+
+        Args:
+            lookahead_beats: Délai (en beats) après lequel une note est
+                émise (défaut: 4.0) ; float("inf") pour tout émettre au flush.
+            bpm: Tempo fixe (défaut: self.bpm) ; None pour l'estimer au fil
+                des notes (histogramme d'IOI, comme "note_onsets").
+
+        Returns:
+            QuantizerStream lié à ce quantificateur (grille courante).
+
+        Example:
+            >>> stream = quantizer.stream(lookahead_beats=2.0)
+            >>> for chunk in pitch_chunks:
+            ...     quantized.extend(stream.feed(segmenter.feed(chunk)))
+            >>> quantized.extend(stream.feed(segmenter.flush()))
+            >>> quantized.extend(stream.flush())
+        """
+        return QuantizerStream(self, lookahead_beats, bpm if bpm is not None else self.bpm)
+
+    def quantize_with_tempo_map(
+        self,
+        notes: Union[List[Note], NoteArray],
+        tempo_map: Optional[TempoMap] = None,
+        audio: Optional[np.ndarray] = None,
+        sr: Optional[int] = None,
+        features: Optional[AudioFeatures] = None
+    ) -> Tuple[List[QuantizedNote], TempoMap]:
+        """
+        Quantifie des notes avec une carte de tempo variable.
+
+        Args:
+            notes: Notes à quantifier (liste de Note ou NoteArray).
+            tempo_map: Carte de tempo, None pour la détecter sur audio.
+            audio: Signal audio pour detect_tempo_map (optionnel).
+            sr: Fréquence d'échantillonnage de audio.
+            features: Cache AudioFeatures du job (optionnel).
+
+        Returns:
+            (notes quantifiées, carte de tempo utilisée) ; la carte est à
+            transmettre à ScoreGenerator pour écrire les changements de tempo.
+
+        Raises:
+            ValueError: Si notes vide ou ni carte ni audio.
+
+        Example:
+            >>> quantized, tempo_map = quantizer.quantize_with_tempo_map(notes, audio=audio, sr=sr)
+            >>> generator.generate_score(quantized, tempo_map.bpm, tempo_map=tempo_map)
+        """
+        if len(notes) == 0:
+            raise ValueError("Liste de notes vide")
+
+        if tempo_map is None:
+            if audio is None or sr is None:
+                raise ValueError("Carte de tempo non fournie et pas d'audio pour auto-détection")
+            tempo_map = self.detect_tempo_map(audio, sr, features=features)
+
+        if not isinstance(notes, NoteArray):
+            notes = NoteArray.from_list(notes)
+        quantized = self.quantize_arrays(
+            notes.start_time, notes.duration, notes.midi_note, tempo_map
+        ).to_list()
+
+        self.tracer.log_step("quantization_complete", {
+            "output_notes": len(quantized),
+            "collisions_removed": len(notes) - len(quantized),
+            "median_bpm": tempo_map.bpm
+        })
+
+        return quantized, tempo_map
+
+    def print_quantization_summary(
+        self,
+        notes: List[Note],
+        quantized_notes: List[QuantizedNote],
+        bpm: float
+    ) -> None:
+        """
+        Affiche un résumé de la quantification.
+
+        Args:
+            notes: Notes originales.
+            quantized_notes: Notes quantifiées correspondantes.
+            bpm: Tempo utilisé.
+        """
+        print("\nMusical Quantization Summary:")
+        print("=" * 70)
+        print(f"Tempo: {bpm:.1f} BPM")
+        print(f"Time signature: {self.time_signature}")
+        print(f"Quantization grid: {self.quantization_grid}{' (auto)' if self.auto_grid else ''}")
+        print(f"Total notes: {len(quantized_notes)}")
+
+        if notes and quantized_notes:
+            original = np.array([self.seconds_to_beats(n.start_time, bpm) for n in notes])
+            snapped = np.array([q.beat_position for q in quantized_notes])
+            shifts = np.abs(snapped - original[:len(snapped)])
+            beat_ms = self.beats_to_seconds(1.0, bpm) * 1000
+            print(f"Average timing shift: {shifts.mean():.3f} beats ({shifts.mean() * beat_ms:.1f}ms)")
+            print(f"Max timing shift: {shifts.max():.3f} beats ({shifts.max() * beat_ms:.1f}ms)")
+        print("=" * 70)
+
+        print(f"\nFirst {min(3, len(quantized_notes))} notes (before → after):")
+        for i, (note, qnote) in enumerate(zip(notes[:3], quantized_notes[:3]), 1):
+            print(
+                f"  {i}. MIDI {note.midi_note}: {note.start_time:.3f}s → beat "
+                f"{qnote.beat_position:.2f}, duration {note.duration:.3f}s → "
+                f"{qnote.duration_beats:.2f} beats"
+            )
+
+
+class QuantizerStream:
+    """
+    Quantification en ligne, avec look-ahead borné.
+
+    Reçoit les notes à leur fermeture (ordre des débuts, comme
+    NoteSegmenter.feed) et émet les QuantizedNote dont la position est
+    dépassée de lookahead_beats par la fin de note la plus tardive reçue.
+    Une note n'est émise qu'une fois la position suivante connue, pour
+    appliquer les règles de collision et de chevauchement de quantize_arrays.
+
+    Sans tempo fixe, le tempo est réestimé à chaque appel sur un histogramme
+    d'IOI mis à jour incrémentalement (IOI_NEIGHBORS intervalles par note) ;
+    un changement d'estimation ne déplace pas les notes déjà émises : la
+    conversion secondes → beats repart de la première note en attente.
+    Chaque note coûte O(1) amorti (hors nombre de notes dans la fenêtre de
+    look-ahead).
+
+    Avec un tempo fixe, ou un look-ahead couvrant tout le morceau, la sortie
+    est identique à quantize_notes.
+    """
+
+    def __init__(
+        self,
+        quantizer: MusicalQuantizer,
+        lookahead_beats: float = 4.0,
+        bpm: Optional[float] = None
+    ):
+        """
+        Initialise le flux (voir MusicalQuantizer.stream).
+
+        Raises:
+            ValueError: Si lookahead_beats négatif.
+        """
+        if not lookahead_beats >= 0:
+            raise ValueError(f"Look-ahead invalide: {lookahead_beats}")
+
+        self.quantizer = quantizer
+        self.lookahead_beats = lookahead_beats
+        self.fixed_bpm = bpm
+        self._reset()
+
+    def _reset(self) -> None:
+        """Réinitialise l'état du flux."""
+        self._starts: List[float] = []
+        self._durations: List[float] = []
+        self._midi: List[int] = []
+        self._last_start = -np.inf
+        self._now = 0.0              # Fin de note la plus tardive reçue (s)
+        self._last_end = 0.0         # Fin de la dernière note émise (pas)
+        self._emitted = 0
+        self._anchor = (0.0, 0.0)    # (secondes, beats) origine de la conversion
+        self._bpm = self.fixed_bpm if self.fixed_bpm is not None else 120.0
+
+        self._onset_count = 0
+        self._recent_onsets = deque(maxlen=IOI_NEIGHBORS)
+        self._histogram = np.zeros(int(round(IOI_MAX / IOI_BIN)) + 1, dtype=np.int64)
+
+    @property
+    def bpm(self) -> float:
+        """Tempo courant (fixe ou estimé) en BPM."""
+        return self._bpm
+
+    def feed(self, notes: List[Note]) -> List[QuantizedNote]:
+        """
+        Ajoute des notes fermées et retourne les notes quantifiées prêtes.
+
+        Args:
+            notes: Nouvelles notes, débuts croissants et postérieurs aux
+                notes déjà reçues.
+
+        Returns:
+            Notes quantifiées émises par cet appel (éventuellement aucune).
+
+        Raises:
+            ValueError: Si une note commence avant la précédente.
+        """
+        new_onsets = False
+        for note in notes:
+            if note.start_time < self._last_start:
+                raise ValueError(
+                    f"Notes non ordonnées: {note.start_time:.3f}s après {self._last_start:.3f}s"
+                )
+            self._last_start = note.start_time
+            self._starts.append(note.start_time)
+            self._durations.append(note.duration)
+            self._midi.append(note.midi_note)
+            self._now = max(self._now, note.start_time + note.duration)
+
+            if self.fixed_bpm is None and (
+                not self._recent_onsets or note.start_time != self._recent_onsets[-1]
+            ):
+                previous = np.fromiter(self._recent_onsets, dtype=np.float64)
+                np.add.at(self._histogram, _ioi_bins(note.start_time, previous), 1)
+                self._recent_onsets.append(note.start_time)
+                self._onset_count += 1
+                new_onsets = True
+
+        if new_onsets:
+            self._update_tempo()
+
+        return self._emit(final=False)
+
+    def flush(self) -> List[QuantizedNote]:
+        """
+        Émet toutes les notes en attente et réinitialise le flux.
+
+        Returns:
+            Notes quantifiées restantes.
+        """
+        quantized = self._emit(final=True)
+        self.quantizer.tracer.log_step("stream_flush", {
+            "emitted": self._emitted,
+            "bpm": self._bpm
+        })
+        self._reset()
+        return quantized
+
+    def _beats(self, times):
+        """Secondes → beats selon le tempo courant, depuis l'ancre."""
+        anchor_time, anchor_beat = self._anchor
+        return anchor_beat + (times - anchor_time) * self._bpm / 60.0
+
+    def _update_tempo(self) -> None:
+        """Réestime le tempo ; réancre la conversion si des notes ont été émises."""
+        bpm = None
+        if self._onset_count >= 3:
+            bpm = _tempo_from_ioi_histogram(self._histogram)
+        bpm = bpm or 120.0
+
+        if bpm != self._bpm and self._emitted and self._starts:
+            self._anchor = (self._starts[0], float(self._beats(self._starts[0])))
+        self._bpm = bpm
+
+    def _emit(self, final: bool) -> List[QuantizedNote]:
+        """Quantifie les notes en attente et émet celles qui sont prêtes."""
+        if not self._starts:
+            return []
+
+        step = self.quantizer.grid_step
+        now_beat = self._beats(self._now)
+
+        # Test en O(1) : la première note en attente ne peut pas encore être prête
+        if not final and self._beats(self._starts[0]) - step / 2 + self.lookahead_beats > now_beat:
+            return []
+
+        starts = np.array(self._starts)
+        durations = np.array(self._durations)
+        midi_notes = np.array(self._midi, dtype=np.int64)
+
+        # Pas de note avant la fin de la dernière note émise (changement de tempo)
+        positions, lengths, keep = self.quantizer._snap_to_grid(
+            self._beats(starts), durations * self._bpm / 60.0, durations,
+            min_position=self._last_end
+        )
+        kept_positions = positions[keep]
+
+        if final:
+            count = keep.size
+        else:
+            ready = np.count_nonzero(kept_positions * step + self.lookahead_beats <= now_beat)
+            count = min(int(ready), keep.size - 1)
+        if count <= 0:
+            return []
+
+        emitted = keep[:count]
+        out_lengths = lengths[emitted]
+        bounds = np.diff(kept_positions[:count + 1])
+        out_lengths[:bounds.size] = np.minimum(out_lengths[:bounds.size], bounds)
+
+        cut = int(np.searchsorted(positions, kept_positions[count - 1], side="right"))
+        del self._starts[:cut], self._durations[:cut], self._midi[:cut]
+        self._last_end = kept_positions[count - 1] + out_lengths[-1]
+        self._emitted += count
+
+        return QuantizedNoteArray.from_fields(
+            midi_notes[emitted], kept_positions[:count] * step, out_lengths * step
+        ).to_list()
@@ -4,10 +4,156 @@ Génération de partitions musicales à partir de notes quantifiées
 """
 
 import music21
-from typing import List, Optional
+from music21.converter.museScore import runThroughMuseScore
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack
+from fractions import Fraction
+from functools import lru_cache
+from typing import Iterable, List, NamedTuple, Optional, Tuple
 from pathlib import Path
-from src.types import QuantizedNote
-from src.utils import DebugTracer
+import numpy as np
+from src.types import QuantizedNote, TempoMap
+from src.midi_writer import MIDI_TICKS_PER_QUARTER, MidiWriter
+from src.musicxml_writer import MusicXMLWriter, open_mxl
+from src.pdf_renderer import PdfCache, PdfRenderer, musescore_command, renderer_version
+from src.utils import DebugTracer, beats_to_ticks
+
+
+# Moteurs d'écriture MusicXML / MIDI : music21 (Score complet) ou writers natifs
+VALID_ENGINES = {"music21", "native"}
+
+# Formats d'export → extension (ordre du plan d'export) ; "mxl" : MusicXML compressé
+VALID_FORMATS = {"musicxml": ".musicxml", "mxl": ".mxl", "midi": ".mid", "pdf": ".pdf"}
+
+# Formats exportés par generate_score sans liste explicite
+DEFAULT_FORMATS = ("musicxml", "midi", "pdf")
+
+# Logiciel inscrit dans les métadonnées des Scores construits par notes_to_music21
+_SOFTWARE = "MusePartition"
+
+
+class ExportStep(NamedTuple):
+    """Étape du plan d'export : format, fichier cible, Score music21 requis."""
+    format: str
+    path: Path
+    uses_score: bool
+
+
+class ScoreJob(NamedTuple):
+    """Entrées immuables d'une génération, partagées (ou picklées) par tous les exporteurs."""
+    quantized_notes: Tuple[QuantizedNote, ...]
+    bpm: float
+    title: str = "Transcription"
+    composer: str = "MusePartition"
+    tempo_map: Optional[TempoMap] = None
+    grid_step: Optional[Fraction] = None
+
+
+class _QuarterLengthTable(dict):
+    """Nombre de ticks → quarterLength music21 exact, calculé une fois par valeur."""
+
+    def __init__(self, tick_quarter: Fraction):
+        super().__init__()
+        self.tick_quarter = tick_quarter
+
+    def __missing__(self, ticks: int):
+        value = self[ticks] = music21.common.opFrac(ticks * self.tick_quarter)
+        return value
+
+
+@lru_cache(maxsize=32)
+def _quarter_length_table(tick_quarter: Fraction) -> _QuarterLengthTable:
+    """Table de quarterLength partagée pour un tick donné (en noires)."""
+    return _QuarterLengthTable(tick_quarter)
+
+
+def _beam_measure(
+    measure: music21.stream.Measure,
+    time_signature: music21.meter.TimeSignature,
+    clef: Optional[music21.clef.Clef]
+) -> None:
+    """
+    Ligatures et hampes d'une mesure complète (comme Stream.makeBeams), avec
+    métrique et clef connues : pas de recherche de contexte par mesure.
+    """
+    elements = [n for n in measure.notesAndRests if not n.duration.isGrace]
+    if len(elements) > 1:
+        beams_list = time_signature.getBeams(elements, measureStartOffset=0.0)
+        for element, beams in zip(elements, beams_list):
+            element.beams = beams if beams is not None else music21.beam.Beams()
+    if clef is None:
+        return
+    for group in music21.stream.makeNotation.iterateBeamGroups(measure, skipNoBeams=True):
+        if not group:
+            continue
+        direction = clef.getStemDirectionForPitches([n.pitch for n in group])
+        for n in group:
+            n.stemDirection = direction
+
+
+def _is_notated(score: music21.stream.Score) -> bool:
+    """
+    Score déjà noté : chaque partie en mesures, altérations et ligatures faites
+    (notes_to_music21). L'export peut alors sauter makeNotation.
+    """
+    parts = list(score.parts)
+    return bool(parts) and all(
+        part.hasMeasures() and part.streamStatus.accidentals and part.streamStatus.beams
+        for part in parts
+    )
+
+
+def _midi_events(
+    part: music21.stream.Part
+) -> Tuple[MidiWriter, np.ndarray, np.ndarray, np.ndarray, List[Tuple[int, float]]]:
+    """
+    Notes d'une partie déjà notée (notes_to_music21) relues mesure par mesure,
+    notes liées fusionnées, en ticks MIDI pour MidiWriter.write_ticks.
+    
+    Returns:
+        (writer configuré d'après la partie, débuts, durées, hauteurs,
+        changements de tempo (tick, BPM en beats)).
+    """
+    time_signature = key = None
+    starts, ends, midi_notes, tempo_marks = [], [], [], []
+    for measure in part.getElementsByClass(music21.stream.Measure):
+        measure_offset = measure.offset
+        for element in measure:
+            offset = measure_offset + element.offset
+            if isinstance(element, music21.note.Note):
+                end = offset + element.quarterLength
+                if element.tie is not None and element.tie.type != "start":
+                    ends[-1] = end
+                else:
+                    starts.append(offset)
+                    ends.append(end)
+                    midi_notes.append(element.pitch.midi)
+            elif isinstance(element, music21.tempo.MetronomeMark):
+                tempo_marks.append((offset, element.getQuarterBPM()))
+            elif isinstance(element, music21.meter.TimeSignature) and time_signature is None:
+                time_signature = element
+            elif isinstance(element, music21.key.KeySignature) and key is None:
+                key = element if isinstance(element, music21.key.Key) else element.asKey()
+    
+    writer = MidiWriter(
+        time_signature=time_signature.ratioString if time_signature else "4/4",
+        key_signature=key.tonicPitchNameWithCase if key else "C",
+        instrument_name=part.partName or ""
+    )
+    # BPM à la noire → BPM en beats de la signature
+    tempo_changes = [
+        (int(round(offset * MIDI_TICKS_PER_QUARTER)), quarter_bpm * writer.beat_unit / 4)
+        for offset, quarter_bpm in tempo_marks or [(0.0, 120.0)]
+    ]
+    starts = np.rint(np.array(starts, dtype=float) * MIDI_TICKS_PER_QUARTER).astype(np.int64)
+    ends = np.rint(np.array(ends, dtype=float) * MIDI_TICKS_PER_QUARTER).astype(np.int64)
+    return writer, starts, ends - starts, np.array(midi_notes, dtype=np.int64), tempo_changes
 
 
 class ScoreGenerator:
@@ -24,6 +170,10 @@ class ScoreGenerator:
         key_signature: str = "C",
         clef: str = "treble",
         instrument_name: str = "Flute",
+        engine: str = "music21",
+        pdf_renderer: Optional[PdfRenderer] = None,
+        pdf_cache: Optional[PdfCache] = None,
+        pdf_workers: int = 2,
         debug: bool = False
     ):
         """
@@ -38,6 +188,18 @@ class ScoreGenerator:
             clef: Clef (défaut: "treble").
                 Options: "treble" (sol), "bass" (fa), "alto" (ut3), "tenor" (ut4)
             instrument_name: Nom de l'instrument (défaut: "Flute").
+            engine: Moteur MusicXML / MIDI de generate_score (défaut: "music21").
+                "music21" : Score music21 complet puis score.write.
+                "native" : MusicXMLWriter et MidiWriter, écriture directe
+                depuis les notes ; le Score music21 ne sert qu'au PDF.
+            pdf_renderer: Service de rendu PDF par lots (optionnel, partageable
+                entre générateurs) ; None : un processus MuseScore par PDF
+                via music21.
+            pdf_cache: Cache disque des PDF (optionnel) ; un MusicXML déjà
+                rendu (même contenu, même version de MuseScore) est copié
+                depuis le cache au lieu d'être rendu.
+            pdf_workers: Nombre maximum de PDF rendus simultanément en
+                arrière-plan (generate_score avec defer_pdf, défaut: 2).
             debug: Active le traçage debug (défaut: False).
         
         Example:
@@ -55,39 +217,86 @@ class ScoreGenerator:
             ...     clef="bass",
             ...     instrument_name="Double Bass"
             ... )
+        
+        Raises:
+            ValueError: Si moteur ou nombre de workers PDF invalide.
         """
+        if engine not in VALID_ENGINES:
+            raise ValueError(f"Moteur invalide: {engine}. Valides: {sorted(VALID_ENGINES)}")
+        if pdf_workers < 1:
+            raise ValueError(f"Nombre de workers PDF invalide: {pdf_workers}")
+        
         self.time_signature = time_signature
         self.key_signature = key_signature
         self.clef = clef
         self.instrument_name = instrument_name
+        self.engine = engine
+        self.pdf_renderer = pdf_renderer
+        self.pdf_cache = pdf_cache
+        self.pdf_workers = pdf_workers
+        self._pdf_pool: Optional[ThreadPoolExecutor] = None
+        self._pdf_pool_lock = threading.Lock()
         self.tracer = DebugTracer(output_dir="output/debug", enabled=debug)
         
         self.tracer.log_step("score_generator_init", {
             "time_signature": time_signature,
             "key_signature": key_signature,
             "clef": clef,
-            "instrument": instrument_name
+            "instrument": instrument_name,
+            "engine": engine,
+            "pdf_renderer": pdf_renderer is not None,
+            "pdf_cache": str(pdf_cache.directory) if pdf_cache is not None else None
         })
     
+    def __getstate__(self) -> dict:
+        # Processus d'export (_run_parallel) : jamais de PDF, et ni le service
+        # de rendu ni le pool d'arrière-plan (threads, files) ne se sérialisent
+        state = self.__dict__.copy()
+        state["pdf_renderer"] = None
+        state["_pdf_pool"] = None
+        del state["_pdf_pool_lock"]
+        return state
+    
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._pdf_pool_lock = threading.Lock()
+    
     def notes_to_music21(
         self,
         quantized_notes: List[QuantizedNote],
         bpm: float,
-        rest_threshold: float = 0.25
+        rest_threshold: float = 0.25,
+        tempo_map: Optional[TempoMap] = None,
+        grid_step: Optional[Fraction] = None
     ) -> music21.stream.Score:
         """
         Convertit notes quantifiées en objet music21 Score.
         
+        La notation est finalisée ici, une fois : notes découpées et liées
+        aux barres de mesure, écarts et fin de dernière mesure complétés,
+        altérations, ligatures et crochets de n-olets. Les exports écrivent
+        ensuite sans makeNotation (voir export_musicxml, export_midi).
+        
         Args:
             quantized_notes: Liste de notes quantifiées.
-            bpm: Tempo en BPM.
-            rest_threshold: Seuil minimum (en beats) pour insérer un silence (défaut: 0.25).
+            bpm: Tempo en BPM (beats de la signature, croche en 6/8), comme
+                pour MusicXMLWriter et MidiWriter.
+            rest_threshold: Seuil minimum (en beats) pour insérer un silence
+                visible (défaut: 0.25) ; écart plus court : silence masqué.
+            tempo_map: Carte de tempo variable (optionnel) ; une indication
+                métronomique est écrite en début de mesure à chaque changement
+                de tempo (TempoMap.tempo_changes moyenné par mesure).
+            grid_step: Pas de grille exact en beats (MusicalQuantizer.grid_fraction).
+                Positions et durées sont converties une fois pour toutes en
+                nombres entiers de pas ; chaque quarterLength / offset est lu
+                dans une table par pas, sans recherche de fraction par note.
+                None : pas déduit des valeurs distinctes des notes.
         
         Returns:
             music21.stream.Score avec partition complète.
         
         Raises:
-            ValueError: Si quantized_notes est vide.
+            ValueError: Si quantized_notes est vide ou sans note de durée non nulle.
         
         Example:
             >>> quantized, bpm = quantizer.quantize_notes(notes, bpm=120.0)
@@ -111,6 +320,7 @@ class ScoreGenerator:
         score.metadata = music21.metadata.Metadata()
         score.metadata.title = "Transcription"
         score.metadata.composer = "MusePartition"
+        score.metadata.software = [_SOFTWARE]
         
         # Configuration initiale de la première mesure
         first_measure = music21.stream.Measure(number=1)
@@ -134,81 +344,165 @@ class ScoreGenerator:
         time_sig = music21.meter.TimeSignature(f"{ts_parts[0]}/{ts_parts[1]}")
         first_measure.append(time_sig)
         
-        # Ajouter tempo
-        metronome = music21.tempo.MetronomeMark(number=bpm)
+        # Ajouter tempo (BPM en beats de la signature : croche en 6/8)
+        beats_per_measure = int(ts_parts[0])
+        beat_unit = int(ts_parts[1])
+        tempo_changes = []
+        if tempo_map is not None:
+            tempo_changes = tempo_map.tempo_changes(span=beats_per_measure)
+            bpm = tempo_changes.pop(0)[1]
+        metronome = music21.tempo.MetronomeMark(number=bpm, referent=4 / beat_unit)
         first_measure.append(metronome)
         
-        # Convertir notes quantifiées en notes music21
-        beats_per_measure = int(ts_parts[0])
-        current_measure = first_measure
-        current_measure_beat = 0.0
-        measure_number = 1
+        # Positions et durées en ticks entiers (arithmétique exacte)
+        tick, starts, lengths = beats_to_ticks(
+            [n.beat_position for n in quantized_notes],
+            [n.duration_beats for n in quantized_notes],
+            beats_per_measure,
+            grid_step
+        )
+        
+        # quarterLength d'un nombre de ticks (1 beat = 4 / beat_unit noires)
+        quarter_lengths = _quarter_length_table(tick * 4 / beat_unit)
+        measure_ticks = int(beats_per_measure / tick)
+        rest_ticks = rest_threshold / tick
         
         # Tri des notes par position (sécurité)
-        sorted_notes = sorted(quantized_notes, key=lambda n: n.beat_position)
-        
-        # Position de fin de dernière note traitée
-        last_note_end = 0.0
-        
-        for qnote in sorted_notes:
-            # Vérifier s'il faut insérer un silence avant cette note
-            gap = qnote.beat_position - last_note_end
-            if gap >= rest_threshold:
-                # Créer silence pour le gap
-                beat_unit = int(ts_parts[1])
-                rest_quarter_length = gap * (4.0 / beat_unit)
-                rest = music21.note.Rest(quarterLength=rest_quarter_length)
-                
-                # Gérer changement de mesure si nécessaire pour le silence
-                while last_note_end >= (measure_number * beats_per_measure):
-                    part.append(current_measure)
-                    measure_number += 1
-                    current_measure = music21.stream.Measure(number=measure_number)
-                    current_measure_beat = (measure_number - 1) * beats_per_measure
-                
-                offset_in_measure = last_note_end - current_measure_beat
-                offset_quarter = offset_in_measure * (4.0 / beat_unit)
-                current_measure.insert(offset_quarter, rest)
-            
-            # Vérifier si on doit créer nouvelle mesure pour la note
-            while qnote.beat_position >= (measure_number * beats_per_measure):
-                # Finaliser mesure courante
-                part.append(current_measure)
-                
-                # Créer nouvelle mesure
-                measure_number += 1
-                current_measure = music21.stream.Measure(number=measure_number)
-                current_measure_beat = (measure_number - 1) * beats_per_measure
-            
-            # Créer note music21
-            pitch = music21.pitch.Pitch(midi=qnote.midi_note)
-            
-            # Calculer durée en quarterLength (noires)
-            # 1 beat = 1 quarterLength en 4/4
-            # En 6/8, 1 beat (croche) = 0.5 quarterLength
-            beat_unit = int(ts_parts[1])
-            quarter_length = qnote.duration_beats * (4.0 / beat_unit)
-            
-            note = music21.note.Note(pitch, quarterLength=quarter_length)
-            
-            # Calculer offset dans la mesure
-            offset_in_measure = qnote.beat_position - current_measure_beat
-            offset_quarter = offset_in_measure * (4.0 / beat_unit)
-            
-            current_measure.insert(offset_quarter, note)
-            
-            # Mettre à jour position de fin pour prochaine itération
-            last_note_end = qnote.beat_position + qnote.duration_beats
+        order = np.argsort(starts, kind="stable")
+        
+        # Monophonie (comme MusicXMLWriter) : notes de durée nulle ignorées,
+        # deux notes au même début → la première est gardée
+        order = order[lengths[order] > 0]
+        if len(order) == 0:
+            raise ValueError("Aucune note de durée non nulle")
+        order = order[np.concatenate(([True], np.diff(starts[order]) != 0))]
+        starts, lengths = starts[order], lengths[order]
+        midi_notes = [quantized_notes[i].midi_note for i in order.tolist()]
+        
+        # Monophonie : une note qui chevauche la suivante est tronquée
+        # (comme MusicXMLWriter), les morceaux restent dans l'ordre des offsets
+        lengths = np.minimum(lengths, np.append(starts[1:] - starts[:-1], lengths[-1]))
+        
+        # Silence avant une note si l'écart depuis la fin de la précédente
+        # atteint le seuil ; il commence à cette fin (déjà triée avant la note).
+        # Écart plus court : silence masqué (comme makeRests à l'export)
+        previous_ends = np.concatenate(([0], starts[:-1] + lengths[:-1]))
+        gaps = starts - previous_ends
+        has_rest = gaps > 0
+        
+        # Éléments (silences et notes) dans l'ordre des offsets
+        n_elements = len(starts) + int(has_rest.sum())
+        note_slots = np.arange(len(starts)) + np.cumsum(has_rest)
+        rest_slots = note_slots[has_rest] - 1
+        element_starts = np.empty(n_elements, dtype=np.int64)
+        element_lengths = np.empty(n_elements, dtype=np.int64)
+        element_starts[note_slots] = starts
+        element_lengths[note_slots] = lengths
+        element_starts[rest_slots] = previous_ends[has_rest]
+        element_lengths[rest_slots] = gaps[has_rest]
+        element_hidden = np.zeros(n_elements, dtype=bool)
+        element_hidden[rest_slots] = gaps[has_rest] < rest_ticks
+        element_midi = [None] * n_elements
+        for slot, midi in zip(note_slots.tolist(), midi_notes):
+            element_midi[slot] = midi
+        
+        # Découpe aux barres de mesure : un morceau par mesure traversée,
+        # liés (start / continue / stop) pour les notes
+        element_ends = element_starts + element_lengths
+        first_measures = element_starts // measure_ticks
+        pieces = np.maximum((element_ends - 1) // measure_ticks - first_measures + 1, 1)
+        piece_elements = np.repeat(np.arange(n_elements), pieces)
+        piece_ranks = np.arange(len(piece_elements)) - np.repeat(np.cumsum(pieces) - pieces, pieces)
+        piece_measures = first_measures[piece_elements] + piece_ranks
+        piece_starts = np.maximum(element_starts[piece_elements], piece_measures * measure_ticks)
+        piece_ends = np.minimum(element_ends[piece_elements], (piece_measures + 1) * measure_ticks)
+        piece_ties = np.where(
+            pieces[piece_elements] == 1, None,
+            np.where(piece_ranks == 0, "start",
+                     np.where(piece_ranks == pieces[piece_elements] - 1, "stop", "continue"))
+        )
+        
+        # Dernière mesure complétée par un silence masqué, comme le faisait
+        # makeNotation à l'export : fichiers inchangés sans makeNotation
+        n_measures = int(piece_measures[-1]) + 1
+        padding = n_measures * measure_ticks - int(piece_ends.max())
+        piece_offsets = piece_starts.tolist()
+        piece_lengths = (piece_ends - piece_starts).tolist()
+        piece_elements = piece_elements.tolist()
+        piece_ties = piece_ties.tolist()
+        piece_hidden = element_hidden[piece_elements].tolist()
+        piece_midi = [element_midi[i] for i in piece_elements]
+        if padding > 0:
+            piece_offsets.append(n_measures * measure_ticks - padding)
+            piece_lengths.append(padding)
+            piece_ties.append(None)
+            piece_hidden.append(True)
+            piece_midi.append(None)
+        
+        # Bornes de chaque mesure dans la liste des morceaux, en une recherche
+        measure_starts = np.arange(n_measures + 1, dtype=np.int64) * measure_ticks
+        bounds = np.searchsorted(piece_offsets, measure_starts, side="left").tolist()
+        
+        # Mesures construites hors du Part, éléments ajoutés dans l'ordre
+        # (coreInsert, un seul coreElementsChanged par mesure) puis placées
+        # à leur offset exact : pas de retri ni d'invalidation de cache par note
+        measures = [first_measure] + [
+            music21.stream.Measure(number=number) for number in range(2, n_measures + 1)
+        ]
+        for index, measure in enumerate(measures):
+            measure_start = index * measure_ticks
+            for i in range(bounds[index], bounds[index + 1]):
+                # Durée et offset en quarterLength (noires), lus dans la table :
+                # 1 beat = 1 quarterLength en 4/4, 0.5 en 6/8
+                if piece_midi[i] is None:
+                    element = music21.note.Rest(quarterLength=quarter_lengths[piece_lengths[i]])
+                    element.style.hideObjectOnPrint = piece_hidden[i]
+                else:
+                    element = music21.note.Note(
+                        music21.pitch.Pitch(midi=piece_midi[i]),
+                        quarterLength=quarter_lengths[piece_lengths[i]]
+                    )
+                    if piece_ties[i] is not None:
+                        element.tie = music21.tie.Tie(piece_ties[i])
+                offset = quarter_lengths[piece_offsets[i] - measure_start]
+                if element.duration.type == "complex":
+                    # Durée non représentable par une seule figure (ex. 1.25) :
+                    # figures liées, comme splitAtDurations à l'export
+                    for component in element.splitAtDurations():
+                        measure.coreInsert(offset, component)
+                        offset = music21.common.opFrac(offset + component.quarterLength)
+                else:
+                    measure.coreInsert(offset, element)
+            measure.coreElementsChanged()
         
-        # Ajouter dernière mesure
-        part.append(current_measure)
+        # Changements de tempo (toujours en début de mesure)
+        for beat, change_bpm in tempo_changes:
+            index = int(beat // beats_per_measure)
+            if index < n_measures:
+                measures[index].insert(
+                    0.0, music21.tempo.MetronomeMark(number=change_bpm, referent=4 / beat_unit)
+                )
+        
+        for index, measure in enumerate(measures):
+            part.coreInsert(quarter_lengths[index * measure_ticks], measure)
+        part.coreElementsChanged()
+        
+        # Notation finalisée une fois pour toutes (altérations, ligatures,
+        # crochets de n-olets) : les exports écrivent sans makeNotation
+        part.makeAccidentals(inPlace=True)
+        for measure in measures:
+            _beam_measure(measure, time_sig, first_measure.clef)
+            music21.stream.makeNotation.makeTupletBrackets(measure, inPlace=True)
+        part.streamStatus.accidentals = True
+        part.streamStatus.beams = True
         
         # Ajouter part au score
         score.append(part)
         
         self.tracer.log_step("conversion_complete", {
-            "measures": measure_number,
-            "notes_converted": len(quantized_notes)
+            "measures": n_measures,
+            "notes_converted": len(quantized_notes),
+            "tempo_changes": len(tempo_changes)
         })
         
         return score
@@ -221,9 +515,16 @@ class ScoreGenerator:
         """
         Exporte la partition en MusicXML.
         
+        Un Score issu de notes_to_music21 (mesures, liaisons, altérations et
+        ligatures déjà faites) est écrit sans makeNotation : ni copie du
+        Score ni nouveau passage de notation.
+        
+        Extension .mxl : MusicXML compressé, sérialisé en mémoire puis écrit
+        directement dans l'archive (voir open_mxl).
+        
         Args:
             score: Partition music21.
-            output_path: Chemin du fichier de sortie (.xml ou .musicxml).
+            output_path: Chemin du fichier de sortie (.xml, .musicxml ou .mxl).
         
         Returns:
             Path du fichier créé.
@@ -234,11 +535,20 @@ class ScoreGenerator:
         output_path = Path(output_path)
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
+        make_notation = not _is_notated(score)
+        
         self.tracer.log_step("export_musicxml_start", {
-            "output_path": str(output_path)
+            "output_path": str(output_path),
+            "make_notation": make_notation
         })
         
-        score.write('musicxml', fp=str(output_path))
+        if output_path.suffix == ".mxl":
+            exporter = music21.musicxml.m21ToXml.GeneralObjectExporter(score)
+            exporter.makeNotation = make_notation
+            with open_mxl(str(output_path), f"{output_path.stem}.musicxml") as entry:
+                entry.write(exporter.parse())
+        else:
+            score.write('musicxml', fp=str(output_path), makeNotation=make_notation)
         
         self.tracer.log_step("export_musicxml_complete", {
             "file_size": output_path.stat().st_size
@@ -246,6 +556,133 @@ class ScoreGenerator:
         
         return output_path
     
+    def write_musicxml(
+        self,
+        quantized_notes: List[QuantizedNote],
+        bpm: float,
+        output_path: str,
+        title: str = "Transcription",
+        composer: str = "MusePartition",
+        tempo_map: Optional[TempoMap] = None,
+        grid_step: Optional[Fraction] = None
+    ) -> Path:
+        """
+        Écrit la partition en MusicXML sans passer par music21 (MusicXMLWriter).
+        
+        Même contenu que notes_to_music21 + export_musicxml, écrit mesure par
+        mesure : pas de Score en mémoire. Extension .mxl : chaque mesure est
+        compressée au fil de l'eau dans l'archive (voir open_mxl).
+        
+        Args:
+            quantized_notes: Notes quantifiées.
+            bpm: Tempo en BPM.
+            output_path: Chemin du fichier de sortie (.xml, .musicxml ou .mxl).
+            title: Titre de la partition (défaut: "Transcription").
+            composer: Nom du compositeur (défaut: "MusePartition").
+            tempo_map: Carte de tempo variable (optionnel, voir notes_to_music21).
+            grid_step: Pas de grille exact en beats (optionnel, voir notes_to_music21).
+        
+        Returns:
+            Path du fichier créé.
+        
+        Raises:
+            ValueError: Si quantized_notes est vide ou tonalité invalide.
+        
+        Example:
+            >>> generator.write_musicxml(quantized, 120.0, "output/score.musicxml")
+        """
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        self.tracer.log_step("write_musicxml_start", {
+            "output_path": str(output_path),
+            "notes": len(quantized_notes)
+        })
+        
+        writer = MusicXMLWriter(
+            time_signature=self.time_signature,
+            key_signature=self.key_signature,
+            clef=self.clef,
+            instrument_name=self.instrument_name
+        )
+        with ExitStack() as stack:
+            if output_path.suffix == ".mxl":
+                entry = stack.enter_context(open_mxl(str(output_path), f"{output_path.stem}.musicxml"))
+                fp = stack.enter_context(io.TextIOWrapper(entry, encoding="utf-8"))
+            else:
+                fp = stack.enter_context(open(output_path, "w", encoding="utf-8"))
+            measures = writer.write(
+                fp, quantized_notes, bpm,
+                title=title,
+                composer=composer,
+                tempo_map=tempo_map,
+                grid_step=grid_step
+            )
+        
+        self.tracer.log_step("write_musicxml_complete", {
+            "measures": measures,
+            "file_size": output_path.stat().st_size
+        })
+        
+        return output_path
+    
+    def write_midi(
+        self,
+        quantized_notes: List[QuantizedNote],
+        bpm: float,
+        output_path: str,
+        tempo_map: Optional[TempoMap] = None,
+        grid_step: Optional[Fraction] = None,
+        midi_format: int = 1
+    ) -> Path:
+        """
+        Écrit la partition en MIDI sans passer par music21 (MidiWriter).
+        
+        Args:
+            quantized_notes: Notes quantifiées.
+            bpm: Tempo en BPM.
+            output_path: Chemin du fichier de sortie (.mid ou .midi).
+            tempo_map: Carte de tempo variable (optionnel, voir notes_to_music21).
+            grid_step: Pas de grille exact en beats (optionnel, voir notes_to_music21).
+            midi_format: Type SMF, 0 (une piste) ou 1 (défaut: 1).
+        
+        Returns:
+            Path du fichier créé.
+        
+        Raises:
+            ValueError: Si quantized_notes est vide, tonalité ou format invalide.
+        
+        Example:
+            >>> generator.write_midi(quantized, 120.0, "output/score.mid")
+        """
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        self.tracer.log_step("write_midi_start", {
+            "output_path": str(output_path),
+            "notes": len(quantized_notes),
+            "midi_format": midi_format
+        })
+        
+        writer = MidiWriter(
+            time_signature=self.time_signature,
+            key_signature=self.key_signature,
+            instrument_name=self.instrument_name
+        )
+        with open(output_path, "wb") as fp:
+            size = writer.write(
+                fp, quantized_notes, bpm,
+                tempo_map=tempo_map,
+                grid_step=grid_step,
+                midi_format=midi_format
+            )
+        
+        self.tracer.log_step("write_midi_complete", {
+            "file_size": size
+        })
+        
+        return output_path
+    
     def export_pdf(
         self,
         score: music21.stream.Score,
@@ -254,6 +691,11 @@ class ScoreGenerator:
         """
         Exporte la partition en PDF via MuseScore.
         
+        Avec un service de rendu (pdf_renderer), le rendu passe par sa file
+        (voir submit_pdf) et cet appel attend son résultat. Avec un cache
+        (pdf_cache), le MusicXML est écrit d'abord : s'il a déjà été rendu,
+        le PDF est copié depuis le cache, sinon il est rendu puis ajouté.
+        
         Args:
             score: Partition music21.
             output_path: Chemin du fichier de sortie (.pdf).
@@ -279,10 +721,33 @@ class ScoreGenerator:
         })
         
         try:
-            score.write('musicxml.pdf', fp=str(output_path))
+            if self.pdf_renderer is not None:
+                self.submit_pdf(score, str(output_path)).result()
+            elif self.pdf_cache is not None:
+                with tempfile.TemporaryDirectory() as render_dir:
+                    musicxml_path = self.export_musicxml(
+                        score, str(Path(render_dir) / f"{output_path.stem}.musicxml")
+                    )
+                    key = self._pdf_cache_key(musicxml_path)
+                    if self.pdf_cache.fetch(key, output_path) is None:
+                        rendered = runThroughMuseScore(musicxml_path, ["pdf"])
+                        shutil.move(str(rendered), str(output_path))
+                        self._store_pdf(key, output_path)
+            else:
+                # Rendu en répertoire temporaire : le .musicxml intermédiaire de
+                # music21 n'écrase pas celui d'un export MusicXML concurrent
+                with tempfile.TemporaryDirectory() as render_dir:
+                    rendered = Path(score.write(
+                        'musicxml.pdf',
+                        fp=str(Path(render_dir) / output_path.name),
+                        makeNotation=not _is_notated(score)
+                    ))
+                    if rendered.suffix != ".pdf":
+                        raise RuntimeError("MuseScore désactivé (musescoreDirectPNGPath)")
+                    shutil.move(str(rendered), str(output_path))
             
             self.tracer.log_step("export_pdf_complete", {
-                "file_size": output_path.stat().st_size if output_path.exists() else 0
+                "file_size": output_path.stat().st_size
             })
             
             return output_path
@@ -291,6 +756,86 @@ class ScoreGenerator:
                 f"Échec export PDF. MuseScore installé et configuré ? Erreur: {e}"
             )
     
+    def submit_pdf(
+        self,
+        score: music21.stream.Score,
+        output_path: str
+    ) -> "Future[Path]":
+        """
+        Rendu PDF asynchrone.
+        
+        Avec un service de rendu (pdf_renderer), le MusicXML est écrit dans
+        un répertoire temporaire puis mis en file ; le répertoire est
+        supprimé une fois le rendu terminé. Un PDF trouvé dans pdf_cache
+        donne une Future déjà résolue, un PDF rendu y est ajouté. Sans
+        service, export_pdf est exécuté immédiatement et la Future renvoyée
+        est déjà résolue.
+        
+        Args:
+            score: Partition music21.
+            output_path: Chemin du fichier de sortie (.pdf).
+        
+        Returns:
+            Future résolue avec le Path du PDF, ou en échec (RuntimeError).
+        
+        Example:
+            >>> with PdfRenderer() as renderer:
+            ...     generator = ScoreGenerator(pdf_renderer=renderer)
+            ...     future = generator.submit_pdf(score, "output/score.pdf")
+            ...     pdf_path = future.result()
+        """
+        if self.pdf_renderer is None:
+            future = Future()
+            try:
+                future.set_result(self.export_pdf(score, output_path))
+            except RuntimeError as e:
+                future.set_exception(e)
+            return future
+        
+        render_dir = tempfile.TemporaryDirectory()
+        try:
+            musicxml_path = self.export_musicxml(
+                score, str(Path(render_dir.name) / f"{Path(output_path).stem}.musicxml")
+            )
+            key = self._pdf_cache_key(musicxml_path)
+            cached = self.pdf_cache.fetch(key, output_path) if key is not None else None
+            if cached is not None:
+                render_dir.cleanup()
+                future = Future()
+                future.set_result(cached.resolve())
+                return future
+            future = self.pdf_renderer.submit(str(musicxml_path), output_path)
+        except Exception:
+            render_dir.cleanup()
+            raise
+        
+        def finish(done: Future) -> None:
+            render_dir.cleanup()
+            if key is not None and not done.cancelled() and done.exception() is None:
+                self._store_pdf(key, done.result())
+        
+        future.add_done_callback(finish)
+        return future
+    
+    def _pdf_cache_key(self, musicxml_path: Path) -> Optional[str]:
+        """Clé pdf_cache d'un MusicXML pour le moteur de rendu courant (None sans cache)."""
+        if self.pdf_cache is None:
+            return None
+        if self.pdf_renderer is not None:
+            command = self.pdf_renderer.command
+        else:
+            command = musescore_command()
+        return self.pdf_cache.key(str(musicxml_path), renderer_version(tuple(command)))
+    
+    def _store_pdf(self, key: str, pdf_path: Path) -> None:
+        """Ajoute un PDF rendu à pdf_cache ; un échec du cache n'affecte pas l'export."""
+        try:
+            self.pdf_cache.store(key, str(pdf_path))
+        except OSError as e:
+            self.tracer.log_step("pdf_cache_store_failed", {
+                "reason": str(e)
+            })
+    
     def export_midi(
         self,
         score: music21.stream.Score,
@@ -299,6 +844,10 @@ class ScoreGenerator:
         """
         Exporte la partition en MIDI.
         
+        Un Score issu de notes_to_music21 est relu mesure par mesure (notes
+        liées fusionnées) et encodé par MidiWriter : ni copie du Score, ni
+        retrait des liaisons, ni répartition des canaux par music21.
+        
         Args:
             score: Partition music21.
             output_path: Chemin du fichier de sortie (.mid ou .midi).
@@ -312,11 +861,25 @@ class ScoreGenerator:
         output_path = Path(output_path)
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
+        metadata = score.metadata
+        direct = (
+            metadata is not None
+            and _SOFTWARE in metadata.software
+            and len(score.parts) == 1
+            and _is_notated(score)
+        )
+        
         self.tracer.log_step("export_midi_start", {
-            "output_path": str(output_path)
+            "output_path": str(output_path),
+            "direct": direct
         })
         
-        score.write('midi', fp=str(output_path))
+        if direct:
+            writer, starts, lengths, midi_notes, tempo_changes = _midi_events(score.parts[0])
+            with open(output_path, "wb") as fp:
+                writer.write_ticks(fp, starts, lengths, midi_notes, tempo_changes)
+        else:
+            score.write('midi', fp=str(output_path))
         
         self.tracer.log_step("export_midi_complete", {
             "file_size": output_path.stat().st_size
@@ -324,6 +887,53 @@ class ScoreGenerator:
         
         return output_path
     
+    def export_plan(
+        self,
+        formats: Iterable[str],
+        output_dir: str = "output",
+        base_filename: str = "score"
+    ) -> List[ExportStep]:
+        """
+        Plan d'export des formats demandés, dans l'ordre d'exécution.
+        
+        Un format absent n'a pas d'étape (pas de sérialisation, pas de
+        MuseScore). uses_score indique les étapes qui lisent le Score
+        music21 : PDF toujours, MusicXML / MIDI seulement avec le moteur
+        "music21" ; sans elles, le Score n'est pas construit. Les étapes
+        sont indépendantes (fichiers distincts) et peuvent s'exécuter en
+        parallèle.
+        
+        Args:
+            formats: Formats parmi "musicxml", "mxl", "midi", "pdf".
+            output_dir: Répertoire de sortie (défaut: "output").
+            base_filename: Nom de base des fichiers (défaut: "score").
+        
+        Returns:
+            Liste d'ExportStep.
+        
+        Raises:
+            ValueError: Si format invalide.
+        
+        Example:
+            >>> [step.format for step in generator.export_plan(["pdf", "midi"])]
+            ['midi', 'pdf']
+        """
+        formats = set(formats)
+        invalid = formats - set(VALID_FORMATS)
+        if invalid:
+            raise ValueError(f"Formats invalides: {invalid}. Valides: {set(VALID_FORMATS)}")
+        
+        output_dir = Path(output_dir)
+        return [
+            ExportStep(
+                format=fmt,
+                path=output_dir / f"{base_filename}{extension}",
+                uses_score=fmt == "pdf" or self.engine == "music21"
+            )
+            for fmt, extension in VALID_FORMATS.items()
+            if fmt in formats
+        ]
+    
     def generate_score(
         self,
         quantized_notes: List[QuantizedNote],
@@ -331,10 +941,15 @@ class ScoreGenerator:
         output_dir: str = "output",
         base_filename: str = "score",
         title: str = "Transcription",
-        composer: str = "MusePartition"
+        composer: str = "MusePartition",
+        tempo_map: Optional[TempoMap] = None,
+        grid_step: Optional[Fraction] = None,
+        formats: Optional[Iterable[str]] = None,
+        parallel: bool = False,
+        defer_pdf: bool = False
     ) -> dict:
         """
-        Génère partition complète avec exports MusicXML, MIDI et PDF (optionnel).
+        Génère la partition dans les formats demandés (MusicXML, MXL, MIDI, PDF).
         
         Args:
             quantized_notes: Notes quantifiées.
@@ -343,15 +958,32 @@ class ScoreGenerator:
             base_filename: Nom de base des fichiers (défaut: "score").
             title: Titre de la partition (défaut: "Transcription").
             composer: Nom du compositeur (défaut: "MusePartition").
+            tempo_map: Carte de tempo variable (optionnel, voir notes_to_music21).
+            grid_step: Pas de grille exact en beats (optionnel, voir notes_to_music21).
+            formats: Formats à exporter (défaut: None = DEFAULT_FORMATS : MusicXML,
+                MIDI, PDF), voir export_plan.
+            parallel: Exporte les formats simultanément (défaut: False), voir
+                _run_parallel : un Score par processus music21 (plus un pour
+                le PDF), contre un seul Score en séquentiel.
+            defer_pdf: Rend le PDF en arrière-plan (défaut: False) : retour
+                dès MusicXML et MIDI écrits, PDF dans 'pdf_future'. Au plus
+                pdf_workers rendus simultanés, les suivants attendent.
         
         Returns:
-            Dictionnaire avec chemins des fichiers générés:
+            Dictionnaire avec chemins des fichiers générés et durées par format:
             {
-                'musicxml': Path,
-                'midi': Path,
-                'pdf': Path ou None (si échec)
+                'musicxml': Path ou None (non demandé),
+                'mxl': Path ou None (non demandé),
+                'midi': Path ou None (non demandé),
+                'pdf': Path ou None (non demandé, échec ou différé),
+                'pdf_future': Future résolue avec le Path du PDF ou None
+                    (échec), None si PDF non demandé ou non différé,
+                'timings': {format: secondes} (formats demandés, PDF différé exclu)
             }
         
+        Raises:
+            ValueError: Si format invalide.
+        
         Example:
             >>> paths = generator.generate_score(
             ...     quantized_notes,
@@ -363,54 +995,190 @@ class ScoreGenerator:
             ... )
             >>> print(f"MusicXML: {paths['musicxml']}")
             >>> print(f"MIDI: {paths['midi']}")
+            >>> 
+            >>> # MIDI seul : ni MusicXML ni MuseScore
+            >>> paths = generator.generate_score(quantized_notes, 120.0, formats=["midi"])
+            >>> 
+            >>> # PDF en arrière-plan
+            >>> paths = generator.generate_score(quantized_notes, 120.0, defer_pdf=True)
+            >>> pdf_path = paths['pdf_future'].result()
         """
+        plan = self.export_plan(
+            DEFAULT_FORMATS if formats is None else formats, output_dir, base_filename
+        )
+        job = ScoreJob(tuple(quantized_notes), bpm, title, composer, tempo_map, grid_step)
+        
+        deferred = [step for step in plan if defer_pdf and step.format == "pdf"]
+        plan = [step for step in plan if step not in deferred]
+        
         self.tracer.log_step("generate_score_start", {
             "notes": len(quantized_notes),
             "bpm": bpm,
-            "output_dir": output_dir
+            "output_dir": output_dir,
+            "formats": [step.format for step in plan],
+            "parallel": parallel and len(plan) > 1,
+            "deferred": [step.format for step in deferred]
         })
         
-        # Créer score
-        score = self.notes_to_music21(quantized_notes, bpm)
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
         
-        # Mettre à jour metadata
-        score.metadata.title = title
-        score.metadata.composer = composer
+        if parallel and len(plan) > 1:
+            results = self._run_parallel(plan, job)
+        else:
+            # Séquentiel : un seul Score, construit seulement si une étape le lit
+            score = self.build_score(job) if any(step.uses_score for step in plan) else None
+            results = [self.run_export(step, job, score) for step in plan]
         
-        # Exports
-        output_dir = Path(output_dir)
-        output_dir.mkdir(parents=True, exist_ok=True)
+        paths = {fmt: None for fmt in VALID_FORMATS}
+        paths['pdf_future'] = None
+        timings = {}
+        for step, (path, seconds) in zip(plan, results):
+            paths[step.format] = path
+            timings[step.format] = seconds
+        paths['timings'] = timings
         
-        paths = {}
+        # PDF différé : soumis après les formats rapides, qu'il ne ralentit pas
+        for step in deferred:
+            paths['pdf_future'] = self._submit_deferred(step, job)
         
-        # MusicXML (toujours)
-        paths['musicxml'] = self.export_musicxml(
-            score,
-            str(output_dir / f"{base_filename}.musicxml")
-        )
+        self.tracer.log_step("generate_score_complete", {
+            "paths": {fmt: str(paths[fmt]) if paths[fmt] else "skipped" for fmt in VALID_FORMATS},
+            "timings_s": timings
+        })
         
-        # MIDI (toujours)
-        paths['midi'] = self.export_midi(
-            score,
-            str(output_dir / f"{base_filename}.mid")
-        )
+        return paths
+    
+    def _submit_deferred(self, step: ExportStep, job: ScoreJob) -> "Future[Optional[Path]]":
+        """Exécute une étape dans le pool d'arrière-plan (pdf_workers threads, créé au besoin)."""
+        with self._pdf_pool_lock:
+            if self._pdf_pool is None:
+                self._pdf_pool = ThreadPoolExecutor(
+                    max_workers=self.pdf_workers, thread_name_prefix="pdf-deferred"
+                )
         
-        # PDF (optionnel, peut échouer si MuseScore absent)
-        try:
-            paths['pdf'] = self.export_pdf(
-                score,
-                str(output_dir / f"{base_filename}.pdf")
-            )
-        except RuntimeError as e:
-            self.tracer.log_step("pdf_export_skipped", {
-                "reason": str(e)
+        def run() -> Optional[Path]:
+            path, seconds = self.run_export(step, job)
+            self.tracer.log_step("deferred_export_complete", {
+                "format": step.format,
+                "path": str(path) if path else "skipped",
+                "seconds": seconds
             })
-            paths['pdf'] = None
+            return path
         
-        self.tracer.log_step("generate_score_complete", {
-            "musicxml": str(paths['musicxml']),
-            "midi": str(paths['midi']),
-            "pdf": str(paths['pdf']) if paths['pdf'] else "skipped"
-        })
+        return self._pdf_pool.submit(run)
+    
+    def build_score(self, job: ScoreJob) -> music21.stream.Score:
+        """
+        Score music21 d'un job, métadonnées comprises.
         
-        return paths
+        Args:
+            job: Entrées de la génération.
+        
+        Returns:
+            music21.stream.Score.
+        """
+        score = self.notes_to_music21(
+            list(job.quantized_notes), job.bpm, tempo_map=job.tempo_map, grid_step=job.grid_step
+        )
+        score.metadata.title = job.title
+        score.metadata.composer = job.composer
+        return score
+    
+    def run_export(
+        self,
+        step: ExportStep,
+        job: ScoreJob,
+        score: Optional[music21.stream.Score] = None
+    ) -> Tuple[Optional[Path], float]:
+        """
+        Exécute une étape du plan d'export.
+        
+        Args:
+            step: Étape (voir export_plan).
+            job: Entrées de la génération.
+            score: Score music21 déjà construit (optionnel) ; construit ici
+                si l'étape le lit et qu'il n'est pas fourni.
+        
+        Returns:
+            (chemin du fichier ou None si échec PDF, durée de l'étape en secondes,
+            construction du Score comprise).
+        """
+        start = time.perf_counter()
+        
+        if step.uses_score and score is None:
+            score = self.build_score(job)
+        
+        path = None
+        if step.format == "pdf":
+            # PDF (peut échouer si MuseScore absent)
+            try:
+                path = self.export_pdf(score, str(step.path))
+            except RuntimeError as e:
+                self.tracer.log_step("pdf_export_skipped", {
+                    "reason": str(e)
+                })
+        elif step.format in ("musicxml", "mxl"):
+            if step.uses_score:
+                path = self.export_musicxml(score, str(step.path))
+            else:
+                path = self.write_musicxml(
+                    job.quantized_notes, job.bpm, str(step.path),
+                    title=job.title,
+                    composer=job.composer,
+                    tempo_map=job.tempo_map,
+                    grid_step=job.grid_step
+                )
+        elif step.format == "midi":
+            if step.uses_score:
+                path = self.export_midi(score, str(step.path))
+            else:
+                path = self.write_midi(
+                    job.quantized_notes, job.bpm, str(step.path),
+                    tempo_map=job.tempo_map,
+                    grid_step=job.grid_step
+                )
+        
+        return path, time.perf_counter() - start
+    
+    def _run_parallel(
+        self,
+        plan: List[ExportStep],
+        job: ScoreJob
+    ) -> List[Tuple[Optional[Path], float]]:
+        """
+        Exécute les étapes du plan simultanément.
+        
+        Sérialiseurs music21 (CPU, GIL) : un processus chacun, qui reconstruit
+        son Score depuis le job (notes immuables, picklées à bas coût) plutôt
+        que de recevoir un Score music21 sérialisé. PDF (sous-processus
+        MuseScore) et writers natifs (écriture fichier, quelques ms) : threads.
+        Durée totale ≈ étape la plus lente. Sur un seul CPU, les sérialiseurs
+        music21 s'exécutent à la suite dans le thread appelant (un seul Score),
+        pendant que les threads avancent.
+        
+        Les processus (fork) sont lancés au premier submit, donc avant les
+        threads du plan : aucun verrou tenu par ces threads n'est copié dans
+        un processus fils.
+        """
+        in_process = [step for step in plan if step.uses_score and step.format != "pdf"]
+        in_thread = [step for step in plan if step not in in_process]
+        use_processes = len(in_process) > 1 and (os.cpu_count() or 1) > 1
+        
+        futures = {}
+        results = {}
+        with ExitStack() as stack:
+            if use_processes:
+                processes = stack.enter_context(ProcessPoolExecutor(max_workers=len(in_process)))
+                for step in in_process:
+                    futures[step] = processes.submit(self.run_export, step, job)
+            threads = stack.enter_context(ThreadPoolExecutor(max_workers=max(1, len(in_thread))))
+            for step in in_thread:
+                futures[step] = threads.submit(self.run_export, step, job)
+            if in_process and not use_processes:
+                score = self.build_score(job)
+                for step in in_process:
+                    results[step] = self.run_export(step, job, score)
+            for step, future in futures.items():
+                results[step] = future.result()
+        
+        return [results[step] for step in plan]
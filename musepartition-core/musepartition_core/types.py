@@ -3,7 +3,10 @@ MusePartition - Custom Types
 Defines data structures used throughout the pipeline
 """
 
-from typing import NamedTuple
+from concurrent.futures import Future
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
 
 
 class PitchFrame(NamedTuple):
@@ -48,17 +51,240 @@ class QuantizedNote(NamedTuple):
     duration_beats: float
 
 
+# Dtypes des tableaux structurés (une ligne = un Note / QuantizedNote)
+NOTE_DTYPE = np.dtype([
+    ("midi_note", np.int64),
+    ("start_time", np.float64),
+    ("duration", np.float64),
+])
+
+QUANTIZED_NOTE_DTYPE = np.dtype([
+    ("midi_note", np.int64),
+    ("beat_position", np.float64),
+    ("duration_beats", np.float64),
+])
+
+
+class _StructuredNotes:
+    """
+    Base of the columnar note containers.
+    
+    Wraps a 1D NumPy structured array whose fields mirror a NamedTuple.
+    Slicing returns views (zero-copy), fields are exposed as column views,
+    and the raw buffer can be shipped between processes as bytes.
+    """
+    
+    dtype: np.dtype
+    record: type
+    
+    def __init__(self, data: np.ndarray):
+        """
+        Args:
+            data: 1D structured array of dtype `self.dtype` (not copied).
+        
+        Raises:
+            ValueError: If data has the wrong dtype or shape.
+        """
+        if not isinstance(data, np.ndarray) or data.dtype != self.dtype or data.ndim != 1:
+            raise ValueError(f"{type(self).__name__} attend un tableau 1D de dtype {self.dtype}")
+        self.data = data
+    
+    @classmethod
+    def empty(cls, size: int = 0):
+        """Container of `size` zero-initialized notes."""
+        return cls(np.zeros(size, dtype=cls.dtype))
+    
+    @classmethod
+    def from_fields(cls, *columns):
+        """Build from one array per field, in dtype order."""
+        data = np.empty(len(columns[0]) if columns else 0, dtype=cls.dtype)
+        for name, column in zip(cls.dtype.names, columns, strict=True):
+            data[name] = column
+        return cls(data)
+    
+    @classmethod
+    def from_list(cls, records: Iterable):
+        """Build from a list of NamedTuples (or plain tuples)."""
+        records = list(records)
+        return cls(np.fromiter(records, dtype=cls.dtype, count=len(records)))
+    
+    @classmethod
+    def frombuffer(cls, buffer: bytes):
+        """Rebuild from `tobytes()` output (read-only view of buffer)."""
+        return cls(np.frombuffer(buffer, dtype=cls.dtype))
+    
+    def tobytes(self) -> bytes:
+        """Raw buffer, for inter-process transfer."""
+        return self.data.tobytes()
+    
+    def to_list(self) -> list:
+        """Convert back to a list of NamedTuples (Python int/float fields)."""
+        return list(map(self.record, *(self.data[name].tolist() for name in self.dtype.names)))
+    
+    def __len__(self) -> int:
+        return self.data.size
+    
+    def __iter__(self) -> Iterator:
+        return iter(self.to_list())
+    
+    def __getitem__(self, key):
+        """Integer → NamedTuple ; slice / mask / indices → container (slices are views)."""
+        if isinstance(key, (int, np.integer)):
+            return self.record(*self.data[key].tolist())
+        return type(self)(self.data[key])
+    
+    def __eq__(self, other) -> bool:
+        if isinstance(other, type(self)):
+            return bool(np.array_equal(self.data, other.data))
+        return NotImplemented
+    
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({len(self)} notes)"
+
+
+class NoteArray(_StructuredNotes):
+    """
+    Columnar container of Note (structured array backed).
+    
+    Example:
+        >>> notes = NoteArray.from_list(note_list)
+        >>> long_notes = notes[notes.duration > 0.5]
+        >>> notes.start_time + notes.duration  # vectorized
+        >>> note_list == notes.to_list()
+        True
+    """
+    
+    dtype = NOTE_DTYPE
+    record = Note
+    
+    @property
+    def midi_note(self) -> np.ndarray:
+        """MIDI note numbers (column view)."""
+        return self.data["midi_note"]
+    
+    @property
+    def start_time(self) -> np.ndarray:
+        """Onset times in seconds (column view)."""
+        return self.data["start_time"]
+    
+    @property
+    def duration(self) -> np.ndarray:
+        """Durations in seconds (column view)."""
+        return self.data["duration"]
+
+
+class QuantizedNoteArray(_StructuredNotes):
+    """
+    Columnar container of QuantizedNote (structured array backed).
+    
+    Example:
+        >>> quantized = QuantizedNoteArray.from_list(quantized_list)
+        >>> bars = quantized.beat_position // 4
+    """
+    
+    dtype = QUANTIZED_NOTE_DTYPE
+    record = QuantizedNote
+    
+    @property
+    def midi_note(self) -> np.ndarray:
+        """MIDI note numbers (column view)."""
+        return self.data["midi_note"]
+    
+    @property
+    def beat_position(self) -> np.ndarray:
+        """Positions in beats (column view)."""
+        return self.data["beat_position"]
+    
+    @property
+    def duration_beats(self) -> np.ndarray:
+        """Durations in beats (column view)."""
+        return self.data["duration_beats"]
+
+
+class TempoMap(NamedTuple):
+    """
+    Piecewise-linear mapping between seconds and beats (variable tempo).
+    
+    Attributes:
+        beat_times: Time in seconds of beats 0, 1, 2, ... (strictly increasing,
+            at least 2 entries). Outside this range the first / last beat
+            interval is extrapolated.
+    """
+    beat_times: np.ndarray
+    
+    @classmethod
+    def constant(cls, bpm: float, duration: float) -> "TempoMap":
+        """Map of a constant tempo covering [0, duration] seconds."""
+        period = 60.0 / bpm
+        return cls(np.arange(int(np.ceil(duration / period)) + 2) * period)
+    
+    def seconds_to_beats(self, times) -> np.ndarray:
+        """Vectorized seconds → beats (np.interp between tracked beats)."""
+        beat_times = self.beat_times
+        times = np.asarray(times, dtype=np.float64)
+        beats = np.interp(times, beat_times, np.arange(beat_times.size, dtype=np.float64))
+        first, last = beat_times[1] - beat_times[0], beat_times[-1] - beat_times[-2]
+        beats = np.where(times < beat_times[0], (times - beat_times[0]) / first, beats)
+        return np.where(
+            times > beat_times[-1], beat_times.size - 1 + (times - beat_times[-1]) / last, beats
+        )
+    
+    def beats_to_seconds(self, beats) -> np.ndarray:
+        """Vectorized beats → seconds (inverse of seconds_to_beats)."""
+        beat_times = self.beat_times
+        beats = np.asarray(beats, dtype=np.float64)
+        times = np.interp(beats, np.arange(beat_times.size, dtype=np.float64), beat_times)
+        first, last = beat_times[1] - beat_times[0], beat_times[-1] - beat_times[-2]
+        times = np.where(beats < 0, beat_times[0] + beats * first, times)
+        return np.where(
+            beats > beat_times.size - 1, beat_times[-1] + (beats - beat_times.size + 1) * last, times
+        )
+    
+    @property
+    def tempi(self) -> np.ndarray:
+        """Local tempo (BPM) of each beat interval."""
+        return 60.0 / np.diff(self.beat_times)
+    
+    @property
+    def bpm(self) -> float:
+        """Representative (median) tempo in BPM."""
+        return float(np.median(self.tempi))
+    
+    def tempo_changes(self, tolerance: float = 3.0, span: int = 4) -> List[Tuple[float, float]]:
+        """
+        Tempo marks to print: (beat_position, bpm) pairs.
+        
+        The tempo is averaged over consecutive spans of `span` beats (one 4/4
+        bar by default), which absorbs beat-tracking jitter. A new mark is
+        emitted at the start of a span when its tempo drifts more than
+        `tolerance` BPM away from the last emitted one; the first mark is at beat 0.
+        """
+        starts = np.arange(0, self.beat_times.size - 1, span)
+        ends = np.minimum(starts + span, self.beat_times.size - 1)
+        tempi = np.round(60.0 * (ends - starts) / (self.beat_times[ends] - self.beat_times[starts]), 1)
+        changes = [(0.0, float(tempi[0]))]
+        for beat, bpm in zip(starts.tolist(), tempi.tolist()):
+            if abs(bpm - changes[-1][1]) > tolerance:
+                changes.append((float(beat), bpm))
+        return changes
+
+
 class TranscriptionResult(NamedTuple):
     """
     Contains the results of a complete transcription.
     
     Attributes:
-        pdf_path: Path to generated PDF score
-        musicxml_path: Path to MusicXML file
-        midi_path: Path to MIDI file
+        pdf_path: Path to generated PDF score ("" if not requested or failed)
+        musicxml_path: Path to MusicXML file ("" if not requested)
+        midi_path: Path to MIDI file ("" if not requested)
         bpm: Detected or set tempo in BPM
         num_notes: Number of notes transcribed
         processing_time: Total processing time in seconds
+        tempo_map: Beat map when quantized with a variable tempo, else None
+        pdf_future: When PDF rendering is deferred (output.defer_pdf), a
+            Future resolving to the PDF Path, or None if rendering failed;
+            pdf_path is then "". None when the PDF is not deferred.
+        mxl_path: Path to compressed MusicXML (.mxl) file ("" if not requested)
     """
     pdf_path: str
     musicxml_path: str
@@ -66,6 +292,9 @@ class TranscriptionResult(NamedTuple):
     bpm: float
     num_notes: int
     processing_time: float
+    tempo_map: Optional[TempoMap] = None
+    pdf_future: Optional[Future] = None
+    mxl_path: str = ""
 
 
 class AudioLoadError(Exception):
@@ -1,5 +1,166 @@
-"""Stub Utils pour tests Pipeline"""
+"""
+MusePartition - Utils
+Tables de hauteur, formatage et résumés (DebugTracer/IntermediateStorage : stubs pour tests Pipeline)
+"""
+from fractions import Fraction
+from functools import lru_cache
+from itertools import chain
+from math import lcm
 from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from src.types import PitchFrame
+
+
+NOTE_NAMES = ["C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"]
+
+# Dénominateur maximal des fractions de beat (music21.defaults.limitOffsetDenominator)
+FRACTION_DENOMINATOR_LIMIT = 65535
+
+# Noms des 128 notes MIDI, calculés une fois ("C-1" ... "G9")
+MIDI_NOTE_NAMES = tuple(f"{NOTE_NAMES[m % 12]}{m // 12 - 1}" for m in range(128))
+_MIDI_NOTE_NAMES_ARRAY = np.array(MIDI_NOTE_NAMES, dtype=object)
+
+
+@lru_cache(maxsize=16)
+def midi_frequency_table(reference_frequency: float = 440.0) -> np.ndarray:
+    """
+    Table MIDI → fréquence (128 entrées) pour un diapason donné.
+
+    Args:
+        reference_frequency: Fréquence du La4 / MIDI 69 en Hz.
+
+    Returns:
+        Tableau en lecture seule, index = numéro MIDI.
+    """
+    table = reference_frequency * 2.0 ** ((np.arange(128) - 69) / 12.0)
+    table.setflags(write=False)
+    return table
+
+
+def frequencies_to_pitch(frequencies, reference_frequency: float = 440.0) -> np.ndarray:
+    """
+    Pitch MIDI continu (non arrondi) d'un tableau de fréquences.
+
+    Args:
+        frequencies: Fréquences en Hz (> 0).
+        reference_frequency: Fréquence du La4 / MIDI 69 en Hz.
+
+    Returns:
+        Tableau de pitchs flottants (69.0 = La4).
+    """
+    return 69.0 + 12.0 * np.log2(np.asarray(frequencies, dtype=np.float64) / reference_frequency)
+
+
+def pitch_frames_to_arrays(pitch_frames: List[PitchFrame]) -> np.ndarray:
+    """
+    Convertit des PitchFrame en tableau (n, 3) : time, frequency, confidence.
+
+    Aplatissement direct des tuples, bien plus rapide que np.asarray.
+    """
+    return np.fromiter(
+        chain.from_iterable(pitch_frames),
+        dtype=np.float64,
+        count=3 * len(pitch_frames)
+    ).reshape(-1, 3)
+
+
+def rolling_median(values: np.ndarray, window: int, valid: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Médiane glissante centrée, en temps linéaire (fenêtre fixe).
+
+    Les valeurs invalides sont exclues de chaque fenêtre : elles sont
+    remplacées alternativement par -inf et +inf, ce qui laisse au centre de
+    la fenêtre triée la médiane (basse) des seules valeurs valides.
+
+    Args:
+        values: Valeurs 1D.
+        window: Taille de fenêtre en échantillons (arrondie à l'impair supérieur).
+        valid: Masque des valeurs utilisables (défaut: toutes).
+
+    Returns:
+        Tableau de même taille ; NaN là où la fenêtre ne contient aucune valeur valide.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    half = max(int(window), 1) // 2
+    if valid is None:
+        valid = np.ones(values.size, dtype=bool)
+    if half == 0 or values.size == 0:
+        return np.where(valid, values, np.nan)
+
+    padded = np.pad(np.where(valid, values, np.nan), half, constant_values=np.nan)
+    windows = np.lib.stride_tricks.sliding_window_view(padded, 2 * half + 1)
+
+    invalid = ~np.pad(valid, half, constant_values=False)
+    rows = np.flatnonzero(np.lib.stride_tricks.sliding_window_view(invalid, 2 * half + 1).any(axis=1))
+    if rows.size:
+        windows = windows.copy()
+        sub = windows[rows]
+        bad = np.isnan(sub)
+        rank = np.cumsum(bad, axis=1)
+        sub[bad] = np.where(rank[bad] % 2 == 1, -np.inf, np.inf)
+        windows[rows] = sub
+
+    median = np.partition(windows, half, axis=1)[:, half]
+    median[~np.isfinite(median)] = np.nan
+    return median
+
+
+def beats_to_ticks(
+    positions: np.ndarray,
+    durations: np.ndarray,
+    beats_per_measure: int,
+    grid_step: Optional[Fraction] = None
+) -> Tuple[Fraction, np.ndarray, np.ndarray]:
+    """
+    Convertit positions et durées (beats) en nombres entiers de ticks exacts.
+
+    Le tick est le pas de grille (grid_step, ex: MusicalQuantizer.grid_fraction)
+    ou, à défaut, le plus grand pas dont toutes les valeurs sont multiples
+    (recherche rationnelle une fois par valeur distincte). Il est affiné pour
+    qu'une mesure compte un nombre entier de ticks.
+
+    Args:
+        positions: Débuts en beats.
+        durations: Durées en beats.
+        beats_per_measure: Beats par mesure.
+        grid_step: Pas de grille exact en beats (optionnel).
+
+    Returns:
+        (tick en beats, débuts en ticks, durées en ticks) ; tableaux int64.
+    """
+    positions = np.asarray(positions, dtype=np.float64)
+    durations = np.asarray(durations, dtype=np.float64)
+
+    if grid_step is None:
+        denominators = [
+            Fraction(value).limit_denominator(FRACTION_DENOMINATOR_LIMIT).denominator
+            for value in np.unique(np.concatenate((positions, durations))).tolist()
+        ]
+        tick = Fraction(1, lcm(*denominators))
+    else:
+        tick = Fraction(grid_step)
+    tick /= (beats_per_measure / tick).denominator
+
+    starts = np.rint(positions / float(tick)).astype(np.int64)
+    lengths = np.rint(durations / float(tick)).astype(np.int64)
+    return tick, starts, lengths
+
+
+def midi_note_names(midi_notes) -> np.ndarray:
+    """
+    Noms de notes pour un tableau de numéros MIDI (lookup, sans formatage).
+
+    Args:
+        midi_notes: Numéros MIDI dans [0, 127].
+
+    Returns:
+        Tableau d'objets str de même forme.
+    """
+    return _MIDI_NOTE_NAMES_ARRAY[np.asarray(midi_notes, dtype=np.int64)]
+
 
 class DebugTracer:
     def __init__(self, output_dir="output/debug", enabled=True):
@@ -16,3 +177,63 @@ class IntermediateStorage:
     
     def save_audio(self, audio, sr, filename="audio.npz"):
         pass
+
+
+def format_duration(seconds: float) -> str:
+    """
+    Formate une durée lisible.
+
+    Args:
+        seconds: Durée en secondes.
+
+    Returns:
+        "15.3s" sous la minute, sinon "2m 34s".
+    """
+    if seconds < 60:
+        return f"{seconds:.1f}s"
+    minutes, rest = divmod(int(seconds), 60)
+    return f"{minutes}m {rest}s"
+
+
+def format_frequency(frequency: float, reference_frequency: float = 440.0) -> str:
+    """
+    Formate une fréquence avec le nom de note le plus proche.
+
+    Args:
+        frequency: Fréquence en Hz.
+        reference_frequency: Fréquence du La4 en Hz (défaut: 440.0).
+
+    Returns:
+        Ex: "440.0 Hz (A4)", ou "... Hz (invalid)" si frequency <= 0.
+    """
+    if frequency <= 0:
+        return f"{frequency:.1f} Hz (invalid)"
+
+    midi = int(np.clip(np.round(frequencies_to_pitch(frequency, reference_frequency)), 0, 127))
+    return f"{frequency:.1f} Hz ({MIDI_NOTE_NAMES[midi]})"
+
+
+def print_summary_stats(pitch_frames: List[PitchFrame]) -> None:
+    """
+    Affiche des statistiques résumées sur des frames de pitch.
+
+    Args:
+        pitch_frames: Frames de pitch.
+    """
+    if not pitch_frames:
+        print("No pitch data to summarize")
+        return
+
+    times, frequencies, confidences = pitch_frames_to_arrays(pitch_frames).T
+
+    print("\nPitch Detection Summary:")
+    print("=" * 50)
+    print(f"Total frames: {len(pitch_frames)}")
+    print(f"Average confidence: {confidences.mean():.2f}")
+    print(
+        f"Frequency range: {format_frequency(frequencies.min())} - "
+        f"{format_frequency(frequencies.max())}"
+    )
+    print(f"Duration: {format_duration(times[-1] - times[0])}")
+    print(f"Time span: {times[0]:.2f}s - {times[-1]:.2f}s")
+    print("=" * 50)
@@ -0,0 +1,126 @@
+"""
+MusePartition - Audio Features Tests
+Unit tests for the audio_features module
+"""
+
+import pytest
+import numpy as np
+from src.audio_features import (
+    AudioFeatures,
+    decimate_envelope,
+    stft_magnitude,
+    windowed_autocorrelation,
+)
+
+
+class TestAudioFeatures:
+    """Test suite for AudioFeatures class."""
+
+    @pytest.fixture
+    def sine_audio(self):
+        """2s de La4 à amplitude 1."""
+        sr = 22050
+        t = np.arange(2 * sr) / sr
+        return np.sin(2 * np.pi * 440 * t), sr
+
+    def test_lazy_nothing_computed(self, sine_audio):
+        """Test qu'aucune transformée n'est calculée à la construction."""
+        audio, sr = sine_audio
+        features = AudioFeatures(audio, sr)
+
+        for name in ("magnitude", "rms", "onset_strength", "tempogram"):
+            assert not features.is_computed(name)
+
+    def test_memoized(self, sine_audio):
+        """Test que chaque transformée est calculée une seule fois."""
+        audio, sr = sine_audio
+        features = AudioFeatures(audio, sr)
+
+        assert features.magnitude is features.magnitude
+        assert features.onset_strength is features.onset_strength
+        assert features.tempogram is features.tempogram
+
+    def test_dependencies_share_stft(self, sine_audio):
+        """Test que RMS et onsets réutilisent la STFT en cache."""
+        audio, sr = sine_audio
+        features = AudioFeatures(audio, sr)
+
+        features.rms
+        assert features.is_computed("magnitude")
+        assert not features.is_computed("onset_strength")
+
+    def test_magnitude_matches_stft(self, sine_audio):
+        """Test STFT identique à stft_magnitude."""
+        audio, sr = sine_audio
+        features = AudioFeatures(audio, sr, hop_length=256)
+
+        np.testing.assert_array_equal(features.magnitude, stft_magnitude(audio, 2048, 256))
+        assert features.n_frames == 1 + len(audio) // 256
+
+    def test_rms_matches_windowed_frames(self, sine_audio):
+        """Test RMS (Parseval) égal au RMS des trames fenêtrées."""
+        audio, sr = sine_audio
+        features = AudioFeatures(audio, sr)
+
+        window = np.hanning(2049)[:-1]
+        frame = audio[10 * 512 - 1024:10 * 512 + 1024] * window
+        assert features.rms[10] == pytest.approx(np.sqrt(np.mean(frame ** 2)), rel=1e-4)
+
+    def test_tempogram_shape(self, sine_audio):
+        """Test forme du tempogramme (fenêtre de 8s)."""
+        audio, sr = sine_audio
+        features = AudioFeatures(audio, sr)
+
+        assert features.tempogram.shape == (344, features.n_frames)
+
+    def test_concurrent_access_computes_once(self, sine_audio):
+        """Test que des threads concurrents partagent un seul calcul."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        audio, sr = sine_audio
+        features = AudioFeatures(audio, sr)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            tempograms = list(executor.map(lambda _: features.tempogram, range(8)))
+            magnitudes = list(executor.map(lambda _: features.magnitude, range(8)))
+
+        assert all(t is tempograms[0] for t in tempograms)
+        assert all(m is magnitudes[0] for m in magnitudes)
+
+    def test_tempo_autocorrelation(self, sine_audio):
+        """Test autocorrélation de tempo : une valeur par décalage, sans tempogramme."""
+        audio, sr = sine_audio
+        features = AudioFeatures(audio, sr)
+
+        autocorrelation = features.tempo_autocorrelation
+
+        assert features.tempo_frame_rate == pytest.approx(sr / 512)
+        assert autocorrelation.shape == (int(round(8.0 * sr / 512)),)
+        assert not features.is_computed("tempogram")
+
+    def test_decimate_envelope(self):
+        """Test décimation par moyenne de blocs vers ~100 Hz."""
+        envelope = np.arange(12.0)
+
+        decimated, rate = decimate_envelope(envelope, 400.0)
+
+        np.testing.assert_array_equal(decimated, [1.5, 5.5, 9.5])
+        assert rate == 100.0
+        assert decimate_envelope(envelope, 43.0)[0] is envelope
+
+    def test_windowed_autocorrelation_matches_direct(self):
+        """Test autocorrélation FFT identique au calcul direct."""
+        rng = np.random.default_rng(0)
+        envelope = rng.random(300)
+
+        autocorrelation = windowed_autocorrelation(envelope, win_length=64, hop_length=50)
+
+        window = (envelope[50:114] - envelope[50:114].mean()) * np.hanning(64)
+        direct = np.correlate(window, window, mode="full")[63:]
+        assert autocorrelation.shape == (5, 64)
+        np.testing.assert_allclose(autocorrelation[1], direct / direct[0], atol=1e-12)
+
+    def test_invalid_sr(self):
+        """Test sample rate invalide."""
+        with pytest.raises(ValueError, match="Sample rate invalide"):
+            AudioFeatures(np.zeros(100), 0)
@@ -0,0 +1,211 @@
+"""
+MusePartition - MIDI Writer Tests
+Unit tests for the direct Standard MIDI File writer
+"""
+
+import io
+from fractions import Fraction
+
+import pytest
+import numpy as np
+import music21
+
+from src.types import QuantizedNote, QuantizedNoteArray, TempoMap
+from src.midi_writer import MidiWriter, variable_length
+from src.score_generator import ScoreGenerator
+
+
+def write_midi(notes, bpm=100.0, midi_format=1, writer=None, **kwargs):
+    """Écrit en mémoire, renvoie les octets."""
+    fp = io.BytesIO()
+    (writer or MidiWriter()).write(fp, notes, bpm, midi_format=midi_format, **kwargs)
+    return fp.getvalue()
+
+
+def read_midi(data):
+    """Relit des octets avec le parseur MIDI de music21."""
+    midi_file = music21.midi.MidiFile()
+    midi_file.readstr(data)
+    return midi_file
+
+
+def note_timeline(data):
+    """(tick, pitch, vélocité) des note-on / note-off, toutes pistes confondues."""
+    timeline = []
+    for track in read_midi(data).tracks:
+        tick = 0
+        for event in track.events:
+            if event.isDeltaTime():
+                tick += event.time
+            elif event.isNoteOn() or event.isNoteOff():
+                timeline.append((tick, event.pitch, event.velocity))
+    return timeline
+
+
+class TestVariableLength:
+    """Test suite for variable_length."""
+
+    @pytest.mark.parametrize("value, expected", [
+        (0x00, b"\x00"),
+        (0x7F, b"\x7f"),
+        (0x80, b"\x81\x00"),
+        (0x2000, b"\xc0\x00"),
+        (0x1FFFFF, b"\xff\xff\x7f"),
+        (0x0FFFFFFF, b"\xff\xff\xff\x7f"),
+    ])
+    def test_spec_examples(self, value, expected):
+        """Test exemples de la spécification SMF."""
+        assert variable_length(value) == expected
+
+
+class TestMidiWriter:
+    """Test suite for MidiWriter."""
+
+    @pytest.fixture
+    def melody(self):
+        """Mélodie avec silences et note répétée."""
+        return [
+            QuantizedNote(midi_note=60, beat_position=0.0, duration_beats=1.0),
+            QuantizedNote(midi_note=62, beat_position=1.0, duration_beats=0.5),
+            QuantizedNote(midi_note=64, beat_position=2.5, duration_beats=1.0),
+            QuantizedNote(midi_note=64, beat_position=3.5, duration_beats=2.0),
+        ]
+
+    def test_header_and_tracks(self, melody):
+        """Test en-tête MThd : type, nombre de pistes, résolution."""
+        type1 = read_midi(write_midi(melody))
+        type0 = read_midi(write_midi(melody, midi_format=0))
+
+        assert (type1.format, len(type1.tracks), type1.ticksPerQuarterNote) == (1, 2, 10080)
+        assert (type0.format, len(type0.tracks)) == (0, 1)
+        assert note_timeline(write_midi(melody)) == note_timeline(write_midi(melody, midi_format=0))
+
+    def test_meta_events(self, melody):
+        """Test tempo, armure et métrique identiques à music21."""
+        writer = MidiWriter(key_signature="F#m", time_signature="3/4")
+        tempo_track = read_midi(write_midi(melody, writer=writer)).tracks[0]
+
+        data = {event.type.name: event.data for event in tempo_track.events if not event.isDeltaTime()}
+        assert data["SET_TEMPO"] == (600000).to_bytes(3, "big")
+        assert data["KEY_SIGNATURE"] == b"\x03\x01"
+        assert data["TIME_SIGNATURE"] == b"\x03\x02\x18\x08"
+
+    def test_notes_match_music21(self, melody, tmp_path):
+        """Test mêmes notes que l'export MIDI music21 (ticks, hauteurs, vélocités)."""
+        generator = ScoreGenerator()
+        generator.notes_to_music21(melody, 100.0).write("midi", fp=str(tmp_path / "ref.mid"))
+
+        reference = note_timeline((tmp_path / "ref.mid").read_bytes())
+        assert note_timeline(write_midi(melody)) == reference
+
+    def test_repeated_note_off_before_on(self, melody):
+        """Test note répétée : note-off avant le note-on au même tick."""
+        timeline = note_timeline(write_midi(melody))
+
+        assert timeline[-4:] == [
+            (25200, 64, 90), (35280, 64, 0), (35280, 64, 90), (55440, 64, 0)
+        ]
+
+    def test_running_status(self, melody):
+        """Test running status : un seul octet de statut pour les 8 messages de canal."""
+        data = write_midi(melody)
+
+        notes_track = data[data.rindex(b"MTrk"):]
+        assert notes_track.count(b"\x90") == 1
+
+    def test_triplets_exact(self):
+        """Test triolets : ticks exacts (3360 par croche de triolet)."""
+        notes = [
+            QuantizedNote(midi_note=60 + i, beat_position=i / 3, duration_beats=1 / 3)
+            for i in range(3)
+        ]
+
+        timeline = note_timeline(write_midi(notes, grid_step=Fraction(1, 3)))
+
+        assert [tick for tick, _, velocity in timeline if velocity] == [0, 3360, 6720]
+
+    def test_overlap_truncated(self):
+        """Test monophonie : note tronquée par la suivante, doublon ignoré."""
+        notes = [
+            QuantizedNote(midi_note=60, beat_position=0.0, duration_beats=2.0),
+            QuantizedNote(midi_note=62, beat_position=1.0, duration_beats=1.0),
+            QuantizedNote(midi_note=64, beat_position=1.0, duration_beats=1.0),
+        ]
+
+        assert note_timeline(write_midi(notes)) == [
+            (0, 60, 90), (10080, 60, 0), (10080, 62, 90), (20160, 62, 0)
+        ]
+
+    def test_tempo_map_changes(self):
+        """Test Set Tempo en début de mesure à chaque changement de tempo."""
+        tempo_map = TempoMap(np.concatenate((np.arange(5.0), 4.0 + 0.5 * np.arange(1, 9))))
+        notes = [QuantizedNote(midi_note=60, beat_position=float(b), duration_beats=1.0) for b in range(12)]
+
+        tempo_track = read_midi(write_midi(notes, tempo_map=tempo_map)).tracks[0]
+
+        tick, tempi = 0, []
+        for event in tempo_track.events:
+            if event.isDeltaTime():
+                tick += event.time
+            elif event.type.name == "SET_TEMPO":
+                tempi.append((tick, int.from_bytes(event.data, "big")))
+        assert tempi == [(0, 1000000), (40320, 500000)]
+
+    @pytest.mark.parametrize("time_signature, microseconds", [("4/4", 500000), ("6/8", 1000000), ("2/2", 250000)])
+    def test_tempo_matches_music21(self, time_signature, microseconds, tmp_path):
+        """Test même lecture du BPM (beats de la signature) que la partition music21."""
+        notes = [QuantizedNote(midi_note=60, beat_position=0.0, duration_beats=2.0)]
+        generator = ScoreGenerator(time_signature=time_signature)
+        generator.notes_to_music21(notes, 120.0).write("midi", fp=str(tmp_path / "ref.mid"))
+
+        def tempi(data):
+            return [
+                int.from_bytes(event.data, "big")
+                for event in read_midi(data).tracks[0].events
+                if not event.isDeltaTime() and event.type.name == "SET_TEMPO"
+            ]
+
+        direct = write_midi(notes, bpm=120.0, writer=MidiWriter(time_signature=time_signature))
+
+        assert tempi(direct) == tempi((tmp_path / "ref.mid").read_bytes()) == [microseconds]
+
+    @pytest.mark.parametrize("time_signature", ["4/4", "6/8"])
+    def test_export_midi_from_score_matches_music21(self, time_signature, tmp_path):
+        """Test export_midi d'un Score déjà noté : notes liées fusionnées, tempos identiques à music21."""
+        tempo_map = TempoMap(np.concatenate((np.arange(7.0), 6.0 + 0.5 * np.arange(1, 13))))
+        notes = [
+            QuantizedNote(midi_note=60, beat_position=2.5, duration_beats=3.0),
+            QuantizedNote(midi_note=62, beat_position=6.0, duration_beats=7.25),
+            QuantizedNote(midi_note=62, beat_position=13.25, duration_beats=0.5),
+        ]
+        generator = ScoreGenerator(time_signature=time_signature, key_signature="Eb")
+        score = generator.notes_to_music21(notes, 100.0, tempo_map=tempo_map)
+        
+        generator.export_midi(score, tmp_path / "direct.mid")
+        score.write("midi", fp=str(tmp_path / "ref.mid"))
+        
+        def tempo_events(data):
+            tick, events = 0, []
+            for event in read_midi(data).tracks[0].events:
+                if event.isDeltaTime():
+                    tick += event.time
+                elif event.type.name in ("SET_TEMPO", "KEY_SIGNATURE"):
+                    events.append((tick, event.type.name, event.data))
+            return events
+        
+        direct, reference = (tmp_path / "direct.mid").read_bytes(), (tmp_path / "ref.mid").read_bytes()
+        assert note_timeline(direct) == note_timeline(reference)
+        assert tempo_events(direct) == tempo_events(reference)
+    
+    def test_note_array_input(self, melody):
+        """Test QuantizedNoteArray : octets identiques à la liste."""
+        assert write_midi(QuantizedNoteArray.from_list(melody)) == write_midi(melody)
+
+    def test_invalid_arguments(self, melody):
+        """Test liste vide, format et signature invalides."""
+        with pytest.raises(ValueError, match="Liste de notes vide"):
+            write_midi([])
+        with pytest.raises(ValueError, match="Format MIDI invalide"):
+            write_midi(melody, midi_format=2)
+        with pytest.raises(ValueError, match="Signature temporelle invalide"):
+            MidiWriter(time_signature="4/3")
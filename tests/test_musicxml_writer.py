@@ -0,0 +1,289 @@
+"""
+MusePartition - MusicXML Writer Tests
+Unit tests for the native MusicXML writer
+"""
+
+import io
+import xml.etree.ElementTree as ET
+import zipfile
+from fractions import Fraction
+
+import pytest
+import numpy as np
+import music21
+
+from src.types import QuantizedNote, QuantizedNoteArray, TempoMap
+from src.musicxml_writer import MXL_MIMETYPE, MusicXMLWriter, key_fifths, note_values, open_mxl
+from src.score_generator import ScoreGenerator
+
+
+def write_xml(notes, bpm=100.0, **kwargs):
+    """Écrit avec un writer par défaut, renvoie (texte, nb de mesures)."""
+    writer_options = {k: kwargs.pop(k) for k in ("time_signature", "key_signature", "clef") if k in kwargs}
+    fp = io.StringIO()
+    measures = MusicXMLWriter(**writer_options).write(fp, notes, bpm, **kwargs)
+    return fp.getvalue(), measures
+
+
+def visible_events(xml_text):
+    """
+    (offset, quarterLength, midi ou None, tie, ligatures, altération affichée)
+    des notes et silences visibles, relus par music21.
+    """
+    score = music21.converter.parse(xml_text, format="musicxml")
+    return [
+        (float(n.offset), float(n.quarterLength), n.pitch.midi if n.isNote else None,
+         n.tie.type if n.tie else None, tuple(n.beams.getTypes()) if n.isNote else (),
+         n.isNote and n.pitch.accidental is not None and bool(n.pitch.accidental.displayStatus))
+        for n in score.flatten().notesAndRests
+        if not (n.isRest and n.style.hideObjectOnPrint)
+    ]
+
+
+class TestKeyFifths:
+    """Test suite for key_fifths."""
+
+    @pytest.mark.parametrize("key, expected", [
+        ("C", (0, "major")),
+        ("F#", (6, "major")),
+        ("Bb", (-2, "major")),
+        ("Cb", (-7, "major")),
+        ("Am", (0, "minor")),
+        ("F#m", (3, "minor")),
+        ("Ebm", (-6, "minor")),
+        ("e", (1, "minor")),
+    ])
+    def test_matches_music21(self, key, expected):
+        """Test armure identique à music21.key.Key."""
+        assert key_fifths(key) == expected
+        reference = music21.key.Key(key)
+        assert (reference.sharps, reference.mode) == expected
+
+    def test_invalid(self):
+        """Test tonalité invalide."""
+        with pytest.raises(ValueError, match="Tonalité invalide"):
+            key_fifths("H")
+
+
+class TestNoteValues:
+    """Test suite for note_values."""
+
+    def test_dyadic(self):
+        """Test figures simples, pointées et liées."""
+        assert note_values(Fraction(1)) == (("quarter", 0, None, Fraction(1)),)
+        assert note_values(Fraction(3, 4)) == (("eighth", 1, None, Fraction(3, 4)),)
+        assert note_values(Fraction(5, 4)) == (
+            ("quarter", 0, None, Fraction(1)),
+            ("16th", 0, None, Fraction(1, 4)),
+        )
+
+    def test_tuplets(self):
+        """Test triolets et quintolets."""
+        assert note_values(Fraction(1, 3)) == (("eighth", 0, (3, 2), Fraction(1, 3)),)
+        assert note_values(Fraction(2, 3)) == (("quarter", 0, (3, 2), Fraction(2, 3)),)
+        assert note_values(Fraction(1, 5)) == (("16th", 0, (5, 4), Fraction(1, 5)),)
+
+
+class TestMusicXMLWriter:
+    """Test suite for MusicXMLWriter."""
+
+    @pytest.fixture
+    def melody(self):
+        """Mélodie à l'intérieur des mesures : silences visibles et masqués, altérations."""
+        return [
+            QuantizedNote(midi_note=60, beat_position=0.0, duration_beats=1.0),
+            QuantizedNote(midi_note=61, beat_position=1.0, duration_beats=0.5),
+            QuantizedNote(midi_note=63, beat_position=1.75, duration_beats=0.25),
+            QuantizedNote(midi_note=70, beat_position=2.0, duration_beats=0.75),
+            QuantizedNote(midi_note=66, beat_position=4.0, duration_beats=1.5),
+            QuantizedNote(midi_note=72, beat_position=7.0, duration_beats=1.0),
+        ]
+
+    def test_equivalent_to_music21(self, melody, tmp_path):
+        """Test contenu identique à l'export music21 (hauteurs, positions, durées)."""
+        generator = ScoreGenerator(key_signature="D")
+        generator.export_musicxml(generator.notes_to_music21(melody, 100.0), tmp_path / "ref.musicxml")
+
+        xml_text, measures = write_xml(melody, key_signature="D")
+
+        assert measures == 2
+        assert visible_events(xml_text) == visible_events((tmp_path / "ref.musicxml").read_text())
+
+    @pytest.mark.parametrize("key_signature, time_signature", [
+        ("C", "4/4"), ("F", "4/4"), ("D", "3/4"), ("Bb", "6/8")
+    ])
+    def test_beams_and_accidentals_match_music21(self, key_signature, time_signature, tmp_path):
+        """Test croches chromatiques : mêmes ligatures et altérations affichées que music21."""
+        pitches = [61, 62, 63, 61, 62, 61, 61, 60, 70, 70, 71, 70, 66, 65, 66, 66, 73, 72, 61]
+        durations = [0.5] * 8 + [0.25, 0.25, 0.5, 1.0, 0.5, 0.5, 1.0, 0.5, 0.5, 0.5, 1.5]
+        notes, position = [], 0.0
+        for midi, duration in zip(pitches, durations):
+            notes.append(QuantizedNote(midi_note=midi, beat_position=position, duration_beats=duration))
+            position += duration
+        generator = ScoreGenerator(time_signature=time_signature, key_signature=key_signature)
+        generator.export_musicxml(generator.notes_to_music21(notes, 100.0), tmp_path / "ref.musicxml")
+
+        xml_text, _ = write_xml(notes, key_signature=key_signature, time_signature=time_signature)
+
+        events = visible_events(xml_text)
+        assert any(beams for *_, beams, _ in events)
+        assert any(shown for *_, shown in events)
+        assert events == visible_events((tmp_path / "ref.musicxml").read_text())
+
+    def test_well_formed_header(self, melody):
+        """Test XML bien formé : en-tête, partie, attributs et tempo."""
+        xml_text, _ = write_xml(melody, title="A & B", clef="bass", time_signature="3/4")
+
+        root = ET.fromstring(xml_text.split("\n", 2)[2])
+        assert root.tag == "score-partwise"
+        assert root.findtext("work/work-title") == "A & B"
+        assert root.find("part-list/score-part").get("id") == root.find("part").get("id")
+
+        attributes = root.find("part/measure/attributes")
+        assert attributes.findtext("divisions") == "4"
+        assert attributes.findtext("time/beats") == "3"
+        assert (attributes.findtext("clef/sign"), attributes.findtext("clef/line")) == ("F", "4")
+        assert root.find("part/measure/direction/sound").get("tempo") == "100"
+
+        measures = root.findall("part/measure")
+        durations = [sum(int(n.findtext("duration")) for n in m.findall("note")) for m in measures]
+        assert durations == [12] * len(measures)
+
+    def test_tie_across_barline(self):
+        """Test note découpée à la barre de mesure avec liaison."""
+        notes = [QuantizedNote(midi_note=67, beat_position=3.0, duration_beats=2.0)]
+
+        xml_text, measures = write_xml(notes)
+
+        assert measures == 2
+        assert visible_events(xml_text) == [
+            (0.0, 3.0, None, None, (), False),
+            (3.0, 1.0, 67, "start", (), False),
+            (4.0, 1.0, 67, "stop", (), False),
+        ]
+        assert xml_text.count('<tied type="start" />') == 1
+
+    def test_rest_across_barline_and_overlap(self):
+        """Test silence découpé à la barre et note tronquée par la suivante."""
+        notes = [
+            QuantizedNote(midi_note=60, beat_position=0.0, duration_beats=2.0),
+            QuantizedNote(midi_note=62, beat_position=1.0, duration_beats=1.0),
+            QuantizedNote(midi_note=64, beat_position=5.0, duration_beats=1.0),
+        ]
+
+        xml_text, _ = write_xml(notes)
+
+        assert visible_events(xml_text) == [
+            (0.0, 1.0, 60, None, (), False),
+            (1.0, 1.0, 62, None, (), False),
+            (2.0, 2.0, None, None, (), False),
+            (4.0, 1.0, None, None, (), False),
+            (5.0, 1.0, 64, None, (), False),
+        ]
+
+    def test_triplets(self):
+        """Test triolets : durées exactes et crochets par groupe."""
+        step = Fraction(1, 3)
+        notes = [
+            QuantizedNote(midi_note=60 + i, beat_position=i / 3, duration_beats=1 / 3)
+            for i in range(6)
+        ]
+
+        xml_text, _ = write_xml(notes, grid_step=step)
+
+        score = music21.converter.parse(xml_text, format="musicxml")
+        pitched = list(score.flatten().notes)
+        assert [n.offset for n in pitched] == [Fraction(i, 3) for i in range(6)]
+        assert xml_text.count('<tuplet type="start" bracket="yes" />') == 2
+        assert xml_text.count('<tuplet type="stop" />') == 2
+
+    def test_tempo_map_marks(self):
+        """Test indication de tempo en début de mesure à chaque changement."""
+        tempo_map = TempoMap(np.concatenate((np.arange(5.0), 4.0 + 0.5 * np.arange(1, 9))))
+        notes = [QuantizedNote(midi_note=60, beat_position=float(b), duration_beats=1.0) for b in range(12)]
+
+        xml_text, _ = write_xml(notes, tempo_map=tempo_map)
+
+        root = ET.fromstring(xml_text.split("\n", 2)[2])
+        marks = [
+            (m.get("number"), d.findtext("direction-type/metronome/per-minute"))
+            for m in root.iter("measure") for d in m.findall("direction")
+        ]
+        assert marks == [("1", "60"), ("2", "120")]
+
+    def test_compound_meter_tempo(self):
+        """Test 6/8 : figure de battue croche, tempo de lecture en noires."""
+        notes = [QuantizedNote(midi_note=60, beat_position=0.0, duration_beats=6.0)]
+
+        xml_text, _ = write_xml(notes, bpm=180.0, time_signature="6/8")
+
+        assert "<beat-unit>eighth</beat-unit>" in xml_text
+        assert '<sound tempo="90" />' in xml_text
+        assert "<dot />" in xml_text
+
+    @pytest.mark.parametrize("time_signature", ["4/4", "6/8", "2/2"])
+    def test_tempo_matches_music21(self, time_signature, tmp_path):
+        """Test même lecture du BPM (beats de la signature) que l'export music21."""
+        notes = [QuantizedNote(midi_note=60, beat_position=0.0, duration_beats=2.0)]
+        generator = ScoreGenerator(time_signature=time_signature)
+        generator.export_musicxml(generator.notes_to_music21(notes, 120.0), tmp_path / "ref.musicxml")
+
+        def tempo(xml_bytes):
+            root = ET.fromstring(xml_bytes)
+            metronome = root.find(".//direction-type/metronome")
+            return (
+                metronome.findtext("beat-unit"),
+                float(metronome.findtext("per-minute")),
+                float(root.find(".//sound").get("tempo"))
+            )
+
+        xml_text, _ = write_xml(notes, bpm=120.0, time_signature=time_signature)
+
+        assert tempo(xml_text.split("\n", 2)[2]) == tempo((tmp_path / "ref.musicxml").read_bytes())
+
+    def test_note_array_input(self, melody):
+        """Test QuantizedNoteArray : sortie identique à la liste."""
+        assert write_xml(QuantizedNoteArray.from_list(melody)) == write_xml(melody)
+
+    def test_empty_notes(self):
+        """Test liste vide."""
+        with pytest.raises(ValueError, match="Liste de notes vide"):
+            write_xml([])
+
+    def test_invalid_time_signature(self):
+        """Test signature temporelle invalide."""
+        with pytest.raises(ValueError, match="Signature temporelle invalide"):
+            MusicXMLWriter(time_signature="4-4")
+
+
+class TestOpenMxl:
+    """Test suite for open_mxl."""
+
+    def test_container_layout(self, tmp_path):
+        """Test archive .mxl : mimetype stocké en premier, container.xml vers le MusicXML."""
+        with open_mxl(str(tmp_path / "score.mxl"), "score.musicxml") as entry:
+            entry.write(b"<score-partwise/>")
+
+        with zipfile.ZipFile(tmp_path / "score.mxl") as archive:
+            first = archive.infolist()[0]
+            assert (first.filename, first.compress_type) == ("mimetype", zipfile.ZIP_STORED)
+            assert archive.read("mimetype") == MXL_MIMETYPE.encode()
+            container = ET.fromstring(archive.read("META-INF/container.xml"))
+            assert container.find("rootfiles/rootfile").get("full-path") == "score.musicxml"
+            assert archive.getinfo("score.musicxml").compress_type == zipfile.ZIP_DEFLATED
+            assert archive.read("score.musicxml") == b"<score-partwise/>"
+
+    def test_streamed_writer_readable_by_music21(self, tmp_path):
+        """Test MusicXMLWriter écrit dans l'archive : relu par music21, ~10× plus petit."""
+        notes = [
+            QuantizedNote(midi_note=60 + i % 12, beat_position=i * 0.5, duration_beats=0.5)
+            for i in range(400)
+        ]
+        with open_mxl(str(tmp_path / "score.mxl")) as entry, io.TextIOWrapper(entry, encoding="utf-8") as fp:
+            MusicXMLWriter().write(fp, notes, 100.0)
+        xml_text, _ = write_xml(notes)
+
+        score = music21.converter.parse(str(tmp_path / "score.mxl"))
+
+        assert len(score.flatten().notes) == 400
+        assert (tmp_path / "score.mxl").stat().st_size * 10 < len(xml_text.encode())
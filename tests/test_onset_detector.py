@@ -0,0 +1,102 @@
+"""
+MusePartition - Onset Detector Tests
+Unit tests for the onset_detector module
+"""
+
+import pytest
+import numpy as np
+from src.onset_detector import OnsetDetector, OnsetAnalysis
+
+
+class TestOnsetDetector:
+    """Test suite for OnsetDetector class."""
+
+    @pytest.fixture
+    def detector(self):
+        """Crée un OnsetDetector standard."""
+        return OnsetDetector(onset_threshold=0.3, silence_threshold_db=-40)
+
+    @pytest.fixture
+    def repeated_notes_audio(self):
+        """4 attaques de La4 (même hauteur) toutes les 0.5s à partir de 0.25s."""
+        sr = 22050
+        t = np.arange(int(sr * 2.25)) / sr
+        envelope = np.where(t >= 0.25, np.exp(-8.0 * ((t - 0.25) % 0.5)), 0.0)
+        audio = 0.5 * envelope * np.sin(2 * np.pi * 440 * t)
+        return audio, sr
+
+    # --- Tests STFT ---
+
+    def test_compute_stft_shape(self, detector):
+        """Test forme de la STFT (trames centrées)."""
+        audio = np.random.default_rng(0).normal(size=22050)
+
+        magnitude = detector.compute_stft(audio)
+
+        assert magnitude.shape == (1025, 1 + 22050 // 512)
+        assert magnitude.dtype == np.float32
+
+    def test_compute_stft_peak_bin(self, detector):
+        """Test que le pic spectral d'un sinus tombe sur le bon bin."""
+        sr = 22050
+        t = np.arange(sr) / sr
+        magnitude = detector.compute_stft(np.sin(2 * np.pi * 440 * t))
+
+        peak_bin = magnitude[:, 10].argmax()
+        assert abs(peak_bin * sr / 2048 - 440) < sr / 2048
+
+    def test_compute_stft_empty(self, detector):
+        """Test STFT sur audio vide."""
+        with pytest.raises(ValueError, match="Audio vide"):
+            detector.compute_stft(np.array([]))
+
+    # --- Tests Onsets ---
+
+    def test_detect_repeated_notes(self, detector, repeated_notes_audio):
+        """Test détection des attaques de notes répétées."""
+        audio, sr = repeated_notes_audio
+
+        analysis = detector.analyze(audio, sr)
+
+        assert isinstance(analysis, OnsetAnalysis)
+        assert len(analysis.onset_times) == 4
+        np.testing.assert_allclose(analysis.onset_times, [0.25, 0.75, 1.25, 1.75], atol=2 * 512 / sr)
+
+    def test_onset_envelope_normalized(self, detector, repeated_notes_audio):
+        """Test enveloppe normalisée, une valeur par frame STFT."""
+        audio, sr = repeated_notes_audio
+
+        analysis = detector.analyze(audio, sr)
+
+        assert analysis.onset_envelope.shape == (analysis.magnitude.shape[1],)
+        assert analysis.onset_envelope.max() == pytest.approx(1.0)
+        assert analysis.onset_envelope.min() >= 0.0
+
+    def test_analyze_reuses_magnitude(self, detector, repeated_notes_audio):
+        """Test qu'une STFT fournie n'est pas recalculée."""
+        audio, sr = repeated_notes_audio
+        magnitude = detector.compute_stft(audio)
+
+        analysis = detector.analyze(audio, sr, magnitude=magnitude)
+
+        assert analysis.magnitude is magnitude
+
+    # --- Tests Silence ---
+
+    def test_silence_mask(self, detector):
+        """Test masque de silence sur son puis silence."""
+        sr = 22050
+        t = np.arange(sr) / sr
+        audio = np.concatenate((0.5 * np.sin(2 * np.pi * 440 * t), np.zeros(sr)))
+
+        analysis = detector.analyze(audio, sr)
+
+        assert not analysis.silent_at(np.array([0.5])).any()
+        assert analysis.silent_at(np.array([1.5, 1.9])).all()
+
+    def test_silence_mask_digital_silence(self, detector):
+        """Test audio entièrement nul → tout silencieux."""
+        analysis = detector.analyze(np.zeros(22050), 22050)
+
+        assert analysis.silent.all()
+        assert len(analysis.onset_times) == 0
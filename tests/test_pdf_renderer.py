@@ -0,0 +1,366 @@
+"""
+Tests pour PdfRenderer et PdfCache
+Rendu PDF par lots (MuseScore remplacé par un script Python de substitution)
+"""
+
+import os
+import pickle
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+from src.types import QuantizedNote
+from src.pdf_renderer import PdfCache, PdfRenderer, canonical_musicxml, renderer_version
+from src.score_generator import ScoreGenerator
+
+
+# Substitut de `mscore -j job.json` : écrit chaque PDF (sauf entrées "fail",
+# bloqué sur "hang", 0.3 s par entrée "lent"), journalise chaque appel
+# (une ligne = taille du lot)
+FAKE_MUSESCORE = '''
+import json, sys, time
+from pathlib import Path
+
+jobs = json.loads(Path(sys.argv[sys.argv.index("-j") + 1]).read_text())
+with open(sys.argv[1], "a") as log:
+    log.write(f"{len(jobs)}\\n")
+for job in jobs:
+    name = Path(job["in"]).name
+    if "hang" in name:
+        time.sleep(30)
+    if "lent" in name:
+        time.sleep(0.3)
+    if "fail" not in name:
+        Path(job["out"]).write_bytes(b"%PDF-1.4 " + Path(job["in"]).read_bytes())
+'''
+
+
+@pytest.fixture
+def fake_musescore(tmp_path):
+    """Commande de rendu factice et son journal d'appels."""
+    script = tmp_path / "fake_mscore.py"
+    script.write_text(FAKE_MUSESCORE)
+    log = tmp_path / "calls.log"
+    return [sys.executable, str(script), str(log)], log
+
+
+def make_inputs(directory: Path, names):
+    """Crée des MusicXML factices."""
+    paths = []
+    for name in names:
+        path = directory / f"{name}.musicxml"
+        path.write_text(f"<score-partwise>{name}</score-partwise>")
+        paths.append(path)
+    return paths
+
+
+class TestPdfRenderer:
+    """Test suite for PdfRenderer."""
+
+    def test_submit_renders_pdf(self, fake_musescore, tmp_path):
+        """Test un rendu : Future résolue avec le chemin du PDF."""
+        command, _ = fake_musescore
+        [xml] = make_inputs(tmp_path, ["score"])
+
+        with PdfRenderer(command=command) as renderer:
+            pdf_path = renderer.submit(str(xml), str(tmp_path / "out" / "score.pdf")).result(timeout=30)
+
+        assert pdf_path == (tmp_path / "out" / "score.pdf").resolve()
+        assert pdf_path.read_bytes().startswith(b"%PDF")
+
+    def test_jobs_batched(self, fake_musescore, tmp_path):
+        """Test rendus en file regroupés : moins d'appels que de partitions."""
+        command, log = fake_musescore
+        inputs = make_inputs(tmp_path, [f"score{i}" for i in range(6)])
+
+        renderer = PdfRenderer(command=command, batch_size=4)
+        # Thread de rendu occupé : les soumissions suivantes s'accumulent en file
+        gate = threading.Event()
+        original = renderer._render_batch
+        renderer._render_batch = lambda batch: (gate.wait(10), original(batch))
+        futures = [renderer.submit(str(xml), str(xml.with_suffix(".pdf"))) for xml in inputs]
+        gate.set()
+        renderer.close()
+
+        assert all(future.result().is_file() for future in futures)
+        calls = [int(line) for line in log.read_text().split()]
+        assert sum(calls) == 6
+        assert max(calls) <= 4
+        assert len(calls) <= 3
+
+    def test_failed_job_isolated(self, fake_musescore, tmp_path):
+        """Test PDF non produit : seule la Future concernée échoue."""
+        command, _ = fake_musescore
+        good, bad = make_inputs(tmp_path, ["good", "fail"])
+
+        with PdfRenderer(command=command) as renderer:
+            good_future = renderer.submit(str(good), str(tmp_path / "good.pdf"))
+            bad_future = renderer.submit(str(bad), str(tmp_path / "fail.pdf"))
+
+        assert good_future.result().is_file()
+        with pytest.raises(RuntimeError, match="Échec rendu PDF fail.musicxml: PDF non produit"):
+            bad_future.result()
+
+    def test_stale_pdf_not_reported(self, fake_musescore, tmp_path):
+        """Test ancien PDF supprimé avant le rendu : un échec n'est pas masqué."""
+        command, _ = fake_musescore
+        [xml] = make_inputs(tmp_path, ["fail"])
+        stale = tmp_path / "fail.pdf"
+        stale.write_bytes(b"%PDF ancien")
+
+        with PdfRenderer(command=command) as renderer:
+            future = renderer.submit(str(xml), str(stale))
+
+        with pytest.raises(RuntimeError):
+            future.result()
+        assert not stale.exists()
+
+    def test_timeout(self, tmp_path):
+        """Test délai dépassé : processus interrompu, Future en échec."""
+        [xml] = make_inputs(tmp_path, ["slow"])
+        command = [sys.executable, "-c", "import time; time.sleep(10)"]
+
+        with PdfRenderer(command=command, job_timeout=0.2) as renderer:
+            future = renderer.submit(str(xml), str(tmp_path / "slow.pdf"))
+            with pytest.raises(RuntimeError, match="délai dépassé"):
+                future.result(timeout=30)
+
+    def test_timeout_per_job(self, fake_musescore, tmp_path):
+        """Test partition bloquante dans un lot : lot interrompu, restants relancés un par un."""
+        command, log = fake_musescore
+        blocker, *inputs = make_inputs(tmp_path, ["blocker", "first", "hang", "last"])
+
+        renderer = PdfRenderer(command=command, job_timeout=1.0)
+        # Thread de rendu occupé par un premier rendu : les trois suivants forment un lot
+        started, gate = threading.Event(), threading.Event()
+        original = renderer._render_batch
+        renderer._render_batch = lambda batch: (started.set(), gate.wait(10), original(batch))
+        renderer.submit(str(blocker), str(blocker.with_suffix(".pdf")))
+        started.wait(10)
+        futures = [renderer.submit(str(xml), str(xml.with_suffix(".pdf"))) for xml in inputs]
+        gate.set()
+        renderer.close()
+
+        assert futures[0].result().is_file()
+        assert futures[2].result().is_file()
+        with pytest.raises(RuntimeError, match="Échec rendu PDF hang.musicxml: délai dépassé"):
+            futures[1].result()
+        assert [int(line) for line in log.read_text().split()] == [1, 3, 1, 1]
+
+    def test_timeout_not_scaled_by_batch(self, fake_musescore, tmp_path):
+        """Test délai par partition : lot plus long que job_timeout mais progressif, non interrompu."""
+        command, log = fake_musescore
+        blocker, *inputs = make_inputs(tmp_path, ["blocker"] + [f"lent{i}" for i in range(4)])
+
+        renderer = PdfRenderer(command=command, job_timeout=0.8)
+        started, gate = threading.Event(), threading.Event()
+        original = renderer._render_batch
+        renderer._render_batch = lambda batch: (started.set(), gate.wait(10), original(batch))
+        renderer.submit(str(blocker), str(blocker.with_suffix(".pdf")))
+        started.wait(10)
+        futures = [renderer.submit(str(xml), str(xml.with_suffix(".pdf"))) for xml in inputs]
+        gate.set()
+        renderer.close()
+
+        assert all(future.result().is_file() for future in futures)
+        assert [int(line) for line in log.read_text().split()] == [1, 4]
+
+    def test_full_queue_wait_outside_lock(self, fake_musescore, tmp_path):
+        """Test soumission en attente de place dans la file : verrou du service libre."""
+        command, _ = fake_musescore
+        inputs = make_inputs(tmp_path, ["a", "b", "c"])
+
+        renderer = PdfRenderer(command=command, max_queue=1)
+        started, gate = threading.Event(), threading.Event()
+        original = renderer._render_batch
+        renderer._render_batch = lambda batch: (started.set(), gate.wait(10), original(batch))
+        futures = [renderer.submit(str(inputs[0]), str(tmp_path / "a.pdf"))]
+        started.wait(10)
+        futures.append(renderer.submit(str(inputs[1]), str(tmp_path / "b.pdf")))
+        blocked = threading.Thread(
+            target=lambda: futures.append(renderer.submit(str(inputs[2]), str(tmp_path / "c.pdf")))
+        )
+        blocked.start()
+
+        try:
+            assert renderer._lock.acquire(timeout=5)
+            renderer._lock.release()
+            assert blocked.is_alive()
+        finally:
+            gate.set()
+            blocked.join(10)
+            renderer.close()
+
+        assert len(futures) == 3
+        assert all(future.result().is_file() for future in futures)
+
+    def test_command_error(self, tmp_path):
+        """Test code de sortie non nul : stderr dans le message."""
+        [xml] = make_inputs(tmp_path, ["score"])
+        command = [sys.executable, "-c", "import sys; sys.exit('plantage')"]
+
+        with PdfRenderer(command=command) as renderer:
+            future = renderer.submit(str(xml), str(tmp_path / "score.pdf"))
+            with pytest.raises(RuntimeError, match="code 1: plantage"):
+                future.result(timeout=30)
+
+    def test_submit_after_close(self, fake_musescore, tmp_path):
+        """Test soumission après fermeture."""
+        command, _ = fake_musescore
+        [xml] = make_inputs(tmp_path, ["score"])
+        renderer = PdfRenderer(command=command)
+        renderer.close()
+
+        with pytest.raises(RuntimeError, match="Service de rendu PDF fermé"):
+            renderer.submit(str(xml), str(tmp_path / "score.pdf"))
+
+    def test_invalid_arguments(self, fake_musescore):
+        """Test taille de file, de lot et délai invalides."""
+        command, _ = fake_musescore
+        with pytest.raises(ValueError, match="Taille de file ou de lot invalide"):
+            PdfRenderer(command=command, max_queue=0)
+        with pytest.raises(ValueError, match="Taille de file ou de lot invalide"):
+            PdfRenderer(command=command, batch_size=0)
+        with pytest.raises(ValueError, match="Délai de rendu invalide"):
+            PdfRenderer(command=command, job_timeout=0)
+
+    def test_score_generator_export_pdf(self, fake_musescore, tmp_path):
+        """Test ScoreGenerator avec service : PDF seul dans le répertoire de sortie."""
+        command, _ = fake_musescore
+        notes = [QuantizedNote(midi_note=60 + i, beat_position=float(i), duration_beats=1.0) for i in range(4)]
+
+        with PdfRenderer(command=command) as renderer:
+            generator = ScoreGenerator(pdf_renderer=renderer)
+            score = generator.notes_to_music21(notes, 100.0)
+            pdf_path = generator.export_pdf(score, str(tmp_path / "out" / "score.pdf"))
+            future = generator.submit_pdf(score, str(tmp_path / "out" / "async.pdf"))
+            async_path = future.result(timeout=30)
+
+        assert sorted(p.name for p in (tmp_path / "out").iterdir()) == ["async.pdf", "score.pdf"]
+        assert b"<score-partwise" in Path(pdf_path).read_bytes()
+        assert async_path.is_file()
+
+    def test_score_generator_export_pdf_failure(self, fake_musescore, tmp_path):
+        """Test échec de rendu remonté en RuntimeError par export_pdf."""
+        command, _ = fake_musescore
+        notes = [QuantizedNote(midi_note=60, beat_position=0.0, duration_beats=1.0)]
+
+        with PdfRenderer(command=command) as renderer:
+            generator = ScoreGenerator(pdf_renderer=renderer)
+            score = generator.notes_to_music21(notes, 100.0)
+            with pytest.raises(RuntimeError, match="PDF non produit"):
+                generator.export_pdf(score, str(tmp_path / "fail.pdf"))
+
+
+class TestCanonicalMusicxml:
+    """Test suite for canonical_musicxml."""
+
+    def test_two_exports_same_canonical_form(self, tmp_path):
+        """Test deux Scores identiques : identifiants et date différents, même forme canonique."""
+        notes = [QuantizedNote(midi_note=60 + i, beat_position=float(i), duration_beats=1.0) for i in range(4)]
+        generator = ScoreGenerator()
+        first = generator.export_musicxml(generator.notes_to_music21(notes, 100.0), str(tmp_path / "a.musicxml"))
+        second = generator.export_musicxml(generator.notes_to_music21(notes, 100.0), str(tmp_path / "b.musicxml"))
+
+        assert first.read_bytes() != second.read_bytes()
+        assert canonical_musicxml(first.read_bytes()) == canonical_musicxml(second.read_bytes())
+
+    def test_content_change_detected(self):
+        """Test indentation et commentaires ignorés, contenu comparé."""
+        base = b"<score-partwise><part id='P1'><step>C</step></part></score-partwise>"
+        pretty = b"<!-- part --><score-partwise>\n  <part id='X'>\n    <step>C</step>\n  </part>\n</score-partwise>"
+        changed = b"<score-partwise><part id='P1'><step>D</step></part></score-partwise>"
+
+        assert canonical_musicxml(base) == canonical_musicxml(pretty)
+        assert canonical_musicxml(base) != canonical_musicxml(changed)
+
+    def test_invalid_xml(self):
+        """Test MusicXML mal formé."""
+        with pytest.raises(ValueError, match="MusicXML invalide"):
+            canonical_musicxml(b"<score-partwise>")
+
+
+class TestPdfCache:
+    """Test suite for PdfCache."""
+
+    def test_store_and_fetch(self, tmp_path):
+        """Test PDF stocké puis copié (lien dur) vers une autre sortie."""
+        cache = PdfCache(str(tmp_path / "cache"))
+        [xml] = make_inputs(tmp_path, ["score"])
+        pdf = tmp_path / "score.pdf"
+        pdf.write_bytes(b"%PDF rendu")
+        key = cache.key(str(xml), "MuseScore 4.2")
+
+        assert cache.fetch(key, str(tmp_path / "copy.pdf")) is None
+        cache.store(key, str(pdf))
+        copy = cache.fetch(key, str(tmp_path / "out" / "copy.pdf"))
+
+        assert copy.read_bytes() == b"%PDF rendu"
+        assert os.path.samefile(copy, cache.directory / f"{key}.pdf")
+
+    def test_key_includes_renderer_version(self, tmp_path):
+        """Test clé différente pour une autre version de MuseScore."""
+        cache = PdfCache(str(tmp_path / "cache"))
+        [xml] = make_inputs(tmp_path, ["score"])
+
+        assert cache.key(str(xml), "MuseScore 4.2") != cache.key(str(xml), "MuseScore 4.3")
+
+    def test_lru_eviction(self, tmp_path):
+        """Test éviction de l'entrée la moins récemment lue au-delà de max_bytes."""
+        cache = PdfCache(str(tmp_path / "cache"), max_bytes=250)
+        pdf = tmp_path / "score.pdf"
+        for i, key in enumerate(["a", "b"]):
+            pdf.write_bytes(key.encode() * 100)
+            cache.store(key, str(pdf))
+            os.utime(cache.directory / f"{key}.pdf", (i, i))
+            pdf.unlink()
+
+        # "a" lu : "b" devient la moins récente, évincée par l'ajout de "c" (300 > 250 octets)
+        cache.fetch("a", str(tmp_path / "a.pdf"))
+        pdf.write_bytes(b"c" * 100)
+        cache.store("c", str(pdf))
+
+        assert sorted(p.stem for p in cache.directory.glob("*.pdf")) == ["a", "c"]
+
+    def test_invalid_size(self, tmp_path):
+        """Test taille de cache invalide."""
+        with pytest.raises(ValueError, match="Taille de cache invalide"):
+            PdfCache(str(tmp_path), max_bytes=0)
+
+    def test_renderer_version_fallback(self, fake_musescore):
+        """Test commande sans --version : la commande sert de version."""
+        command, _ = fake_musescore
+        assert renderer_version(tuple(command)) == " ".join(command)
+        assert renderer_version((sys.executable,)).startswith("Python")
+
+    def test_score_generator_repeat_render_cached(self, fake_musescore, tmp_path):
+        """Test même partition rendue deux fois : un seul appel du moteur, PDF copié."""
+        command, log = fake_musescore
+        cache = PdfCache(str(tmp_path / "cache"))
+        notes = [QuantizedNote(midi_note=60 + i, beat_position=float(i), duration_beats=1.0) for i in range(4)]
+
+        with PdfRenderer(command=command) as renderer:
+            generator = ScoreGenerator(pdf_renderer=renderer, pdf_cache=cache)
+            first = generator.export_pdf(generator.notes_to_music21(notes, 100.0), str(tmp_path / "first.pdf"))
+            second = generator.submit_pdf(
+                generator.notes_to_music21(notes, 100.0), str(tmp_path / "second.pdf")
+            ).result(timeout=30)
+            other = generator.export_pdf(generator.notes_to_music21(notes[:3], 100.0), str(tmp_path / "other.pdf"))
+
+        assert log.read_text().split() == ["1", "1"]
+        assert second.read_bytes() == first.read_bytes()
+        assert other.read_bytes() != first.read_bytes()
+        assert len(list(cache.directory.glob("*.pdf"))) == 2
+
+    def test_score_generator_picklable_with_renderer(self, fake_musescore, tmp_path):
+        """Test ScoreGenerator picklé (processus d'export) sans son service de rendu."""
+        command, _ = fake_musescore
+
+        with PdfRenderer(command=command) as renderer:
+            generator = ScoreGenerator(pdf_renderer=renderer, pdf_cache=PdfCache(str(tmp_path)))
+            clone = pickle.loads(pickle.dumps(generator))
+
+        assert clone.pdf_renderer is None
+        assert clone.pdf_cache.directory == generator.pdf_cache.directory
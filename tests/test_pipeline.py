@@ -9,8 +9,7 @@ import shutil
 from pathlib import Path
 import json
 
-from src.transcription_pipeline import TranscriptionPipeline, load_config
-from src.types import TranscriptionResult
+from src.pipeline import TranscriptionPipeline, TranscriptionResult, load_config
 
 
 @pytest.fixture
@@ -73,6 +72,25 @@ class TestTranscriptionPipelineInit:
         assert pipeline.quantizer is not None
         assert pipeline.score_generator is not None
         assert pipeline.tracer is not None
+    
+    def test_init_pdf_cache(self, temp_output_dir):
+        """Test cache PDF : désactivé par défaut, créé si répertoire configuré."""
+        assert TranscriptionPipeline().score_generator.pdf_cache is None
+        
+        cache_dir = Path(temp_output_dir) / "pdf_cache"
+        pipeline = TranscriptionPipeline({"output": {"pdf_cache_dir": str(cache_dir), "pdf_cache_max_mb": 1}})
+        
+        assert pipeline.score_generator.pdf_cache.directory == cache_dir
+        assert pipeline.score_generator.pdf_cache.max_bytes == 1024 * 1024
+        assert cache_dir.is_dir()
+    
+    def test_init_deferred_pdf(self):
+        """Test PDF différé : désactivé par défaut, pool borné configurable."""
+        assert TranscriptionPipeline().config["output"]["defer_pdf"] is False
+        
+        pipeline = TranscriptionPipeline({"output": {"defer_pdf": True, "pdf_workers": 3}})
+        
+        assert pipeline.score_generator.pdf_workers == 3
 
 
 class TestConfigValidation:
@@ -132,6 +150,73 @@ class TestTranscribe:
         # BPM devrait être celui fourni
         assert result.bpm == 130.0
     
+    def test_transcribe_tempo_runs_in_background(self, temp_audio_file, temp_output_dir):
+        """Test détection tempo audio lancée dans un thread, jointe à la quantification."""
+        import threading
+        
+        pipeline = TranscriptionPipeline()
+        threads = []
+        
+        def fake_detect_tempo(audio, sr, features=None):
+            threads.append(threading.current_thread().name)
+            return 96.0
+        
+        pipeline.quantizer.detect_tempo = fake_detect_tempo
+        result = pipeline.transcribe(temp_audio_file, temp_output_dir)
+        
+        assert result.bpm == 96.0
+        assert len(threads) == 1
+        assert threads[0].startswith("tempo")
+    
+    def test_transcribe_fixed_bpm_skips_tempo_detection(self, temp_audio_file, temp_output_dir):
+        """Test qu'aucune détection tempo n'est lancée avec un BPM fixe."""
+        pipeline = TranscriptionPipeline({"quantization": {"bpm": 130.0}})
+        pipeline.quantizer.detect_tempo = lambda *args, **kwargs: pytest.fail("detect_tempo appelé")
+        
+        result = pipeline.transcribe(temp_audio_file, temp_output_dir)
+        
+        assert result.bpm == 130.0
+    
+    def test_transcribe_with_tempo_map(self, temp_audio_file, temp_output_dir):
+        """Test quantification sur carte de tempo variable (quantization.tempo_map)."""
+        pipeline = TranscriptionPipeline({"quantization": {"tempo_map": True}})
+        
+        result = pipeline.transcribe(temp_audio_file, temp_output_dir)
+        
+        assert result.tempo_map is not None
+        assert result.bpm == result.tempo_map.bpm
+    
+    def test_transcribe_native_musicxml(self, temp_audio_file, temp_output_dir):
+        """Test moteur MusicXML natif (score_generation.engine)."""
+        pipeline = TranscriptionPipeline({"score_generation": {"engine": "native"}})
+        
+        result = pipeline.transcribe(temp_audio_file, temp_output_dir)
+        
+        assert pipeline.score_generator.engine == "native"
+        assert "<software>MusePartition</software>" in Path(result.musicxml_path).read_text()
+    
+    def test_transcribe_requested_formats_only(self, temp_audio_file, temp_output_dir):
+        """Test export des seuls formats de output.formats."""
+        pipeline = TranscriptionPipeline({"output": {"formats": ["midi"]}})
+        
+        result = pipeline.transcribe(temp_audio_file, temp_output_dir)
+        
+        assert Path(result.midi_path).exists()
+        assert result.musicxml_path == ""
+        assert result.pdf_path == ""
+        assert not list(Path(temp_output_dir).glob("*.musicxml"))
+    
+    def test_transcribe_deferred_pdf(self, temp_audio_file, temp_output_dir):
+        """Test output.defer_pdf : MusicXML et MIDI écrits, PDF dans result.pdf_future."""
+        pipeline = TranscriptionPipeline({"output": {"defer_pdf": True}})
+        pipeline.score_generator.export_pdf = lambda score, path: Path(path).write_bytes(b"%PDF") and Path(path)
+        
+        result = pipeline.transcribe(temp_audio_file, temp_output_dir)
+        
+        assert Path(result.musicxml_path).exists() and Path(result.midi_path).exists()
+        assert result.pdf_path == ""
+        assert result.pdf_future.result(timeout=60) == Path(temp_output_dir) / "score.pdf"
+    
     def test_transcribe_creates_output_dir(self, temp_audio_file):
         """Test création automatique répertoire sortie."""
         output_dir = Path(tempfile.gettempdir()) / "test_output_new"
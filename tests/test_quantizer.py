@@ -6,7 +6,7 @@ Unit tests for the quantizer module
 import pytest
 import numpy as np
 from src.quantizer import MusicalQuantizer
-from src.types import Note, QuantizedNote
+from src.types import Note, NoteArray, QuantizedNote, TempoMap
 
 
 class TestMusicalQuantizer:
@@ -105,6 +105,16 @@ class TestMusicalQuantizer:
         with pytest.raises(ValueError, match="Grille invalide"):
             MusicalQuantizer(quantization_grid="1/64")
     
+    def test_grid_fraction_exact(self):
+        """Test pas de grille exact (Fraction) à côté du pas flottant."""
+        from fractions import Fraction
+        
+        quantizer = MusicalQuantizer(quantization_grid="1/12")
+        
+        assert quantizer.grid_fraction == Fraction(1, 3)
+        assert quantizer.grid_step == 1 / 3
+        assert MusicalQuantizer(time_signature="6/8", quantization_grid="1/16").grid_fraction == Fraction(1, 2)
+    
     def test_init_triplet_feel(self):
         """Test initialisation avec feel='triplet'."""
         quantizer = MusicalQuantizer(quantization_grid="1/12", feel="triplet")
@@ -277,6 +287,298 @@ class TestMusicalQuantizer:
         with pytest.raises(ValueError, match="Sample rate invalide"):
             quantizer.detect_tempo(audio, -1)
     
+    def test_detect_tempo_reuses_features(self, quantizer, sample_audio):
+        """Test que la détection tempo lit le cache AudioFeatures du job."""
+        from src.audio_features import AudioFeatures
+        
+        audio, sr = sample_audio
+        features = AudioFeatures(audio, sr)
+        magnitude = features.magnitude
+        
+        bpm = quantizer.detect_tempo(audio, sr, features=features)
+        
+        assert bpm == quantizer.detect_tempo(audio, sr)
+        assert features.magnitude is magnitude
+        assert features.is_computed("tempogram")
+    
+    def test_quantize_notes_reuses_features(self, sample_notes, sample_audio):
+        """Test que quantize_notes transmet le cache AudioFeatures à la détection tempo."""
+        from src.audio_features import AudioFeatures
+    
+        quantizer = MusicalQuantizer()
+        audio, sr = sample_audio
+        features = AudioFeatures(audio, sr)
+        onset_strength = features.onset_strength
+    
+        quantized, bpm = quantizer.quantize_notes(sample_notes, audio=audio, sr=sr, features=features)
+    
+        assert bpm == quantizer.detect_tempo(audio, sr)
+        assert features.onset_strength is onset_strength
+        assert features.is_computed("tempogram")
+        assert len(quantized) == len(sample_notes)
+    
+    # --- Tests Tempo depuis les Notes ---
+    
+    @staticmethod
+    def _notes_at_beats(beats, bpm, jitter=0.01, seed=0):
+        """Notes aux positions données (en beats), avec jeu humain gaussien."""
+        rng = np.random.default_rng(seed)
+        times = np.sort(np.maximum(np.asarray(beats) * 60.0 / bpm + rng.normal(0, jitter, len(beats)), 0))
+        return [Note(midi_note=69, start_time=float(t), duration=0.1) for t in times]
+    
+    @pytest.mark.parametrize("bpm", [90.0, 120.0, 160.0])
+    def test_detect_tempo_from_notes(self, bpm):
+        """Test estimation tempo sur noires et croches mélangées."""
+        quantizer = MusicalQuantizer(tempo_detection_method="note_onsets")
+        pattern = np.concatenate([np.array([0, 1, 2, 2.5, 3]) + 4 * bar for bar in range(16)])
+        
+        detected = quantizer.detect_tempo_from_notes(self._notes_at_beats(pattern, bpm))
+        
+        assert abs(detected - bpm) < 2.0
+    
+    def test_detect_tempo_from_notes_fallback(self, quantizer):
+        """Test repli à 120 BPM avec trop peu d'onsets."""
+        notes = [Note(midi_note=60, start_time=0.0, duration=0.5)]
+        assert quantizer.detect_tempo_from_notes(notes) == 120.0
+    
+    def test_quantize_notes_onsets_without_audio(self):
+        """Test quantification avec tempo estimé sur les notes, sans audio."""
+        quantizer = MusicalQuantizer(tempo_detection_method="note_onsets")
+        notes = self._notes_at_beats(np.arange(32), 100.0, jitter=0.005)
+        
+        quantized, bpm = quantizer.quantize_notes(notes)
+        
+        assert abs(bpm - 100.0) < 1.0
+        assert [q.beat_position for q in quantized] == list(np.arange(32.0))
+    
+    def test_invalid_tempo_method(self):
+        """Test méthode de détection tempo invalide."""
+        with pytest.raises(ValueError, match="Méthode de détection tempo invalide"):
+            MusicalQuantizer(tempo_detection_method="psychic")
+    
+    def test_tempo_method_legacy_alias(self):
+        """Test ancien nom "beat_track" ramené sur "librosa_tempo" (défaut)."""
+        assert MusicalQuantizer().tempo_detection_method == "librosa_tempo"
+        assert MusicalQuantizer(tempo_detection_method="beat_track").tempo_detection_method == "librosa_tempo"
+    
+    # --- Tests Quantification en Ligne ---
+    
+    @staticmethod
+    def _played_notes(n, bpm=100.0, seed=1):
+        """Notes jouées (croches, noires, triolets, jeu humain), chevauchements compris."""
+        rng = np.random.default_rng(seed)
+        beats = np.cumsum(rng.choice([0.25, 0.5, 0.5, 1.0, 1.0, 1 / 3], n))
+        starts = np.sort(np.maximum(beats * 60.0 / bpm + rng.normal(0, 0.02, n), 0.0))
+        durations = rng.uniform(0.05, 0.8, n)
+        midi = rng.integers(50, 80, n)
+        return [Note(int(m), float(t), float(d)) for m, t, d in zip(midi, starts, durations)]
+    
+    @staticmethod
+    def _stream_all(stream, notes):
+        """Alimente le flux note par note ; retourne (émises avant flush, total)."""
+        quantized = []
+        for note in notes:
+            quantized.extend(stream.feed([note]))
+        before_flush = len(quantized)
+        return before_flush, quantized + stream.flush()
+    
+    @pytest.mark.parametrize("lookahead", [0.0, 1.0, 4.0, float("inf")])
+    def test_stream_fixed_bpm_matches_batch(self, quantizer, lookahead):
+        """Test flux à tempo fixe identique à quantize_notes, quel que soit le look-ahead."""
+        notes = self._played_notes(300)
+        
+        before_flush, streamed = self._stream_all(quantizer.stream(lookahead_beats=lookahead), notes)
+        
+        assert streamed == quantizer.quantize_notes(notes, bpm=120.0)[0]
+        if lookahead < float("inf"):
+            assert before_flush > 250
+    
+    def test_stream_estimated_tempo_full_lookahead_matches_batch(self):
+        """Test tempo estimé : look-ahead infini identique au batch "note_onsets"."""
+        quantizer = MusicalQuantizer(tempo_detection_method="note_onsets")
+        notes = self._played_notes(300)
+        stream = quantizer.stream(lookahead_beats=float("inf"))
+        
+        before_flush, streamed = self._stream_all(stream, notes)
+        
+        assert before_flush == 0
+        assert streamed == quantizer.quantize_notes(notes)[0]
+    
+    def test_stream_estimated_tempo_bounded_lookahead(self):
+        """Test tempo estimé, look-ahead borné : tempo convergé, sortie monophonique."""
+        quantizer = MusicalQuantizer()
+        notes = self._played_notes(300)
+        stream = quantizer.stream(lookahead_beats=2.0)
+        
+        for note in notes:
+            stream.feed([note])
+        assert abs(stream.bpm - 100.0) < 2.0
+        
+        _, streamed = self._stream_all(quantizer.stream(lookahead_beats=2.0), notes)
+        positions = np.array([q.beat_position for q in streamed])
+        ends = positions + np.array([q.duration_beats for q in streamed])
+        assert np.all(np.diff(positions) > 0)
+        assert np.all(ends[:-1] <= positions[1:])
+    
+    def test_stream_emits_after_lookahead(self, quantizer):
+        """Test émission dès que le look-ahead (en beats) est dépassé."""
+        stream = quantizer.stream(lookahead_beats=2.0)
+        
+        assert stream.feed([Note(midi_note=60, start_time=0.0, duration=0.4)]) == []
+        assert stream.feed([Note(midi_note=62, start_time=0.5, duration=0.4)]) == []
+        # Fin à 1.1s = 2.2 beats : la note en 0 est dépassée de 2 beats
+        emitted = stream.feed([Note(midi_note=64, start_time=1.0, duration=0.1)])
+        
+        assert emitted == [QuantizedNote(midi_note=60, beat_position=0.0, duration_beats=0.75)]
+        assert len(stream.flush()) == 2
+    
+    def test_stream_unordered_notes(self, quantizer):
+        """Test erreur si les notes arrivent dans le désordre."""
+        stream = quantizer.stream()
+        stream.feed([Note(midi_note=60, start_time=1.0, duration=0.5)])
+        
+        with pytest.raises(ValueError, match="Notes non ordonnées"):
+            stream.feed([Note(midi_note=62, start_time=0.5, duration=0.5)])
+    
+    def test_stream_invalid_lookahead(self, quantizer):
+        """Test look-ahead négatif."""
+        with pytest.raises(ValueError, match="Look-ahead invalide"):
+            quantizer.stream(lookahead_beats=-1.0)
+    
+    # --- Tests Tempogramme FFT ---
+    
+    @pytest.mark.parametrize("bpm", [72.0, 100.0, 137.0, 160.0])
+    def test_detect_tempo_fft_tempogram(self, bpm):
+        """Test méthode "tempogram" sur une piste de clicks."""
+        quantizer = MusicalQuantizer(tempo_detection_method="tempogram")
+        audio, sr = self._click_track(np.arange(0.0, 30.0, 60.0 / bpm))
+        
+        assert abs(quantizer.detect_tempo(audio, sr) - bpm) < 1.0
+    
+    def test_detect_tempo_fft_skips_full_tempogram(self, sample_audio):
+        """Test que la méthode "tempogram" ne calcule pas le tempogramme par frame."""
+        from src.audio_features import AudioFeatures
+        
+        quantizer = MusicalQuantizer(tempo_detection_method="tempogram")
+        audio, sr = sample_audio
+        features = AudioFeatures(audio, sr)
+        
+        quantizer.detect_tempo(audio, sr, features=features)
+        
+        assert features.is_computed("tempo_autocorrelation")
+        assert not features.is_computed("tempogram")
+    
+    # --- Tests Carte de Tempo ---
+    
+    @staticmethod
+    def _click_track(beat_times, sr=22050):
+        """Clicks de 1 kHz amortis aux instants donnés."""
+        audio = np.zeros(int((beat_times[-1] + 1.0) * sr))
+        click = np.sin(2 * np.pi * 1000 * np.arange(800) / sr) * np.exp(-np.arange(800) / 150)
+        for beat_time in beat_times:
+            idx = int(beat_time * sr)
+            audio[idx:idx + 800] += click
+        return audio, sr
+    
+    def test_detect_tempo_map_accelerando(self, quantizer):
+        """Test suivi d'un accelerando 90 → 130 BPM."""
+        beat_times = [0.0]
+        while beat_times[-1] < 30.0:
+            beat_times.append(beat_times[-1] + 60.0 / (90.0 + 40.0 * beat_times[-1] / 30.0))
+        audio, sr = self._click_track(beat_times)
+        
+        tempo_map = quantizer.detect_tempo_map(audio, sr)
+        changes = tempo_map.tempo_changes()
+        
+        assert tempo_map.beat_times[0] <= 0.0
+        assert len(changes) > 3
+        assert changes[0][1] < 100.0 < 120.0 < changes[-1][1]
+        # Les clicks tombent sur des beats entiers de la carte
+        beats = tempo_map.seconds_to_beats(beat_times[8:-8])
+        assert np.abs(beats - np.round(beats)).max() < 0.15
+    
+    def test_detect_tempo_map_empty_audio(self, quantizer):
+        """Test carte de tempo sur audio vide."""
+        with pytest.raises(ValueError, match="Audio vide"):
+            quantizer.detect_tempo_map(np.array([]), 22050)
+    
+    def test_quantize_with_tempo_map(self, quantizer):
+        """Test quantification avec une carte de tempo variable."""
+        tempo_map = TempoMap(np.concatenate((np.arange(5.0), 4.0 + 0.5 * np.arange(1, 9))))
+        notes = [
+            Note(midi_note=60, start_time=0.0, duration=1.0),    # 60 BPM : 1 beat
+            Note(midi_note=62, start_time=3.0, duration=1.0),
+            Note(midi_note=64, start_time=4.0, duration=1.0),    # 120 BPM : 2 beats
+            Note(midi_note=65, start_time=5.02, duration=0.25),
+        ]
+        
+        quantized, used_map = quantizer.quantize_with_tempo_map(notes, tempo_map=tempo_map)
+        
+        assert used_map is tempo_map
+        assert quantized == [
+            QuantizedNote(midi_note=60, beat_position=0.0, duration_beats=1.0),
+            QuantizedNote(midi_note=62, beat_position=3.0, duration_beats=1.0),
+            QuantizedNote(midi_note=64, beat_position=4.0, duration_beats=2.0),
+            QuantizedNote(midi_note=65, beat_position=6.0, duration_beats=0.5),
+        ]
+    
+    def test_quantize_with_constant_tempo_map_matches_bpm(self, quantizer, sample_notes):
+        """Test carte à tempo constant équivalente à un BPM fixe."""
+        quantized, _ = quantizer.quantize_with_tempo_map(
+            sample_notes, tempo_map=TempoMap.constant(120.0, 3.0)
+        )
+        
+        assert quantized == quantizer.quantize_notes(sample_notes, bpm=120.0)[0]
+    
+    def test_quantize_with_tempo_map_no_audio(self, quantizer, sample_notes):
+        """Test erreur sans carte ni audio."""
+        with pytest.raises(ValueError, match="Carte de tempo non fournie"):
+            quantizer.quantize_with_tempo_map(sample_notes)
+    
+    # --- Tests Sélection Automatique de Grille ---
+    
+    @pytest.mark.parametrize("pattern, expected", [
+        ([0, 1, 2, 3], "1/4"),
+        ([0, 1, 1.5, 2, 3, 3.5], "1/8"),
+        ([0, 1, 1.5, 1.75, 2, 3, 3.25, 3.5], "1/16"),
+        ([0, 1, 4 / 3, 5 / 3, 2, 3], "1/12"),
+    ])
+    def test_select_grid(self, quantizer, pattern, expected):
+        """Test choix de la grille la plus simple qui colle au jeu."""
+        rng = np.random.default_rng(0)
+        beats = np.concatenate([np.array(pattern) + 4 * bar for bar in range(8)])
+        
+        grid, scores = quantizer.select_grid(beats + rng.normal(0, 0.03, beats.size))
+        
+        assert grid == expected
+        assert list(scores)[0] == expected
+        assert set(scores) == {"1/4", "1/8", "1/16", "1/32", "1/12", "1/24"}
+        assert list(scores.values()) == sorted(scores.values())
+    
+    def test_quantize_auto_grid_triplets(self):
+        """Test mode auto : triolets détectés, feel et grid_step mis à jour."""
+        quantizer = MusicalQuantizer(quantization_grid="auto")
+        notes = [
+            Note(midi_note=60 + i, start_time=i * 0.5 / 3, duration=0.15)
+            for i in range(12)
+        ]
+        
+        quantized, _ = quantizer.quantize_notes(notes, bpm=120.0)
+        
+        assert quantizer.quantization_grid == "1/12"
+        assert quantizer.feel == "triplet"
+        assert quantizer.grid_step == pytest.approx(1 / 3)
+        assert list(quantizer.grid_scores)[0] == "1/12"
+        np.testing.assert_allclose([q.beat_position for q in quantized], np.arange(12) / 3)
+    
+    def test_auto_grid_default_before_selection(self):
+        """Test mode auto : grille 1/16 tant que rien n'a été quantifié."""
+        quantizer = MusicalQuantizer(quantization_grid="auto")
+        
+        assert quantizer.auto_grid
+        assert quantizer.grid_step == 0.25
+        assert quantizer.grid_scores == {}
+    
     # --- Tests Quantification Notes ---
     
     def test_quantize_notes_with_fixed_bpm(self, quantizer, sample_notes):
@@ -368,6 +670,76 @@ class TestMusicalQuantizer:
         assert abs(quantized[1].beat_position - 0.333) < 0.05  # 1/3 beat
         assert abs(quantized[2].beat_position - 0.667) < 0.05  # 2/3 beat
     
+    # --- Tests Quantification Vectorisée ---
+    
+    @staticmethod
+    def _reference_quantization(quantizer, notes, bpm):
+        """Implémentation note par note (référence des règles de quantize_arrays)."""
+        snapped = []
+        for note in sorted(notes, key=lambda n: n.start_time):
+            position = max(0.0, quantizer.quantize_position(quantizer.seconds_to_beats(note.start_time, bpm)))
+            duration = quantizer.quantize_duration(quantizer.seconds_to_beats(note.duration, bpm))
+            if snapped and snapped[-1][1] == position:
+                if note.duration > snapped[-1][3]:
+                    snapped[-1] = (note.midi_note, position, duration, note.duration)
+                continue
+            snapped.append((note.midi_note, position, duration, note.duration))
+        
+        result = []
+        for i, (midi, position, duration, _) in enumerate(snapped):
+            if i + 1 < len(snapped):
+                gap_steps = round((snapped[i + 1][1] - position) / quantizer.grid_step)
+                duration = min(duration, gap_steps * quantizer.grid_step)
+            result.append(QuantizedNote(midi_note=midi, beat_position=position, duration_beats=duration))
+        return result
+    
+    @pytest.mark.parametrize("grid,feel", [("1/16", "straight"), ("1/8", "triplet"), ("1/32", "straight")])
+    def test_quantize_matches_reference(self, grid, feel):
+        """Test chemin vectorisé identique à la référence scalaire."""
+        quantizer = MusicalQuantizer(quantization_grid=grid, feel=feel)
+        rng = np.random.default_rng(7)
+        starts = np.cumsum(rng.exponential(0.12, 500))
+        notes = [
+            Note(midi_note=int(m), start_time=float(t), duration=float(d))
+            for m, t, d in zip(rng.integers(60, 84, 500), starts, rng.exponential(0.15, 500))
+        ]
+        
+        quantized, _ = quantizer.quantize_notes(notes, bpm=97.0)
+        
+        assert quantized == self._reference_quantization(quantizer, notes, 97.0)
+    
+    def test_quantize_collision_keeps_longest(self, quantizer):
+        """Test que deux notes sur la même case gardent la plus longue."""
+        notes = [
+            Note(midi_note=60, start_time=0.0, duration=0.5),
+            Note(midi_note=61, start_time=0.51, duration=0.05),  # ornement
+            Note(midi_note=62, start_time=0.53, duration=0.5),
+        ]
+        
+        quantized, _ = quantizer.quantize_notes(notes, bpm=120.0)
+        
+        assert [q.midi_note for q in quantized] == [60, 62]
+        assert quantized[1].beat_position == 1.0
+    
+    def test_quantize_overlap_truncated(self, quantizer):
+        """Test troncature d'une durée qui déborde sur la note suivante."""
+        notes = [
+            Note(midi_note=60, start_time=0.0, duration=0.9),
+            Note(midi_note=62, start_time=0.5, duration=0.5),
+        ]
+        
+        quantized, _ = quantizer.quantize_notes(notes, bpm=120.0)
+        
+        assert quantized[0].duration_beats == 1.0
+        assert quantized[1].duration_beats == 1.0
+    
+    def test_quantize_note_array_input(self, quantizer, sample_notes):
+        """Test entrée NoteArray équivalente à la liste."""
+        from_list, _ = quantizer.quantize_notes(sample_notes, bpm=120.0)
+        from_array, _ = quantizer.quantize_notes(NoteArray.from_list(sample_notes), bpm=120.0)
+        
+        assert from_array == from_list
+    
     # --- Tests Benchmarks ---
     
     def test_benchmark_quantization_100_notes(self, quantizer):
@@ -391,6 +763,40 @@ class TestMusicalQuantizer:
         assert len(quantized) == 100
         assert elapsed < 0.1  # Doit être très rapide
     
+    def test_benchmark_quantize_arrays_10000_notes(self, quantizer):
+        """Benchmark chemin vectorisé sur 10000 notes denses."""
+        import time
+        
+        rng = np.random.default_rng(0)
+        notes = NoteArray.from_fields(
+            rng.integers(60, 84, 10000),
+            np.cumsum(rng.exponential(0.08, 10000)),
+            rng.exponential(0.1, 10000)
+        )
+        
+        start = time.perf_counter()
+        quantized = quantizer.quantize_arrays(notes.start_time, notes.duration, notes.midi_note, 120.0)
+        elapsed = time.perf_counter() - start
+        
+        print(f"\n[BENCHMARK] quantize_arrays 10000 notes: {elapsed * 1e6:.0f}µs")
+        
+        assert np.all(np.diff(quantized.beat_position) > 0)
+        assert elapsed < 0.01
+    
+    def test_benchmark_tempo_from_10000_notes(self, quantizer):
+        """Benchmark estimation tempo sur onsets (indépendante de la durée audio)."""
+        import time
+        
+        notes = self._notes_at_beats(np.arange(10000) * 0.5, 120.0)
+        
+        start = time.perf_counter()
+        bpm = quantizer.detect_tempo_from_notes(notes)
+        elapsed = time.perf_counter() - start
+        
+        print(f"\n[BENCHMARK] Tempo from 10000 notes: {elapsed * 1000:.1f}ms ({bpm:.1f} BPM)")
+        
+        assert elapsed < 0.1
+    
     def test_benchmark_tempo_detection(self, quantizer, sample_audio):
         """Benchmark détection tempo."""
         import time
@@ -407,6 +813,50 @@ class TestMusicalQuantizer:
         
         assert elapsed < 2.0  # Doit être raisonnable
     
+    def test_benchmark_stream_10000_notes(self):
+        """Benchmark flux note par note (tempo estimé), coût constant par note."""
+        import time
+        
+        quantizer = MusicalQuantizer()
+        notes = self._played_notes(10000)
+        stream = quantizer.stream(lookahead_beats=4.0)
+        
+        start = time.time()
+        _, streamed = self._stream_all(stream, notes)
+        elapsed = time.time() - start
+        
+        print(f"\n[BENCHMARK] Stream 10000 notes: {elapsed:.3f}s "
+              f"({elapsed / len(notes) * 1e6:.0f}us/note)")
+        
+        assert len(streamed) > 9000
+        assert elapsed < 10.0
+    
+    def test_benchmark_tempo_detection_fft_10min(self):
+        """Benchmark tempo "tempogram" vs tempogramme librosa sur 10 min d'audio."""
+        import time
+        from src.audio_features import AudioFeatures
+        
+        audio, sr = self._click_track(np.arange(0.0, 600.0, 60.0 / 128.0))
+        features = AudioFeatures(audio, sr)
+        features.onset_strength  # STFT partagée avec la détection d'onsets
+        
+        start = time.time()
+        bpm = MusicalQuantizer(tempo_detection_method="tempogram").detect_tempo(
+            audio, sr, features=features
+        )
+        elapsed_fft = time.time() - start
+        
+        start = time.time()
+        MusicalQuantizer().detect_tempo(audio, sr, features=features)
+        elapsed_full = time.time() - start
+        
+        print(f"\n[BENCHMARK] Tempo 10 min (onsets en cache): "
+              f"tempogram FFT {elapsed_fft * 1000:.1f}ms, librosa {elapsed_full * 1000:.0f}ms")
+        print(f"            Detected BPM: {bpm:.2f}")
+        
+        assert abs(bpm - 128.0) < 1.0
+        assert elapsed_fft < elapsed_full
+    
     def test_benchmark_grid_comparison(self, sample_notes):
         """Compare performance différentes grilles."""
         import time
@@ -8,9 +8,10 @@ import numpy as np
 from pathlib import Path
 import tempfile
 import shutil
+import threading
 from typing import List
 
-from src.types import QuantizedNote
+from src.types import QuantizedNote, TempoMap
 from src.score_generator import ScoreGenerator
 
 # Vérifier si music21 est disponible
@@ -97,6 +98,19 @@ class TestScoreGeneratorInit:
         """Test instrument personnalisé."""
         generator = ScoreGenerator(instrument_name="Piano")
         assert generator.instrument_name == "Piano"
+    
+    def test_init_engine(self):
+        """Test moteur MusicXML (music21 par défaut, natif, invalide)."""
+        assert ScoreGenerator().engine == "music21"
+        assert ScoreGenerator(engine="native").engine == "native"
+        
+        with pytest.raises(ValueError, match="Moteur invalide"):
+            ScoreGenerator(engine="lilypond")
+    
+    def test_invalid_pdf_workers(self):
+        """Test nombre de workers PDF invalide."""
+        with pytest.raises(ValueError, match="Nombre de workers PDF invalide"):
+            ScoreGenerator(pdf_workers=0)
 
 
 @pytest.mark.skipif(not MUSIC21_AVAILABLE, reason="music21 non installé")
@@ -133,13 +147,15 @@ class TestNotesToMusic21:
         score = generator.notes_to_music21(notes_with_gaps, bpm=120.0, rest_threshold=0.25)
         
         part = score.parts[0]
-        elements = list(part.flatten().notesAndRests)
+        elements = [e for e in part.flatten().notesAndRests if not e.style.hideObjectOnPrint]
         
         # Devrait avoir : note, rest, note, rest, note
         assert len(elements) == 5
         assert isinstance(elements[0], music21.note.Note)
         assert isinstance(elements[1], music21.note.Rest)
         assert isinstance(elements[2], music21.note.Note)
+        # Dernière mesure complétée (silence masqué, comme makeNotation à l'export)
+        assert part.getElementsByClass(music21.stream.Measure)[-1].highestTime == 4.0
     
     def test_conversion_scale(self, scale_c_major):
         """Test gamme complète."""
@@ -194,6 +210,122 @@ class TestNotesToMusic21:
         part = score.parts[0]
         key = part.flatten().getElementsByClass(music21.key.Key)[0]
         assert key.sharps == 2  # D majeur = 2 dièses
+    
+    def test_conversion_triplets_exact(self):
+        """Test triolets : durées et offsets music21 exacts (Fraction)."""
+        from fractions import Fraction
+        
+        generator = ScoreGenerator()
+        notes = [QuantizedNote(midi_note=60 + i, beat_position=i / 3, duration_beats=1 / 3) for i in range(6)]
+        
+        score = generator.notes_to_music21(notes, bpm=120.0, grid_step=Fraction(1, 3))
+        
+        converted = list(score.parts[0].flatten().notes)
+        assert [n.quarterLength for n in converted] == [Fraction(1, 3)] * 6
+        assert [n.offset for n in converted] == [Fraction(i, 3) for i in range(6)]
+    
+    def test_conversion_bar_boundary_exact(self):
+        """Test fin de note sur la barre de mesure malgré l'arrondi flottant (5/3 + 7/3 = 4)."""
+        generator = ScoreGenerator()
+        step = 1 / 3  # Valeurs telles que produites par le quantificateur (n × pas)
+        notes = [
+            QuantizedNote(midi_note=60, beat_position=5 * step, duration_beats=7 * step),
+            QuantizedNote(midi_note=62, beat_position=4.5, duration_beats=0.5),
+        ]
+        assert notes[0].beat_position + notes[0].duration_beats < 4.0
+        
+        score = generator.notes_to_music21(notes, bpm=120.0)
+        
+        second = score.parts[0].measure(2)
+        assert [(type(e).__name__, e.offset) for e in second.notesAndRests] == [
+            ("Rest", 0.0), ("Note", 0.5), ("Rest", 1.0)
+        ]
+        assert score.parts[0].measure(1).highestTime == 4.0
+    
+    def test_conversion_measure_offsets_exact(self):
+        """Test mesures à offset exact même après un long silence (mesures vides)."""
+        generator = ScoreGenerator(time_signature="3/4")
+        notes = [
+            QuantizedNote(midi_note=60, beat_position=0.0, duration_beats=0.5),
+            QuantizedNote(midi_note=64, beat_position=10.0, duration_beats=1.0),
+            QuantizedNote(midi_note=67, beat_position=15.5, duration_beats=0.5),
+        ]
+        
+        score = generator.notes_to_music21(notes, bpm=120.0)
+        
+        measures = list(score.parts[0].getElementsByClass(music21.stream.Measure))
+        assert [(m.number, m.offset) for m in measures] == [(n, 3.0 * (n - 1)) for n in range(1, 7)]
+        assert [e.offset for e in measures[3].notesAndRests] == [0.0, 1.0, 2.0]
+        assert [e.offset for e in measures[5].notesAndRests] == [0.0, 0.5, 1.0]
+    
+    def test_conversion_ties_across_barlines(self):
+        """Test notes découpées aux barres de mesure et liées, silences découpés sans liaison."""
+        generator = ScoreGenerator()
+        notes = [
+            QuantizedNote(midi_note=60, beat_position=3.0, duration_beats=2.0),
+            QuantizedNote(midi_note=62, beat_position=7.0, duration_beats=6.0),
+            QuantizedNote(midi_note=64, beat_position=15.0, duration_beats=1.0),
+        ]
+        
+        score = generator.notes_to_music21(notes, bpm=120.0)
+        
+        pieces = [
+            (m.number, e.offset, e.quarterLength, e.pitch.midi if e.isNote else None, e.tie.type if e.tie else None)
+            for m in score.parts[0].getElementsByClass(music21.stream.Measure)
+            for e in m.notesAndRests
+        ]
+        assert pieces == [
+            (1, 0.0, 3.0, None, None), (1, 3.0, 1.0, 60, "start"),
+            (2, 0.0, 1.0, 60, "stop"), (2, 1.0, 2.0, None, None), (2, 3.0, 1.0, 62, "start"),
+            (3, 0.0, 4.0, 62, "continue"),
+            (4, 0.0, 1.0, 62, "stop"), (4, 1.0, 2.0, None, None), (4, 3.0, 1.0, 64, None),
+        ]
+    
+    def test_conversion_hidden_rests(self):
+        """Test écarts sous le seuil et fin de dernière mesure : silences masqués."""
+        generator = ScoreGenerator()
+        notes = [
+            QuantizedNote(midi_note=60, beat_position=0.0, duration_beats=0.75),
+            QuantizedNote(midi_note=62, beat_position=1.0, duration_beats=1.25),
+        ]
+        
+        score = generator.notes_to_music21(notes, bpm=120.0, rest_threshold=0.5)
+        
+        rests = [(r.offset, r.quarterLength, r.style.hideObjectOnPrint) for r in score.parts[0].measure(1).notesAndRests if r.isRest]
+        assert rests == [(0.75, 0.25, True), (2.25, 1.75, True)]
+    
+    def test_conversion_notation_finalized(self):
+        """Test altérations, ligatures et durées complexes réglées à la construction."""
+        generator = ScoreGenerator(key_signature="F")
+        notes = [
+            QuantizedNote(midi_note=70, beat_position=0.0, duration_beats=0.5),
+            QuantizedNote(midi_note=71, beat_position=0.5, duration_beats=0.5),
+            QuantizedNote(midi_note=71, beat_position=1.0, duration_beats=1.25),
+        ]
+        
+        score = generator.notes_to_music21(notes, bpm=120.0)
+        
+        part = score.parts[0]
+        converted = list(part.flatten().notes)
+        assert part.streamStatus.accidentals and part.streamStatus.beams
+        assert [n.pitch.accidental.displayStatus for n in converted[:2]] == [False, True]
+        assert [b.type for b in converted[0].beams] == ["start"]
+        assert [(n.quarterLength, n.tie.type if n.tie else None) for n in converted[2:]] == [
+            (1.0, "start"), (0.25, "stop")
+        ]
+    
+    def test_conversion_with_tempo_map(self, scale_c_major):
+        """Test indications de tempo à chaque changement de la carte."""
+        generator = ScoreGenerator()
+        tempo_map = TempoMap(np.concatenate((np.arange(5.0), 4.0 + 0.5 * np.arange(1, 9))))
+        
+        score = generator.notes_to_music21(scale_c_major, bpm=90.0, tempo_map=tempo_map)
+        
+        marks = [
+            (mark.getContextByClass(music21.stream.Measure).number, mark.number)
+            for mark in score.parts[0].recurse().getElementsByClass(music21.tempo.MetronomeMark)
+        ]
+        assert marks == [(1, 60.0), (2, 120.0)]
 
 
 @pytest.mark.skipif(not MUSIC21_AVAILABLE, reason="music21 non installé")
@@ -224,6 +356,33 @@ class TestExports:
         assert result_path.suffix == ".mid"
         assert result_path.stat().st_size > 0
     
+    def test_export_musicxml_ties_across_barline(self, temp_output_dir):
+        """Test export sans makeNotation : note liée à cheval sur la barre, relue telle quelle."""
+        generator = ScoreGenerator(time_signature="3/4")
+        notes = [
+            QuantizedNote(midi_note=60, beat_position=0.0, duration_beats=2.0),
+            QuantizedNote(midi_note=67, beat_position=2.0, duration_beats=2.5),
+        ]
+        score = generator.notes_to_music21(notes, bpm=120.0)
+        
+        path = generator.export_musicxml(score, str(Path(temp_output_dir) / "ties.musicxml"))
+        
+        parsed = music21.converter.parse(str(path)).parts[0]
+        assert [
+            (m.number, n.offset, n.quarterLength, n.tie.type if n.tie else None)
+            for m in parsed.getElementsByClass(music21.stream.Measure)
+            for n in m.notes
+        ] == [(1, 0.0, 2.0, None), (1, 2.0, 1.0, "start"), (2, 0.0, 1.5, "stop")]
+    
+    def test_export_midi_foreign_score(self, temp_output_dir):
+        """Test Score construit hors de notes_to_music21 : export MIDI par music21."""
+        score = music21.stream.Score([music21.stream.Part([music21.note.Note("A4", quarterLength=2.0)])])
+        
+        path = ScoreGenerator().export_midi(score, str(Path(temp_output_dir) / "foreign.mid"))
+        
+        notes = music21.converter.parse(str(path)).flatten().notes
+        assert [(n.pitch.midi, n.quarterLength) for n in notes] == [(69, 2.0)]
+    
     def test_export_pdf_without_musescore(self, simple_quantized_notes, temp_output_dir):
         """Test export PDF (peut échouer si MuseScore absent)."""
         generator = ScoreGenerator()
@@ -315,7 +474,260 @@ class TestGenerateScore:
         
         assert paths['musicxml'].exists()
         assert paths['midi'].exists()
-
+    
+    def test_generate_score_native_engine(self, scale_c_major, temp_output_dir):
+        """Test moteur natif : MusicXML écrit sans music21, même contenu."""
+        generator = ScoreGenerator(engine="native")
+        
+        paths = generator.generate_score(
+            scale_c_major,
+            bpm=120.0,
+            output_dir=temp_output_dir,
+            base_filename="native",
+            title="C Major Scale"
+        )
+        
+        assert "<software>MusePartition</software>" in paths['musicxml'].read_text()
+        assert paths['midi'].exists()
+        
+        parsed = music21.converter.parse(str(paths['musicxml']))
+        assert parsed.metadata.movementName == "C Major Scale"
+        assert [n.pitch.midi for n in parsed.flatten().notes] == [n.midi_note for n in scale_c_major]
+        assert [float(n.offset) for n in parsed.flatten().notes] == [n.beat_position for n in scale_c_major]
+        
+        midi = music21.converter.parse(str(paths['midi']))
+        assert [n.pitch.midi for n in midi.flatten().notes] == [n.midi_note for n in scale_c_major]
+    
+    def test_simultaneous_notes_same_in_both_engines(self, temp_output_dir):
+        """Test deux notes au même début : la première gardée par les deux moteurs."""
+        notes = [
+            QuantizedNote(midi_note=60, beat_position=0.0, duration_beats=1.0),
+            QuantizedNote(midi_note=64, beat_position=0.0, duration_beats=1.0),
+            QuantizedNote(midi_note=62, beat_position=1.0, duration_beats=1.0),
+            QuantizedNote(midi_note=67, beat_position=2.0, duration_beats=0.0),
+        ]
+        
+        events = {}
+        for engine in ("music21", "native"):
+            paths = ScoreGenerator(engine=engine).generate_score(
+                notes,
+                bpm=120.0,
+                output_dir=Path(temp_output_dir) / engine,
+                formats=["musicxml"]
+            )
+            parsed = music21.converter.parse(str(paths['musicxml']))
+            events[engine] = [
+                (float(n.offset), float(n.quarterLength), n.pitch.midi if n.isNote else None)
+                for n in parsed.flatten().notesAndRests
+            ]
+        
+        assert events["music21"] == events["native"] == [(0.0, 1.0, 60), (1.0, 1.0, 62), (2.0, 2.0, None)]
+    
+    def test_export_plan(self, temp_output_dir):
+        """Test plan d'export : formats demandés seulement, ordre fixe."""
+        plan = ScoreGenerator().export_plan(["pdf", "midi"], temp_output_dir, "song")
+        
+        assert [step.format for step in plan] == ["midi", "pdf"]
+        assert plan[0].path == Path(temp_output_dir) / "song.mid"
+        assert all(step.uses_score for step in plan)
+        
+        native = ScoreGenerator(engine="native").export_plan(["musicxml", "midi", "pdf"])
+        assert {step.format: step.uses_score for step in native} == {
+            "pdf": True, "musicxml": False, "midi": False
+        }
+        
+        with pytest.raises(ValueError, match="Formats invalides"):
+            ScoreGenerator().export_plan(["midi", "wav"])
+    
+    def test_generate_score_midi_only(self, simple_quantized_notes, temp_output_dir):
+        """Test MIDI seul : ni MusicXML ni tentative PDF."""
+        generator = ScoreGenerator()
+        generator.export_pdf = None  # Non appelé
+        
+        paths = generator.generate_score(
+            simple_quantized_notes,
+            bpm=120.0,
+            output_dir=temp_output_dir,
+            formats=["midi"]
+        )
+        
+        assert paths['midi'] == Path(temp_output_dir) / "score.mid"
+        assert paths['musicxml'] is None and paths['pdf'] is None
+        assert list(paths['timings']) == ["midi"]
+        assert sorted(p.name for p in Path(temp_output_dir).iterdir()) == ["score.mid"]
+    
+    def test_generate_score_native_skips_music21(self, simple_quantized_notes, temp_output_dir, monkeypatch):
+        """Test moteur natif sans PDF : aucun Score music21 construit."""
+        generator = ScoreGenerator(engine="native")
+        monkeypatch.setattr(generator, "notes_to_music21", None)
+        
+        paths = generator.generate_score(
+            simple_quantized_notes,
+            bpm=120.0,
+            output_dir=temp_output_dir,
+            formats=["musicxml", "midi"]
+        )
+        
+        assert paths['musicxml'].exists()
+        assert paths['midi'].exists()
+        assert paths['pdf'] is None
+    
+    def test_generate_score_mxl(self, scale_c_major, temp_output_dir):
+        """Test format mxl (deux moteurs) : archive seule, même contenu que le MusicXML."""
+        for engine in ("music21", "native"):
+            output_dir = Path(temp_output_dir) / engine
+            generator = ScoreGenerator(engine=engine)
+            
+            paths = generator.generate_score(
+                scale_c_major, bpm=120.0, output_dir=output_dir, formats=["musicxml", "mxl"]
+            )
+            
+            assert paths['mxl'] == output_dir / "score.mxl"
+            assert sorted(p.name for p in output_dir.iterdir()) == ["score.musicxml", "score.mxl"]
+            notes = [
+                [(n.offset, n.pitch.midi) for n in music21.converter.parse(str(p)).flatten().notes]
+                for p in (paths['musicxml'], paths['mxl'])
+            ]
+            assert notes[0] == notes[1]
+    
+    def test_generate_score_default_formats(self, simple_quantized_notes, temp_output_dir):
+        """Test formats par défaut : pas de .mxl sans demande explicite."""
+        generator = ScoreGenerator()
+        
+        paths = generator.generate_score(simple_quantized_notes, bpm=120.0, output_dir=temp_output_dir)
+        
+        assert paths['mxl'] is None
+        assert not list(Path(temp_output_dir).glob("*.mxl"))
+    
+    def test_generate_score_parallel_matches_serial(self, scale_c_major, temp_output_dir, monkeypatch):
+        """Test exports parallèles (processus music21) identiques aux exports successifs."""
+        monkeypatch.setattr("os.cpu_count", lambda: 4)  # Pool de processus même sur 1 CPU
+        generator = ScoreGenerator()
+        
+        parallel = generator.generate_score(
+            scale_c_major, bpm=120.0, output_dir=Path(temp_output_dir) / "parallel",
+            formats=["musicxml", "midi"], parallel=True
+        )
+        serial = generator.generate_score(
+            scale_c_major, bpm=120.0, output_dir=Path(temp_output_dir) / "serial",
+            formats=["musicxml", "midi"], parallel=False
+        )
+        
+        assert parallel['midi'].read_bytes() == serial['midi'].read_bytes()
+        notes = [
+            [(n.offset, n.pitch.midi) for n in music21.converter.parse(str(p['musicxml'])).flatten().notes]
+            for p in (parallel, serial)
+        ]
+        assert notes[0] == notes[1]
+        assert set(parallel['timings']) == {"musicxml", "midi"}
+        assert all(seconds > 0 for seconds in parallel['timings'].values())
+    
+    def test_generate_score_serial_by_default(self, scale_c_major, temp_output_dir, monkeypatch):
+        """Test exports successifs par défaut : un seul Score construit."""
+        generator = ScoreGenerator()
+        builds = []
+        build_score = generator.build_score
+        monkeypatch.setattr(generator, "build_score", lambda job: builds.append(job) or build_score(job))
+        monkeypatch.setattr(generator, "_run_parallel", lambda *args: pytest.fail("_run_parallel appelé"))
+        
+        generator.generate_score(
+            scale_c_major, bpm=120.0, output_dir=temp_output_dir, formats=["musicxml", "midi"]
+        )
+        
+        assert len(builds) == 1
+    
+    def test_run_parallel_processes_before_threads(self, scale_c_major, temp_output_dir, monkeypatch):
+        """Test pool de processus alimenté avant le premier thread du plan (fork sans thread actif)."""
+        from concurrent.futures import ThreadPoolExecutor
+        import src.score_generator as score_generator
+        
+        monkeypatch.setattr("os.cpu_count", lambda: 4)
+        submissions = []
+        
+        def recording_pool(kind):
+            class RecordingPool(ThreadPoolExecutor):
+                def submit(self, fn, *args, **kwargs):
+                    submissions.append(kind)
+                    return super().submit(fn, *args, **kwargs)
+            return RecordingPool
+        
+        monkeypatch.setattr(score_generator, "ProcessPoolExecutor", recording_pool("process"))
+        monkeypatch.setattr(score_generator, "ThreadPoolExecutor", recording_pool("thread"))
+        generator = ScoreGenerator()
+        generator.export_pdf = lambda score, path: None
+        
+        generator.generate_score(
+            scale_c_major, bpm=120.0, output_dir=temp_output_dir,
+            formats=["musicxml", "midi", "pdf"], parallel=True
+        )
+        
+        assert submissions == ["process", "process", "thread"]
+    
+    def test_export_pdf_renders_in_temp_dir(self, simple_quantized_notes, temp_output_dir, monkeypatch):
+        """Test PDF : le .musicxml intermédiaire de music21 reste hors du répertoire de sortie."""
+        def fake_write(score, fmt, fp, **keywords):
+            assert keywords == {"makeNotation": False}
+            Path(fp).with_suffix(".musicxml").write_text("<score-partwise/>")
+            Path(fp).write_bytes(b"%PDF-1.4")
+            return Path(fp)
+        
+        generator = ScoreGenerator()
+        score = generator.notes_to_music21(simple_quantized_notes, 120.0)
+        monkeypatch.setattr(score, "write", lambda fmt, fp, **keywords: fake_write(score, fmt, fp, **keywords))
+        
+        path = generator.export_pdf(score, str(Path(temp_output_dir) / "score.pdf"))
+        
+        assert path.read_bytes() == b"%PDF-1.4"
+        assert [p.name for p in Path(temp_output_dir).iterdir()] == ["score.pdf"]
+    
+    def test_generate_score_defer_pdf(self, simple_quantized_notes, temp_output_dir, monkeypatch):
+        """Test PDF différé : retour avant la fin du rendu, résultat dans pdf_future."""
+        release = threading.Event()
+        
+        def slow_export_pdf(score, output_path):
+            assert release.wait(10)
+            Path(output_path).write_bytes(b"%PDF-1.4")
+            return Path(output_path)
+        
+        generator = ScoreGenerator(pdf_workers=1)
+        monkeypatch.setattr(generator, "export_pdf", slow_export_pdf)
+        
+        paths = generator.generate_score(
+            simple_quantized_notes, bpm=120.0, output_dir=temp_output_dir, defer_pdf=True
+        )
+        
+        assert paths['musicxml'].exists() and paths['midi'].exists()
+        assert paths['pdf'] is None
+        assert set(paths['timings']) == {"musicxml", "midi"}
+        assert not paths['pdf_future'].done()
+        
+        release.set()
+        assert paths['pdf_future'].result(timeout=30) == Path(temp_output_dir) / "score.pdf"
+    
+    def test_generate_score_defer_pdf_failure(self, simple_quantized_notes, temp_output_dir, monkeypatch):
+        """Test PDF différé en échec (MuseScore absent) : pdf_future résolue avec None."""
+        def failing_export_pdf(score, output_path):
+            raise RuntimeError("MuseScore introuvable")
+        
+        generator = ScoreGenerator()
+        monkeypatch.setattr(generator, "export_pdf", failing_export_pdf)
+        
+        paths = generator.generate_score(
+            simple_quantized_notes, bpm=120.0, output_dir=temp_output_dir, formats=["pdf"], defer_pdf=True
+        )
+        
+        assert paths['timings'] == {}
+        assert paths['pdf_future'].result(timeout=30) is None
+    
+    def test_generate_score_not_deferred(self, simple_quantized_notes, temp_output_dir):
+        """Test PDF non demandé : pas de pdf_future, même avec defer_pdf."""
+        generator = ScoreGenerator()
+        
+        paths = generator.generate_score(
+            simple_quantized_notes, bpm=120.0, output_dir=temp_output_dir, formats=["midi"], defer_pdf=True
+        )
+        
+        assert paths['pdf_future'] is None
 
 @pytest.mark.skipif(not MUSIC21_AVAILABLE, reason="music21 non installé")
 class TestIntegration:
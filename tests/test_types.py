@@ -0,0 +1,129 @@
+"""
+MusePartition - Types Tests
+Unit tests for the columnar note containers
+"""
+
+import pickle
+import pytest
+import numpy as np
+from src.types import (
+    Note,
+    QuantizedNote,
+    NoteArray,
+    QuantizedNoteArray,
+    TempoMap,
+    NOTE_DTYPE,
+)
+
+
+class TestNoteArray:
+    """Test suite for NoteArray / QuantizedNoteArray."""
+
+    @pytest.fixture
+    def note_list(self):
+        """5 notes ascendantes."""
+        return [Note(midi_note=60 + i, start_time=0.5 * i, duration=0.25 * (i + 1)) for i in range(5)]
+
+    def test_roundtrip_list(self, note_list):
+        """Test conversion liste → tableau → liste à l'identique."""
+        notes = NoteArray.from_list(note_list)
+
+        assert len(notes) == 5
+        assert notes.to_list() == note_list
+        assert type(notes.to_list()[0].midi_note) is int
+
+    def test_field_access(self, note_list):
+        """Test accès vectorisé aux champs."""
+        notes = NoteArray.from_list(note_list)
+
+        np.testing.assert_array_equal(notes.midi_note, [60, 61, 62, 63, 64])
+        np.testing.assert_allclose(notes.start_time + notes.duration, [0.25, 1.0, 1.75, 2.5, 3.25])
+
+    def test_slice_is_view(self, note_list):
+        """Test que le slicing ne copie pas les données."""
+        notes = NoteArray.from_list(note_list)
+
+        head = notes[1:3]
+        head.duration[:] = 9.0
+
+        assert isinstance(head, NoteArray)
+        assert np.shares_memory(head.data, notes.data)
+        assert notes[1].duration == 9.0
+
+    def test_getitem_index_and_mask(self, note_list):
+        """Test indexation entière (Note) et par masque (NoteArray)."""
+        notes = NoteArray.from_list(note_list)
+
+        assert notes[2] == note_list[2]
+        assert notes[-1] == note_list[-1]
+        assert notes[notes.midi_note % 2 == 0].to_list() == note_list[::2]
+        assert list(notes) == note_list
+
+    def test_from_fields(self):
+        """Test construction depuis des colonnes."""
+        quantized = QuantizedNoteArray.from_fields([60, 62], [0.0, 1.0], [1.0, 0.5])
+
+        assert quantized.to_list() == [
+            QuantizedNote(midi_note=60, beat_position=0.0, duration_beats=1.0),
+            QuantizedNote(midi_note=62, beat_position=1.0, duration_beats=0.5),
+        ]
+
+    def test_buffer_roundtrip(self, note_list):
+        """Test sérialisation par copie de buffer brut."""
+        notes = NoteArray.from_list(note_list)
+
+        restored = NoteArray.frombuffer(notes.tobytes())
+
+        assert restored == notes
+        assert len(notes.tobytes()) == 5 * NOTE_DTYPE.itemsize
+        assert pickle.loads(pickle.dumps(notes)) == notes
+
+    def test_empty(self):
+        """Test conteneur vide."""
+        assert NoteArray.from_list([]).to_list() == []
+        assert len(QuantizedNoteArray.empty(3)) == 3
+
+    def test_invalid_dtype(self):
+        """Test rejet d'un tableau de mauvais dtype."""
+        with pytest.raises(ValueError, match="NoteArray"):
+            NoteArray(np.zeros(3))
+
+
+class TestTempoMap:
+    """Test suite for TempoMap."""
+
+    @pytest.fixture
+    def accelerando(self):
+        """Beats à 60 BPM (4 beats) puis 120 BPM (8 beats)."""
+        return TempoMap(np.concatenate((np.arange(5.0), 4.0 + 0.5 * np.arange(1, 9))))
+
+    def test_interpolation(self, accelerando):
+        """Test conversion secondes → beats entre beats suivis."""
+        np.testing.assert_allclose(
+            accelerando.seconds_to_beats([0.0, 1.5, 4.0, 4.25, 8.0]),
+            [0.0, 1.5, 4.0, 4.5, 12.0]
+        )
+
+    def test_extrapolation(self, accelerando):
+        """Test prolongement hors des beats suivis (premier / dernier intervalle)."""
+        np.testing.assert_allclose(accelerando.seconds_to_beats([-1.0, 9.0]), [-1.0, 14.0])
+
+    def test_roundtrip(self, accelerando):
+        """Test beats → secondes → beats à l'identique."""
+        beats = np.linspace(-2.0, 15.0, 40)
+        np.testing.assert_allclose(
+            accelerando.seconds_to_beats(accelerando.beats_to_seconds(beats)), beats
+        )
+
+    def test_constant(self):
+        """Test carte à tempo constant."""
+        tempo_map = TempoMap.constant(120.0, 10.0)
+
+        assert tempo_map.bpm == pytest.approx(120.0)
+        assert tempo_map.beat_times[-1] >= 10.0
+        assert tempo_map.tempo_changes() == [(0.0, 120.0)]
+
+    def test_tempo_changes(self, accelerando):
+        """Test indications de tempo, une par mesure de 4 beats qui change."""
+        assert accelerando.tempo_changes() == [(0.0, 60.0), (4.0, 120.0)]
+        assert accelerando.tempo_changes(tolerance=100.0) == [(0.0, 60.0)]
@@ -14,7 +14,11 @@ from src.utils import (
     IntermediateStorage, 
     format_duration,
     format_frequency,
-    print_summary_stats
+    print_summary_stats,
+    midi_frequency_table,
+    midi_note_names,
+    rolling_median,
+    MIDI_NOTE_NAMES
 )
 from src.types import PitchFrame
 
@@ -217,6 +221,43 @@ class TestUtilityFunctions:
         result = format_frequency(-10.0)
         assert "invalid" in result
     
+    def test_format_frequency_reference(self):
+        """Test formatage avec diapason baroque (440 Hz → A#4)."""
+        assert "A#4" in format_frequency(440.0, reference_frequency=415.0)
+    
+    def test_midi_frequency_table(self):
+        """Test table MIDI → fréquence."""
+        table = midi_frequency_table(440.0)
+        
+        assert table.shape == (128,)
+        assert table[69] == 440.0
+        assert abs(table[60] - 261.63) < 0.01
+        assert midi_frequency_table(440.0) is table  # Mise en cache
+    
+    def test_midi_note_names(self):
+        """Test noms de notes pré-calculés."""
+        assert MIDI_NOTE_NAMES[60] == "C4"
+        assert midi_note_names(np.array([[0, 127]])).tolist() == [["C-1", "G9"]]
+    
+    def test_rolling_median(self):
+        """Test médiane glissante : pics isolés supprimés, marches conservées."""
+        values = np.array([1.0, 1.0, 9.0, 1.0, 1.0, 5.0, 5.0, 5.0])
+        
+        smoothed = rolling_median(values, 3)
+        
+        np.testing.assert_array_equal(smoothed, [1, 1, 1, 1, 1, 5, 5, 5])
+    
+    def test_rolling_median_ignores_invalid(self):
+        """Test que les valeurs invalides sont exclues des fenêtres."""
+        values = np.array([1.0, 2.0, 0.0, 0.0, 7.0, 8.0])
+        valid = values > 0
+        
+        smoothed = rolling_median(values, 5, valid)
+        
+        assert smoothed[1] == 1.0  # médiane basse de {1, 2}
+        assert smoothed[4] == 7.0  # médiane basse de {7, 8}
+        assert np.isnan(rolling_median(values, 1, valid)[2])
+    
     def test_print_summary_stats_empty(self, capsys):
         """Test affichage stats sur liste vide."""
         print_summary_stats([])